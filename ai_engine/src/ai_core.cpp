@@ -5,13 +5,18 @@
 #include <algorithm>
 #include <memory>
 #include <cmath>
+#include <cstdint>
+#include <chrono>
+#include <atomic>
+#include <thread>
+#include <utility>
+#include <array>
+#include <mutex>
 
 // =========================================================
 // CONSTANTES GLOBALES
 // =========================================================
 
-const int ROWS = 6;
-const int COLS = 7;
 const int AI_PIECE = 1;      // Joueur Maximisant (Rouge)
 const int PLAYER_PIECE = -1; // Joueur Minimisant (Jaune)
 const int EMPTY = 0;
@@ -20,9 +25,56 @@ const int EMPTY = 0;
 const int SCORE_WIN = 100000;
 const int SCORE_3_THREAT = 100;
 const int SCORE_2_BUILD = 5;
-const int SCORE_BLOCK_3 = -80; 
+const int SCORE_BLOCK_3 = -80;
 const int SCORE_STOCK_UNIT = 50; // Valeur d'une munition (V2)
-const int CENTER_BONUS = 3;      // Points par pion au centre
+const int CENTER_BONUS = 3;      // Points par pion dans une colonne centrale
+
+const int MAX_CELL_WINDOWS = 16; // Une case appartient à au plus 13 fenêtres
+
+// =========================================================
+// GÉOMÉTRIE DU PLATEAU
+// =========================================================
+// Chaque taille de plateau prise en charge est une géométrie dont les dimensions
+// sont des constantes de compilation : la recherche est instanciée pour chacune
+// (voir with_geometry), le plateau 7 x 6 ne paie rien pour les autres tailles.
+template <int R, int C>
+struct Geometry {
+    static constexpr int ROWS = R;
+    static constexpr int COLS = C;
+    static constexpr int N_CELLS = R * C;
+
+    // Fenêtres de 4 cases : horizontales, verticales, deux diagonales (69 en 7 x 6)
+    static constexpr int N_WINDOWS = R * (C - 3) + C * (R - 3) + 2 * (R - 3) * (C - 3);
+
+    // Capacité d'une liste de coups : en Variante 1, chaque pose qui aligne 3 pions
+    // se décline en autant de coups que de retraits possibles (moitié des cases au plus)
+    static constexpr int MAX_MOVES = C * (N_CELLS / 2 + 1);
+
+    // Colonne(s) centrale(s) : deux si la largeur est paire, l'heuristique reste symétrique
+    static constexpr bool is_center(int c) { return c == (C - 1) / 2 || c == C / 2; }
+
+    // Ordre d'exploration des colonnes : du centre vers l'extérieur, la gauche d'abord
+    static constexpr std::array<int, C> make_order() {
+        std::array<int, C> order{};
+        int n = 0;
+        for (int d = 0; d < C; d++) {
+            for (int c = 0; c < C; c++) {
+                int dist = 2 * c - (C - 1);
+                if ((dist < 0 ? -dist : dist) == d) order[n++] = c;
+            }
+        }
+        return order;
+    }
+    static constexpr std::array<int, C> ORDER = make_order();
+};
+
+using Board7x6 = Geometry<6, 7>;
+using Board8x7 = Geometry<7, 8>;
+using Board9x7 = Geometry<7, 9>;
+
+// Plus grand plateau pris en charge (tables indexées par case hors de GameState)
+const int MAX_ROWS = 7;
+const int MAX_COLS = 9;
 
 // =========================================================
 // STRUCTURES DE DONNÉES
@@ -30,18 +82,23 @@ const int CENTER_BONUS = 3;      // Points par pion au centre
 
 // Structure pour manipuler le coup en interne
 struct Move {
-    int col;        // 0-6 ou -1 (si action spéciale sans pose)
+    int col;        // Colonne ou -1 (si action spéciale sans pose)
     int kill_row;   // -1 si pas de kill
     int kill_col;   // -1 si pas de kill
-    
+
+    Move() : col(-1), kill_row(-1), kill_col(-1) {}
     Move(int c) : col(c), kill_row(-1), kill_col(-1) {}
     Move(int c, int kr, int kc) : col(c), kill_row(kr), kill_col(kc) {}
-    
+
     // Constructeur spécial V2 (Destruction pure)
     static Move create_kill(int r, int c) {
         return Move(-1, r, c);
     }
-    
+
+    bool operator==(const Move& other) const {
+        return col == other.col && kill_row == other.kill_row && kill_col == other.kill_col;
+    }
+
     // Conversion vers le format Buffer de sortie
     std::vector<int> to_buffer() const {
         std::vector<int> buf;
@@ -54,223 +111,433 @@ struct Move {
     }
 };
 
-// État du jeu unifié (Buffer Wrapper)
-struct GameState {
-    int cells[ROWS * COLS];
-    int p1_stock; // IA
-    int p2_stock; // Humain
-    
-    GameState() : p1_stock(0), p2_stock(0) {
-        std::memset(cells, 0, sizeof(cells));
-    }
+// Liste de coups de taille fixe, allouée sur la pile (aucune allocation par noeud)
+template <int CAP>
+struct MoveList {
+    static constexpr int CAPACITY = CAP;
+    Move moves[CAP];
+    int size = 0;
 
-    int get(int r, int c) const { return cells[r * COLS + c]; }
-    void set(int r, int c, int val) { cells[r * COLS + c] = val; }
-    
-    // Helpers Gravité
-    void apply_gravity_col(int c) {
-        std::vector<int> col_pieces;
-        for (int r = ROWS - 1; r >= 0; --r) {
-            if (get(r, c) != 0) col_pieces.push_back(get(r, c));
-        }
-        // Réécriture
-        for (int r = ROWS - 1; r >= 0; --r) {
-            if (col_pieces.empty()) {
-                set(r, c, 0);
-            } else {
-                set(r, c, col_pieces.front());
-                col_pieces.erase(col_pieces.begin());
-            }
-        }
+    void push(const Move& m) { if (size < CAP) moves[size++] = m; }
+    void clear() { size = 0; }
+    bool empty() const { return size == 0; }
+
+    Move& operator[](int i) { return moves[i]; }
+    const Move& operator[](int i) const { return moves[i]; }
+    Move* begin() { return moves; }
+    Move* end() { return moves + size; }
+    const Move* begin() const { return moves; }
+    const Move* end() const { return moves + size; }
+
+    // Place le coup m en tête en conservant l'ordre des autres
+    void move_to_front(const Move& m) {
+        Move* it = std::find(begin(), end(), m);
+        if (it != end()) std::rotate(begin(), it, it + 1);
     }
 };
 
 // =========================================================
-// LOGIQUE D'ÉVALUATION (HEURISTIQUE)
+// CLÉS ZOBRIST
 // =========================================================
 
-int evaluate_window(const std::vector<int>& window, int piece) {
-    int score = 0;
-    int opp_piece = (piece == AI_PIECE) ? PLAYER_PIECE : AI_PIECE;
+// Générateur déterministe (SplitMix64) : mêmes clés à chaque chargement
+inline uint64_t splitmix64(uint64_t x) {
+    x += 0x9E3779B97F4A7C15ULL;
+    x = (x ^ (x >> 30)) * 0xBF58476D1CE4E5B9ULL;
+    x = (x ^ (x >> 27)) * 0x94D049BB133111EBULL;
+    return x ^ (x >> 31);
+}
 
-    int count_piece = 0;
-    int count_empty = 0;
-    int count_opp = 0;
+template <class G>
+struct ZobristKeys {
+    uint64_t cells[G::N_CELLS][2];  // [case][0 = IA, 1 = Humain]
+    uint64_t side;                  // Trait au joueur minimisant
+    uint64_t mode[3];               // Les règles changent la valeur d'une position
+
+    ZobristKeys() {
+        uint64_t seed = 0x5034534F4C4F47ULL;
+        for (int i = 0; i < G::N_CELLS; i++) {
+            cells[i][0] = splitmix64(seed++);
+            cells[i][1] = splitmix64(seed++);
+        }
+        side = splitmix64(seed++);
+        for (int m = 0; m < 3; m++) mode[m] = splitmix64(seed++);
+    }
 
-    for (int cell : window) {
-        if (cell == piece) count_piece++;
-        else if (cell == EMPTY) count_empty++;
-        else count_opp++;
+    // Les stocks ne sont pas bornés : on les mélange plutôt que d'indexer une table
+    uint64_t stock(int player_idx, int value) const {
+        return splitmix64(0xA5A5A5A5ULL + (static_cast<uint64_t>(value) << 1) + player_idx);
     }
+};
+
+template <class G>
+inline const ZobristKeys<G> zobrist_keys{};
+
+// =========================================================
+// LOGIQUE D'ÉVALUATION (HEURISTIQUE)
+// =========================================================
+
+// Score d'une fenêtre de 4 cases du point de vue de l'IA
+int evaluate_window(int count_piece, int count_opp) {
+    int count_empty = 4 - count_piece - count_opp;
 
     if (count_piece == 4) return SCORE_WIN;
     if (count_piece == 3 && count_empty == 1) return SCORE_3_THREAT;
     if (count_piece == 2 && count_empty == 2) return SCORE_2_BUILD;
-    
+
     // Blocage agressif
     if (count_opp == 3 && count_empty == 1) return SCORE_BLOCK_3;
 
     return 0;
 }
 
-int evaluate_board_position(const GameState& state, int player) {
-    int score = 0;
-    
-    // On évalue le contrôle du centre
-    for (int r = 0; r < ROWS; r++) {
-        if (state.get(r, 3) == player) score += CENTER_BONUS;
+// Tables précalculées : cases de chaque fenêtre, fenêtres de chaque case,
+// et score d'une fenêtre selon son contenu
+template <class G>
+struct WindowTables {
+    static constexpr int ROWS = G::ROWS, COLS = G::COLS, N_CELLS = G::N_CELLS, N_WINDOWS = G::N_WINDOWS;
+
+    int cells[N_WINDOWS][4];
+    int of_cell[N_CELLS][MAX_CELL_WINDOWS];
+    int n_of_cell[N_CELLS];
+    int score[5][5]; // [pions IA][pions humain]
+
+    WindowTables() {
+        int n = 0;
+        auto add = [&](int r, int c, int dr, int dc) {
+            for (int k = 0; k < 4; k++) cells[n][k] = (r + k * dr) * COLS + (c + k * dc);
+            n++;
+        };
+        for (int r = 0; r < ROWS; r++) for (int c = 0; c < COLS - 3; c++) add(r, c, 0, 1);     // Horizontal
+        for (int c = 0; c < COLS; c++) for (int r = 0; r < ROWS - 3; r++) add(r, c, 1, 0);     // Vertical
+        for (int r = 0; r < ROWS - 3; r++) for (int c = 0; c < COLS - 3; c++) add(r, c, 1, 1); // Diagonale positive
+        for (int r = 3; r < ROWS; r++) for (int c = 0; c < COLS - 3; c++) add(r, c, -1, 1);    // Diagonale négative
+
+        std::memset(n_of_cell, 0, sizeof(n_of_cell));
+        for (int w = 0; w < N_WINDOWS; w++) {
+            for (int k = 0; k < 4; k++) {
+                int idx = cells[w][k];
+                of_cell[idx][n_of_cell[idx]++] = w;
+            }
+        }
+
+        for (int a = 0; a <= 4; a++)
+            for (int o = 0; o <= 4; o++)
+                score[a][o] = (a + o <= 4) ? evaluate_window(a, o) : 0;
+    }
+};
+
+template <class G>
+inline const WindowTables<G> window_tables{};
+
+// État du jeu unifié (Buffer Wrapper).
+// Le contenu de chaque fenêtre, le score positionnel et la clé Zobrist des cases
+// sont mis à jour à chaque pose ou retrait : évaluer une feuille ne coûte rien.
+template <class G>
+struct GameState {
+    static constexpr int ROWS = G::ROWS, COLS = G::COLS, N_CELLS = G::N_CELLS, N_WINDOWS = G::N_WINDOWS;
+    static constexpr const WindowTables<G>& windows = window_tables<G>;
+    static constexpr const ZobristKeys<G>& zobrist = zobrist_keys<G>;
+
+    int cells[N_CELLS];
+    int p1_stock; // IA
+    int p2_stock; // Humain
+    int heights[COLS];             // Nombre de pions empilés dans chaque colonne
+
+    uint8_t ai_count[N_WINDOWS];   // Pions IA par fenêtre
+    uint8_t opp_count[N_WINDOWS];  // Pions humains par fenêtre
+    int position_score;            // Centre + somme des fenêtres (point de vue IA)
+    int ai_wins;                   // Fenêtres complètes de chaque joueur
+    int player_wins;
+    uint64_t cells_key;            // Part Zobrist du plateau
+
+    GameState() : p1_stock(0), p2_stock(0), position_score(0), ai_wins(0), player_wins(0), cells_key(0) {
+        std::memset(cells, 0, sizeof(cells));
+        std::memset(heights, 0, sizeof(heights));
+        std::memset(ai_count, 0, sizeof(ai_count));
+        std::memset(opp_count, 0, sizeof(opp_count));
     }
 
-    // On scanne les fenêtres glissantes
-    // Horizontal
-    for (int r = 0; r < ROWS; r++) {
-        for (int c = 0; c < COLS - 3; c++) {
-            std::vector<int> window = {state.get(r,c), state.get(r,c+1), state.get(r,c+2), state.get(r,c+3)};
-            score += evaluate_window(window, player);
+    // Construction depuis un plateau (gravité supposée respectée)
+    static GameState from_cells(const int* board) {
+        GameState s;
+        for (int i = 0; i < N_CELLS; i++) {
+            if (board[i] != EMPTY) s.place(i, board[i]);
         }
+        for (int c = 0; c < COLS; c++) {
+            int h = 0;
+            while (h < ROWS && s.get(ROWS - 1 - h, c) != EMPTY) h++;
+            s.heights[c] = h;
+        }
+        return s;
     }
-    // Vertical
-    for (int c = 0; c < COLS; c++) {
-        for (int r = 0; r < ROWS - 3; r++) {
-            std::vector<int> window = {state.get(r,c), state.get(r+1,c), state.get(r+2,c), state.get(r+3,c)};
-            score += evaluate_window(window, player);
+
+    int get(int r, int c) const { return cells[r * COLS + c]; }
+
+    // Première ligne vide d'une colonne ou -1 si pleine
+    int top_row(int c) const { return heights[c] < ROWS ? ROWS - 1 - heights[c] : -1; }
+
+    bool has_won(int player) const { return (player == AI_PIECE ? ai_wins : player_wins) > 0; }
+
+    // Vrai si poser en idx (case vide) complète une fenêtre du joueur
+    bool completes_window(int idx, int player) const {
+        const uint8_t* own = (player == AI_PIECE) ? ai_count : opp_count;
+        const uint8_t* opp = (player == AI_PIECE) ? opp_count : ai_count;
+        for (int k = 0; k < windows.n_of_cell[idx]; k++) {
+            int w = windows.of_cell[idx][k];
+            if (own[w] == 3 && opp[w] == 0) return true;
         }
+        return false;
     }
-    // Diagonale positive
-    for (int r = 0; r < ROWS - 3; r++) {
-        for (int c = 0; c < COLS - 3; c++) {
-            std::vector<int> window = {state.get(r,c), state.get(r+1,c+1), state.get(r+2,c+2), state.get(r+3,c+3)};
-            score += evaluate_window(window, player);
+
+    // Vrai si aucune fenêtre passant par les lignes top..bottom de la colonne c
+    // n'a de valeur heuristique (fenêtres vides, à un seul pion ou bloquées)
+    bool windows_neutral(int c, int top, int bottom) const {
+        for (int r = top; r <= bottom; r++) {
+            int idx = r * COLS + c;
+            for (int k = 0; k < windows.n_of_cell[idx]; k++) {
+                int w = windows.of_cell[idx][k];
+                if (windows.score[ai_count[w]][opp_count[w]] != 0) return false;
+            }
         }
+        return true;
     }
-    // Diagonale négative
-    for (int r = 0; r < ROWS - 3; r++) {
-        for (int c = 3; c < COLS; c++) {
-            std::vector<int> window = {state.get(r+3,c-3), state.get(r+2,c-2), state.get(r+1,c-1), state.get(r,c)};
-            score += evaluate_window(window, player);
+
+    // Variation du score positionnel si l'on retirait le pion en idx (sans gravité)
+    int removal_delta(int idx) const {
+        bool ai = (cells[idx] == AI_PIECE);
+        int delta = (ai && G::is_center(idx % COLS)) ? -CENTER_BONUS : 0;
+        for (int k = 0; k < windows.n_of_cell[idx]; k++) {
+            int w = windows.of_cell[idx][k];
+            int a = ai_count[w], o = opp_count[w];
+            delta += (ai ? windows.score[a - 1][o] : windows.score[a][o - 1]) - windows.score[a][o];
         }
+        return delta;
     }
 
-    return score;
-}
+    // Pose / retrait élémentaires (sans gravité)
+    void place(int idx, int piece) {
+        cells[idx] = piece;
+        update(idx, piece, 1);
+    }
 
-// Helper pour alignment strict
-bool check_win(const GameState& s, int player) {
-    // Horizontal
-    for (int r=0; r<ROWS; r++)
-        for (int c=0; c<COLS-3; c++)
-            if (s.get(r,c)==player && s.get(r,c+1)==player && s.get(r,c+2)==player && s.get(r,c+3)==player) return true;
-    // Vertical
-    for (int r=0; r<ROWS-3; r++)
-        for (int c=0; c<COLS; c++)
-            if (s.get(r,c)==player && s.get(r+1,c)==player && s.get(r+2,c)==player && s.get(r+3,c)==player) return true;
-    // Diags
-    for (int r=0; r<ROWS-3; r++)
-        for (int c=0; c<COLS-3; c++)
-            if (s.get(r,c)==player && s.get(r+1,c+1)==player && s.get(r+2,c+2)==player && s.get(r+3,c+3)==player) return true;
-    for (int r=3; r<ROWS; r++)
-        for (int c=0; c<COLS-3; c++)
-            if (s.get(r,c)==player && s.get(r-1,c+1)==player && s.get(r-2,c+2)==player && s.get(r-3,c+3)==player) return true;
-    return false;
-}
+    void clear(int idx) {
+        int piece = cells[idx];
+        cells[idx] = EMPTY;
+        update(idx, piece, -1);
+    }
 
-bool check_alignment_3(const GameState& s, int player) {
-    // Même logique pour 3 pions
-    for (int r=0; r<ROWS; r++)
-        for (int c=0; c<COLS-2; c++)
-            if (s.get(r,c)==player && s.get(r,c+1)==player && s.get(r,c+2)==player) return true;
-    for (int r=0; r<ROWS-2; r++)
-        for (int c=0; c<COLS; c++)
-            if (s.get(r+1,c)==player && s.get(r+1,c)==player && s.get(r+2,c)==player) return true; 
-    return false; 
-}
+    // Pose en haut de la colonne ; renvoie la ligne occupée (-1 si pleine)
+    int drop(int c, int piece) {
+        int r = top_row(c);
+        if (r == -1) return -1;
+        place(r * COLS + c, piece);
+        heights[c]++;
+        return r;
+    }
 
-// Helper colonne valide
-int get_top_row(const GameState& s, int c) {
-    for (int r = ROWS - 1; r >= 0; --r) {
-        if (s.get(r, c) == 0) return r;
+    void undrop(int c) {
+        heights[c]--;
+        clear((ROWS - 1 - heights[c]) * COLS + c);
+    }
+
+    // Retire le pion en (r, c) et fait descendre ceux du dessus ; renvoie le pion retiré
+    int collapse(int r, int c) {
+        int piece = cells[r * COLS + c];
+        clear(r * COLS + c);
+        for (int rr = r - 1; rr >= 0 && get(rr, c) != EMPTY; rr--) {
+            int p = get(rr, c);
+            clear(rr * COLS + c);
+            place((rr + 1) * COLS + c, p);
+        }
+        heights[c]--;
+        return piece;
+    }
+
+    // Inverse de collapse : remonte la pile et replace le pion en (r, c)
+    void uncollapse(int r, int c, int piece) {
+        for (int rr = ROWS - heights[c]; rr <= r; rr++) {
+            int p = get(rr, c);
+            clear(rr * COLS + c);
+            place((rr - 1) * COLS + c, p);
+        }
+        place(r * COLS + c, piece);
+        heights[c]++;
     }
-    return -1;
-}
+
+    // Clé complète : plateau, trait, stocks et règles
+    uint64_t key(int player, int mode_id) const {
+        uint64_t k = zobrist.mode[mode_id] ^ cells_key;
+        if (player == PLAYER_PIECE) k ^= zobrist.side;
+        if (p1_stock) k ^= zobrist.stock(0, p1_stock);
+        if (p2_stock) k ^= zobrist.stock(1, p2_stock);
+        return k;
+    }
+
+private:
+    void update(int idx, int piece, int delta) {
+        bool ai = (piece == AI_PIECE);
+        cells_key ^= zobrist.cells[idx][ai ? 0 : 1];
+        if (ai && G::is_center(idx % COLS)) position_score += delta * CENTER_BONUS;
+
+        uint8_t* counts = ai ? ai_count : opp_count;
+        int& wins = ai ? ai_wins : player_wins;
+        for (int k = 0; k < windows.n_of_cell[idx]; k++) {
+            int w = windows.of_cell[idx][k];
+            position_score -= windows.score[ai_count[w]][opp_count[w]];
+            if (counts[w] == 4) wins--;
+            counts[w] += delta;
+            if (counts[w] == 4) wins++;
+            position_score += windows.score[ai_count[w]][opp_count[w]];
+        }
+    }
+};
 
 // =========================================================
-// RÈGLES DU JEU (INTERFACE)
+// RÈGLES DU JEU
 // =========================================================
+// Chaque variante fournit : generate_moves, make_move / unmake_move (le coup est
+// joué sur place puis annulé), evaluate et is_game_over. La recherche est
+// instanciée pour chaque variante et chaque géométrie (voir with_rules) : pas d'appel virtuel.
 
-class GameRules {
-public:
-    virtual ~GameRules() = default;
-    virtual std::vector<Move> get_possible_moves(const GameState& state, int player) = 0;
-    virtual GameState apply_move(const GameState& state, const Move& move, int player) = 0;
-    virtual int evaluate(const GameState& state, int player) = 0;
-    virtual bool is_game_over(const GameState& state) = 0;
+// De quoi annuler un coup
+struct Undo {
+    int p1_stock;
+    int p2_stock;
+    int row;     // Ligne de la pose (-1 si aucune)
+    int killed;  // Pion retiré (EMPTY si aucun)
 };
 
 // ---------------------------------------------------------
 // VARIANTE 0 : CLASSIQUE
 // ---------------------------------------------------------
-class ClassicRules : public GameRules {
-public:
-    std::vector<Move> get_possible_moves(const GameState& state, int player) override {
-        std::vector<Move> moves;
+template <class G>
+struct ClassicRules {
+    using State = GameState<G>;
+    using Moves = MoveList<G::MAX_MOVES>;
+
+    void generate_moves(const State& state, int player, Moves& moves) const {
         // On privilégie le centre : Centre -> Extérieur
-        int order[] = {3, 2, 4, 1, 5, 0, 6};
-        for (int c : order) {
-            if (state.get(0, c) == 0) moves.emplace_back(c);
+        for (int c : G::ORDER) {
+            if (state.get(0, c) == 0) moves.push(Move(c));
         }
-        return moves;
     }
 
-    GameState apply_move(const GameState& state, const Move& move, int player) override {
-        GameState next = state;
-        int r = get_top_row(next, move.col);
-        if (r != -1) next.set(r, move.col, player);
-        return next;
+    void make_move(State& state, const Move& move, int player, Undo& undo) const {
+        undo.row = state.drop(move.col, player);
     }
 
-    int evaluate(const GameState& state, int player) override {
-        if (check_win(state, AI_PIECE)) return SCORE_WIN * 10;
-        if (check_win(state, PLAYER_PIECE)) return -SCORE_WIN * 10;
-        return evaluate_board_position(state, AI_PIECE);
+    void unmake_move(State& state, const Move& move, int player, const Undo& undo) const {
+        if (undo.row != -1) state.undrop(move.col);
     }
 
-    bool is_game_over(const GameState& state) override {
-        return check_win(state, AI_PIECE) || check_win(state, PLAYER_PIECE);
+    int evaluate(const State& state) const {
+        if (state.has_won(AI_PIECE)) return SCORE_WIN * 10;
+        if (state.has_won(PLAYER_PIECE)) return -SCORE_WIN * 10;
+        return state.position_score;
+    }
+
+    bool is_game_over(const State& state) const {
+        return state.has_won(AI_PIECE) || state.has_won(PLAYER_PIECE);
     }
 };
 
 // ---------------------------------------------------------
 // VARIANTE 1 : 3 pour 1 (Ancienne)
 // ---------------------------------------------------------
-class Variant1Rules : public GameRules {
-    // ... (Logique V1 identique à avant, adaptée à GameState) ...
-public:
-    std::vector<Move> get_possible_moves(const GameState& state, int player) override {
-         // Réutilisation de la logique Classic pour simplifier dans ce buffer
-         ClassicRules cr;
-         return cr.get_possible_moves(state, player);
+// Une pose qui aligne 3 pions (dans les 4 directions, comme check_alignment côté
+// Python) oblige à retirer un pion adverse : le coup est alors composé
+// (colonne, ligne du kill, colonne du kill).
+template <class G>
+struct Variant1Rules {
+    using State = GameState<G>;
+    using Moves = MoveList<G::MAX_MOVES>;
+    static constexpr int ROWS = G::ROWS, COLS = G::COLS;
+
+    // Vrai si un pion du joueur en (r, c) appartiendrait à un alignement d'au moins 3
+    static bool forms_alignment_3(const State& s, int r, int c, int player) {
+        static const int directions[4][2] = {{0, 1}, {1, 0}, {1, 1}, {1, -1}};
+        for (const auto& d : directions) {
+            int count = 1;
+            for (int sign = -1; sign <= 1; sign += 2) {
+                int nr = r + sign * d[0], nc = c + sign * d[1];
+                while (nr >= 0 && nr < ROWS && nc >= 0 && nc < COLS && s.get(nr, nc) == player) {
+                    count++;
+                    nr += sign * d[0];
+                    nc += sign * d[1];
+                }
+            }
+            if (count >= 3) return true;
+        }
+        return false;
+    }
+
+    void generate_moves(const State& state, int player, Moves& moves) const {
+        int opp = -player;
+        for (int c : G::ORDER) {
+            int r = state.top_row(c);
+            if (r == -1) continue;
+
+            // Une pose gagnante termine la partie : pas de retrait
+            if (state.completes_window(r * COLS + c, player) || !forms_alignment_3(state, r, c, player)) {
+                moves.push(Move(c));
+                continue;
+            }
+
+            // Retirer n'importe quel pion d'une même série verticale de pions adverses
+            // donne la même colonne après gravité : on ne garde que le plus haut
+            int before = moves.size;
+            for (int kr = 0; kr < ROWS; kr++) {
+                for (int kc = 0; kc < COLS; kc++) {
+                    if (state.get(kr, kc) != opp) continue;
+                    if (kr > 0 && state.get(kr - 1, kc) == opp) continue;
+                    moves.push(Move(c, kr, kc));
+                }
+            }
+            // Aucun pion adverse à retirer : simple pose
+            if (moves.size == before) moves.push(Move(c));
+        }
     }
-    GameState apply_move(const GameState& state, const Move& move, int player) override {
-        ClassicRules cr;
-        return cr.apply_move(state, move, player);
+
+    void make_move(State& state, const Move& move, int player, Undo& undo) const {
+        undo.row = state.drop(move.col, player);
+        undo.killed = EMPTY;
+        if (undo.row != -1 && move.kill_row != -1) {
+            undo.killed = state.collapse(move.kill_row, move.kill_col);
+        }
     }
-    int evaluate(const GameState& state, int player) override {
-        ClassicRules cr;
-        return cr.evaluate(state, player);
+
+    void unmake_move(State& state, const Move& move, int player, const Undo& undo) const {
+        if (undo.killed != EMPTY) state.uncollapse(move.kill_row, move.kill_col, undo.killed);
+        if (undo.row != -1) state.undrop(move.col);
     }
-    bool is_game_over(const GameState& state) override {
-        ClassicRules cr;
-        return cr.is_game_over(state);
+
+    int evaluate(const State& state) const {
+        bool ai_won = state.has_won(AI_PIECE);
+        bool player_won = state.has_won(PLAYER_PIECE);
+        // Un retrait peut compléter les deux alignements à la fois : partie nulle
+        if (ai_won && player_won) return 0;
+        if (ai_won) return SCORE_WIN * 10;
+        if (player_won) return -SCORE_WIN * 10;
+        return state.position_score;
+    }
+
+    bool is_game_over(const State& state) const {
+        return state.has_won(AI_PIECE) || state.has_won(PLAYER_PIECE);
     }
 };
 
 // ---------------------------------------------------------
 // VARIANTE 2 : STOCK (3 pour 1 v2)
 // ---------------------------------------------------------
-class Variant2Rules : public GameRules {
-private:
+template <class G>
+struct Variant2Rules {
+    using State = GameState<G>;
+    using Moves = MoveList<G::MAX_MOVES>;
+    static constexpr int ROWS = G::ROWS, COLS = G::COLS;
+
     // Vérification locale rapide d'alignement de 3 autour de (r,c)
-    bool causes_alignment_3(const GameState& s, int r, int c, int player) {
+    static bool causes_alignment_3(const State& s, int r, int c, int player) {
         // Horizontal
         int count = 0;
         for (int i=std::max(0, c-2); i<=std::min(COLS-1, c+2); i++) {
@@ -288,88 +555,87 @@ private:
         return false;
     }
 
-public:
-    std::vector<Move> get_possible_moves(const GameState& state, int player) override {
-        std::vector<Move> moves;
-        
+    void generate_moves(const State& state, int player, Moves& moves) const {
         // On vérifie les coups gagnants immédiats (Optimisation)
         for (int c = 0; c < COLS; c++) {
-            if (state.get(0, c) == 0) {
-                GameState temp = apply_move(state, Move(c), player);
-                if (check_win(temp, player)) {
-                    moves.clear();
-                    moves.emplace_back(c);
-                    return moves; 
-                }
+            int r = state.top_row(c);
+            if (r != -1 && (state.has_won(player) || state.completes_window(r * COLS + c, player))) {
+                moves.push(Move(c));
+                return;
             }
         }
 
         // Coups de Pose
-        int order[] = {3, 2, 4, 1, 5, 0, 6};
-        for (int c : order) {
-            if (state.get(0, c) == 0) moves.emplace_back(c);
+        for (int c : G::ORDER) {
+            if (state.get(0, c) == 0) moves.push(Move(c));
         }
 
         // Coups de Destruction (Si Stock > 0)
         int stock = (player == AI_PIECE) ? state.p1_stock : state.p2_stock;
-        
+
         if (stock > 0) {
             int opp = (player == AI_PIECE) ? PLAYER_PIECE : AI_PIECE;
             // On cherche les pions adverses utiles
             for (int r = 0; r < ROWS; r++) {
                 for (int c = 0; c < COLS; c++) {
                     if (state.get(r, c) == opp) {
-                        moves.push_back(Move::create_kill(r, c));
+                        moves.push(Move::create_kill(r, c));
                     }
                 }
             }
         }
-
-        return moves;
     }
 
-    GameState apply_move(const GameState& state, const Move& move, int player) override {
-        GameState next = state;
+    void make_move(State& state, const Move& move, int player, Undo& undo) const {
+        undo.p1_stock = state.p1_stock;
+        undo.p2_stock = state.p2_stock;
+        undo.row = -1;
+        undo.killed = EMPTY;
 
         if (move.col != -1) {
             // Cas : Pose de pion
-            int r = get_top_row(next, move.col);
-            if (r != -1) {
-                next.set(r, move.col, player);
-                
-                // Vérification victoire prioritaire
-                if (check_win(next, player)) return next;
-
-                // Vérification Bonus 3 (+1 Stock)
-                if (evaluate_window({next.get(r, move.col), next.get(r, std::max(0, move.col-1)), next.get(r, std::max(0, move.col-2))}, player) >= SCORE_3_THREAT) { 
-                }
-                
-                if (causes_alignment_3(next, r, move.col, player)) {
-                    if (player == AI_PIECE) next.p1_stock++;
-                    else next.p2_stock++;
-                }
+            int r = state.drop(move.col, player);
+            undo.row = r;
+            if (r == -1) return;
+
+            // Vérification victoire prioritaire
+            if (state.has_won(player)) return;
+
+            // Vérification Bonus 3 (+1 Stock)
+            if (causes_alignment_3(state, r, move.col, player)) {
+                if (player == AI_PIECE) state.p1_stock++;
+                else state.p2_stock++;
             }
         } else {
             // Cas : Destruction
-            if (next.get(move.kill_row, move.kill_col) != 0) {
-                next.set(move.kill_row, move.kill_col, 0);
-                next.apply_gravity_col(move.kill_col);
-                
+            if (state.get(move.kill_row, move.kill_col) != 0) {
+                undo.killed = state.collapse(move.kill_row, move.kill_col);
+
                 // Coût du stock
-                if (player == AI_PIECE) next.p1_stock--;
-                else next.p2_stock--;
+                if (player == AI_PIECE) state.p1_stock--;
+                else state.p2_stock--;
             }
         }
-        return next;
     }
 
-    int evaluate(const GameState& state, int player) override {
+    void unmake_move(State& state, const Move& move, int player, const Undo& undo) const {
+        if (undo.row != -1) state.undrop(move.col);
+        else if (undo.killed != EMPTY) state.uncollapse(move.kill_row, move.kill_col, undo.killed);
+        state.p1_stock = undo.p1_stock;
+        state.p2_stock = undo.p2_stock;
+    }
+
+    int evaluate(const State& state) const {
         // Base : Victoire/Défaite
-        if (check_win(state, AI_PIECE)) return SCORE_WIN * 10;
-        if (check_win(state, PLAYER_PIECE)) return -SCORE_WIN * 10;
+        bool ai_won = state.has_won(AI_PIECE);
+        bool player_won = state.has_won(PLAYER_PIECE);
+        // Un retrait peut compléter les deux alignements à la fois : partie nulle
+        if (ai_won && player_won) return 0;
+        if (ai_won) return SCORE_WIN * 10;
+        if (player_won) return -SCORE_WIN * 10;
 
         // Heuristique Positionnelle
-        int score = evaluate_board_position(state, AI_PIECE);
+        int score = state.position_score;
 
         // Heuristique Matérielle (Stock)
         score += (state.p1_stock * SCORE_STOCK_UNIT);
@@ -378,8 +644,201 @@ public:
         return score;
     }
 
-    bool is_game_over(const GameState& state) override {
-        return check_win(state, AI_PIECE) || check_win(state, PLAYER_PIECE);
+    bool is_game_over(const State& state) const {
+        return state.has_won(AI_PIECE) || state.has_won(PLAYER_PIECE);
+    }
+};
+
+// Appelle f avec les règles du mode : la recherche est instanciée par variante
+template <class G, class F>
+auto with_rules(int mode, F&& f) -> decltype(f(std::declval<const ClassicRules<G>&>())) {
+    if (mode == 2) return f(Variant2Rules<G>());
+    if (mode == 1) return f(Variant1Rules<G>());
+    return f(ClassicRules<G>());
+}
+
+// Appelle f avec la géométrie rows x cols ; renvoie fallback si la taille n'est pas prise en charge
+template <class T, class F>
+T with_geometry(int rows, int cols, T fallback, F&& f) {
+    if (rows == Board7x6::ROWS && cols == Board7x6::COLS) return f(Board7x6());
+    if (rows == Board8x7::ROWS && cols == Board8x7::COLS) return f(Board8x7());
+    if (rows == Board9x7::ROWS && cols == Board9x7::COLS) return f(Board9x7());
+    return fallback;
+}
+
+// =========================================================
+// TABLE DE TRANSPOSITION
+// =========================================================
+
+enum TTFlag : uint8_t { TT_EXACT = 0, TT_LOWER = 1, TT_UPPER = 2 };
+
+// Vue décodée d'une entrée de la table
+struct TTEntry {
+    int value;
+    int depth;
+    TTFlag flag;
+    uint8_t generation;
+    Move move;         // Meilleur coup trouvé (pour l'ordonnancement)
+
+    TTEntry() : value(0), depth(-1), flag(TT_EXACT), generation(0), move(-2) {}
+};
+
+// Table partagée entre threads sans verrou : chaque case stocke (clé ^ données, données)
+// sur deux mots atomiques. Une écriture concurrente rend la case illisible
+// (la clé ne correspond plus) au lieu de renvoyer une valeur corrompue.
+class TranspositionTable {
+private:
+    struct Slot {
+        std::atomic<uint64_t> check;
+        std::atomic<uint64_t> data;
+    };
+
+    std::unique_ptr<Slot[]> slots;
+    uint64_t mask = 0;
+    std::atomic<uint8_t> generation{0};
+
+    // Format des données : valeur (32) | profondeur (7) | occupé (1) | drapeau (2) | génération (8) | coup (3 x 4)
+    static uint64_t pack(int value, int depth, TTFlag flag, uint8_t gen, const Move& move) {
+        uint64_t d = static_cast<uint32_t>(value);
+        d |= static_cast<uint64_t>(depth & 0x7F) << 32;
+        d |= static_cast<uint64_t>(1) << 39;
+        d |= static_cast<uint64_t>(flag & 0x3) << 40;
+        d |= static_cast<uint64_t>(gen) << 42;
+        d |= static_cast<uint64_t>((move.col + 1) & 0xF) << 50;
+        d |= static_cast<uint64_t>((move.kill_row + 1) & 0xF) << 54;
+        d |= static_cast<uint64_t>((move.kill_col + 1) & 0xF) << 58;
+        return d;
+    }
+
+    static TTEntry unpack(uint64_t d) {
+        TTEntry e;
+        e.value = static_cast<int32_t>(static_cast<uint32_t>(d & 0xFFFFFFFFULL));
+        e.depth = static_cast<int>((d >> 32) & 0x7F);
+        e.flag = static_cast<TTFlag>((d >> 40) & 0x3);
+        e.generation = static_cast<uint8_t>((d >> 42) & 0xFF);
+        e.move = Move(static_cast<int>((d >> 50) & 0xF) - 1,
+                      static_cast<int>((d >> 54) & 0xF) - 1,
+                      static_cast<int>((d >> 58) & 0xF) - 1);
+        return e;
+    }
+
+public:
+    explicit TranspositionTable(int log2_entries) { resize(log2_entries); }
+
+    void resize(int log2_entries) {
+        log2_entries = std::max(10, std::min(log2_entries, 28));
+        slots.reset(new Slot[static_cast<size_t>(1) << log2_entries]);
+        mask = (static_cast<uint64_t>(1) << log2_entries) - 1;
+        clear();
+    }
+
+    void clear() {
+        for (uint64_t i = 0; i <= mask; i++) {
+            slots[i].check.store(0, std::memory_order_relaxed);
+            slots[i].data.store(0, std::memory_order_relaxed);
+        }
+        generation.store(0);
+    }
+
+    // Appelé à chaque nouvelle recherche : les entrées anciennes deviennent remplaçables
+    void new_search() { generation.fetch_add(1); }
+
+    bool probe(uint64_t key, TTEntry& out) const {
+        const Slot& slot = slots[key & mask];
+        uint64_t data = slot.data.load(std::memory_order_relaxed);
+        uint64_t check = slot.check.load(std::memory_order_relaxed);
+        if (!(data >> 39 & 1) || (check ^ data) != key) return false;
+        out = unpack(data);
+        return true;
+    }
+
+    // Remplacement "depth-preferred" : on garde l'entrée la plus profonde de la recherche courante
+    void store(uint64_t key, int depth, int value, TTFlag flag, const Move& move) {
+        Slot& slot = slots[key & mask];
+        uint8_t gen = generation.load(std::memory_order_relaxed);
+        uint64_t old = slot.data.load(std::memory_order_relaxed);
+
+        if ((old >> 39 & 1) && (slot.check.load(std::memory_order_relaxed) ^ old) != key) {
+            TTEntry e = unpack(old);
+            if (e.generation == gen && e.depth > depth) return;
+        }
+
+        uint64_t data = pack(value, depth, flag, gen, move);
+        slot.check.store(key ^ data, std::memory_order_relaxed);
+        slot.data.store(data, std::memory_order_relaxed);
+    }
+};
+
+const int TT_DEFAULT_LOG2 = 20; // 2^20 entrées (16 Mo)
+
+const int MAX_SEARCH_DEPTH = 64;
+
+// Profondeur fixe ramenée dans [1, MAX_SEARCH_DEPTH] : les killers sont indexés par la
+// distance à la racine, et une profondeur <= 0 n'atteindrait jamais les feuilles
+inline int clamp_depth(int depth) { return std::max(1, std::min(depth, MAX_SEARCH_DEPTH)); }
+
+// Paramètres partagés par tous les noeuds d'une même recherche
+struct SearchContext {
+    TranspositionTable* tt;
+    int mode;
+
+    // Demande d'arrêt externe : la recherche s'interrompt dès que le compteur
+    // du moteur (Engine::stop_epoch) ne vaut plus celui relevé au départ
+    const std::atomic<unsigned>* stop_epoch = nullptr;
+    unsigned epoch = 0;
+
+    int threads = 1;          // Threads à la racine (1 = séquentiel, déterministe)
+    bool prune_kills = false; // Élagage des retraits sans effet sur les fenêtres
+
+    // Budget de temps (recherche itérative) : abandon dès que l'échéance est passée
+    bool timed = false;
+    bool aborted = false;
+    std::chrono::steady_clock::time_point deadline;
+
+    // Statistiques de la recherche
+    long long nodes = 0;
+    long long cutoffs = 0;
+    long long tt_hits = 0;
+    long long kills_skipped = 0; // Retraits écartés par l'élagage (coups, pas noeuds)
+    int root_depth = 0; // Profondeur nominale de l'itération en cours
+    int max_ply = 0;    // Distance maximale atteinte depuis la racine
+
+    // Ordonnancement des retraits : historique des coupures par case retirée
+    // et deux "killers" par distance à la racine
+    int history[2][MAX_ROWS * MAX_COLS] = {};
+    Move killers[MAX_SEARCH_DEPTH + 1][2];
+
+    // Case retirée dans history (même indexation pour toutes les tailles de plateau)
+    static int history_index(const Move& move) { return move.kill_row * MAX_COLS + move.kill_col; }
+
+    // Un retrait qui provoque une coupure sera essayé plus tôt ailleurs
+    void record_cutoff(const Move& move, int player, int depth, int ply) {
+        if (move.kill_row == -1) return;
+        history[player == AI_PIECE ? 0 : 1][history_index(move)] += depth * depth;
+        if (!(killers[ply][0] == move)) {
+            killers[ply][1] = killers[ply][0];
+            killers[ply][0] = move;
+        }
+    }
+
+    // Cumule les statistiques d'un contexte copié depuis celui-ci (threads)
+    void merge(const SearchContext& other, const SearchContext& base) {
+        aborted = aborted || other.aborted;
+        nodes += other.nodes - base.nodes;
+        cutoffs += other.cutoffs - base.cutoffs;
+        tt_hits += other.tt_hits - base.tt_hits;
+        kills_skipped += other.kills_skipped - base.kills_skipped;
+        max_ply = std::max(max_ply, other.max_ply);
+    }
+
+    bool should_stop() {
+        if (aborted) return true;
+        // On ne consulte l'horloge et le drapeau d'arrêt que tous les 1024 noeuds
+        if ((++nodes & 1023) == 0) {
+            if (stop_epoch && stop_epoch->load(std::memory_order_relaxed) != epoch) aborted = true;
+            else if (timed && std::chrono::steady_clock::now() >= deadline) aborted = true;
+        }
+        return aborted;
     }
 };
 
@@ -387,98 +846,946 @@ public:
 // MOTEUR MINIMAX
 // =========================================================
 
-int minimax(GameState state, int depth, int alpha, int beta, bool maximizing, GameRules* rules) {
-    if (depth == 0 || rules->is_game_over(state)) {
-        return rules->evaluate(state, AI_PIECE);
+const int KILLER_BONUS = 1 << 24;
+
+// Trie les retraits : killers d'abord, puis gain heuristique du retrait (menaces
+// adverses cassées) plus historique. Les générateurs placent les variantes de retrait
+// d'une même pose côte à côte (Variante 1) et les retraits seuls en fin de liste
+// (Variante 2, col == -1) : chaque groupe est trié sur place.
+// Avec l'élagage, un retrait seul qui ne touche que des fenêtres neutres, avant
+// comme après la chute des pions, est écarté s'il reste au moins une pose.
+template <class Rules>
+void order_kills(typename Rules::State& state, int player, typename Rules::Moves& moves,
+                 const Rules& rules, SearchContext& ctx, int ply) {
+    int scores[Rules::Moves::CAPACITY];
+    const int* history = ctx.history[player == AI_PIECE ? 0 : 1];
+    const Move* killers = ctx.killers[ply];
+    bool can_prune = ctx.prune_kills && moves[0].col != -1;
+    Undo undo;
+
+    int kept = 0;
+    int group_start = -1;
+    for (int i = 0; i < moves.size; i++) {
+        Move move = moves[i];
+        if (move.kill_row == -1) {
+            moves[kept++] = move;
+            group_start = -1;
+            continue;
+        }
+        if (group_start == -1 || moves[group_start].col != move.col) group_start = kept;
+
+        if (can_prune && move.col == -1) {
+            int top = Rules::State::ROWS - state.heights[move.kill_col];
+            if (state.windows_neutral(move.kill_col, top, move.kill_row)) {
+                rules.make_move(state, move, player, undo);
+                bool neutral = state.windows_neutral(move.kill_col, top, move.kill_row);
+                rules.unmake_move(state, move, player, undo);
+                if (neutral) {
+                    ctx.kills_skipped++;
+                    continue;
+                }
+            }
+        }
+
+        int idx = move.kill_row * Rules::State::COLS + move.kill_col;
+        int score = state.removal_delta(idx) * player + history[SearchContext::history_index(move)];
+        if (move == killers[0]) score += 2 * KILLER_BONUS;
+        else if (move == killers[1]) score += KILLER_BONUS;
+
+        // Tri par insertion (stable) dans le groupe
+        int j = kept++;
+        while (j > group_start && scores[j - 1] < score) {
+            moves[j] = moves[j - 1];
+            scores[j] = scores[j - 1];
+            j--;
+        }
+        moves[j] = move;
+        scores[j] = score;
+    }
+    moves.size = kept;
+}
+
+// Le coup est joué sur place puis annulé (make/unmake) : state est identique en sortie.
+template <class Rules>
+int minimax(typename Rules::State& state, int depth, int alpha, int beta, bool maximizing, const Rules& rules, SearchContext& ctx) {
+    if (ctx.should_stop()) return 0;
+
+    int ply = ctx.root_depth - depth;
+    if (ply > ctx.max_ply) ctx.max_ply = ply;
+
+    if (depth == 0 || rules.is_game_over(state)) {
+        return rules.evaluate(state);
     }
 
     int current_player = maximizing ? AI_PIECE : PLAYER_PIECE;
-    std::vector<Move> moves = rules->get_possible_moves(state, current_player);
+    uint64_t key = state.key(current_player, ctx.mode);
+    int alpha_orig = alpha;
+    int beta_orig = beta;
+
+    // Consultation de la table : coupure immédiate si la borne suffit
+    TTEntry entry;
+    Move tt_move(-2);
+    if (ctx.tt->probe(key, entry)) {
+        ctx.tt_hits++;
+        tt_move = entry.move;
+        if (entry.depth >= depth) {
+            if (entry.flag == TT_EXACT) return entry.value;
+            if (entry.flag == TT_LOWER) alpha = std::max(alpha, entry.value);
+            else beta = std::min(beta, entry.value);
+            if (alpha >= beta) return entry.value;
+        }
+    }
+
+    typename Rules::Moves moves;
+    rules.generate_moves(state, current_player, moves);
 
     if (moves.empty()) return 0;
+    order_kills(state, current_player, moves, rules, ctx, ply);
+
+    // Le meilleur coup mémorisé est exploré en premier
+    if (tt_move.col != -2) moves.move_to_front(tt_move);
+
+    Move best_move = moves[0];
+    int best_eval;
+    Undo undo;
 
     if (maximizing) {
-        int max_eval = -std::numeric_limits<int>::max();
+        best_eval = -std::numeric_limits<int>::max();
         for (const auto& move : moves) {
-            GameState next_state = rules->apply_move(state, move, AI_PIECE);
-            int eval = minimax(next_state, depth - 1, alpha, beta, false, rules);
-            max_eval = std::max(max_eval, eval);
+            rules.make_move(state, move, AI_PIECE, undo);
+            int eval = minimax(state, depth - 1, alpha, beta, false, rules, ctx);
+            rules.unmake_move(state, move, AI_PIECE, undo);
+            if (ctx.aborted) return 0;
+            if (eval > best_eval) {
+                best_eval = eval;
+                best_move = move;
+            }
             alpha = std::max(alpha, eval);
-            if (beta <= alpha) break;
+            if (beta <= alpha) {
+                ctx.cutoffs++;
+                ctx.record_cutoff(move, current_player, depth, ply);
+                break;
+            }
         }
-        return max_eval;
     } else {
-        int min_eval = std::numeric_limits<int>::max();
+        best_eval = std::numeric_limits<int>::max();
         for (const auto& move : moves) {
-            GameState next_state = rules->apply_move(state, move, PLAYER_PIECE);
-            int eval = minimax(next_state, depth - 1, alpha, beta, true, rules);
-            min_eval = std::min(min_eval, eval);
+            rules.make_move(state, move, PLAYER_PIECE, undo);
+            int eval = minimax(state, depth - 1, alpha, beta, true, rules, ctx);
+            rules.unmake_move(state, move, PLAYER_PIECE, undo);
+            if (ctx.aborted) return 0;
+            if (eval < best_eval) {
+                best_eval = eval;
+                best_move = move;
+            }
             beta = std::min(beta, eval);
-            if (beta <= alpha) break;
+            if (beta <= alpha) {
+                ctx.cutoffs++;
+                ctx.record_cutoff(move, current_player, depth, ply);
+                break;
+            }
         }
-        return min_eval;
     }
+
+    TTFlag flag = TT_EXACT;
+    if (best_eval <= alpha_orig) flag = TT_UPPER;
+    else if (best_eval >= beta_orig) flag = TT_LOWER;
+    ctx.tt->store(key, depth, best_eval, flag, best_move);
+
+    return best_eval;
+}
+
+// Résultat d'une recherche à la racine
+struct RootResult {
+    Move move;
+    int value;
+    bool forced; // Coup unique ou victoire immédiate : inutile de chercher plus loin
+
+    RootResult() : move(0), value(-std::numeric_limits<int>::max()), forced(false) {}
+};
+
+// Découpage de la racine : les threads se partagent les coups de la racine et la
+// table de transposition. Chaque coup est cherché avec le meilleur score connu
+// comme alpha ; seuls les scores exacts (> alpha utilisé) peuvent être retenus.
+template <class Rules>
+RootResult search_root_parallel(const typename Rules::State& root_state, const typename Rules::Moves& moves, int depth,
+                                const Rules& rules, SearchContext& ctx, int n_threads) {
+    const int n_moves = moves.size;
+    std::atomic<int> next_move(0);
+    std::atomic<int> shared_alpha(-std::numeric_limits<int>::max());
+    std::vector<int> values(n_moves, 0);
+    std::vector<char> exact(n_moves, 0);
+    std::vector<SearchContext> contexts(n_threads, ctx);
+
+    auto worker = [&](int t) {
+        SearchContext& local = contexts[t];
+        typename Rules::State state = root_state; // Copie propre à chaque thread
+        Undo undo;
+        for (;;) {
+            int i = next_move.fetch_add(1);
+            if (i >= n_moves) break;
+
+            rules.make_move(state, moves[i], AI_PIECE, undo);
+            int alpha = shared_alpha.load();
+            int val = minimax(state, depth - 1, alpha, std::numeric_limits<int>::max(), false, rules, local);
+            rules.unmake_move(state, moves[i], AI_PIECE, undo);
+            if (local.aborted) break;
+
+            values[i] = val;
+            exact[i] = (val > alpha || alpha == -std::numeric_limits<int>::max());
+
+            int current = shared_alpha.load();
+            while (val > current && !shared_alpha.compare_exchange_weak(current, val)) {}
+        }
+    };
+
+    std::vector<std::thread> pool;
+    for (int t = 1; t < n_threads; t++) pool.emplace_back(worker, t);
+    worker(0);
+    for (auto& th : pool) th.join();
+
+    const SearchContext base = ctx;
+    for (const auto& local : contexts) {
+        ctx.merge(local, base);
+    }
+
+    // À score égal, on garde l'ordre des coups (comme la recherche séquentielle)
+    RootResult result;
+    for (int i = 0; i < n_moves; i++) {
+        if (exact[i] && values[i] > result.value) {
+            result.value = values[i];
+            result.move = moves[i];
+        }
+    }
+    return result;
+}
+
+// Explore les coups de la racine (joueur IA) à profondeur fixe.
+// preferred : coup à essayer en premier (meilleur coup de l'itération précédente).
+template <class Rules>
+RootResult search_root(const typename Rules::State& root_state, int depth, const Rules& rules, SearchContext& ctx,
+                       const Move* preferred = nullptr) {
+    RootResult result;
+    ctx.root_depth = depth;
+    typename Rules::State state = root_state;
+    Undo undo;
+
+    typename Rules::Moves moves;
+    rules.generate_moves(state, AI_PIECE, moves);
+
+    if (moves.empty()) return result;
+    if (moves.size == 1) {
+        // Coup forcé : score statique de la position obtenue
+        result.move = moves[0];
+        rules.make_move(state, moves[0], AI_PIECE, undo);
+        result.value = rules.evaluate(state);
+        result.forced = true;
+        return result;
+    }
+
+    order_kills(state, AI_PIECE, moves, rules, ctx, 0);
+    if (preferred) moves.move_to_front(*preferred);
+
+    // Glouton Victoire : le premier coup gagnant immédiatement est joué sans recherche
+    for (const auto& move : moves) {
+        rules.make_move(state, move, AI_PIECE, undo);
+        int value = rules.evaluate(state);
+        bool over = rules.is_game_over(state);
+        rules.unmake_move(state, move, AI_PIECE, undo);
+        if (over && value > 90000) {
+            result.move = move;
+            result.value = value;
+            result.forced = true;
+            return result;
+        }
+    }
+
+    int n_threads = std::min(ctx.threads, moves.size);
+    if (n_threads > 1) {
+        return search_root_parallel(root_state, moves, depth, rules, ctx, n_threads);
+    }
+
+    for (const auto& move : moves) {
+        rules.make_move(state, move, AI_PIECE, undo);
+
+        // Fenêtre (meilleur score courant, +inf) : un coup qui ne fait pas mieux
+        // échoue vers le bas sans jamais être retenu, le choix reste identique.
+        int val = minimax(state, depth - 1, result.value, std::numeric_limits<int>::max(), false, rules, ctx);
+        rules.unmake_move(state, move, AI_PIECE, undo);
+        if (ctx.aborted) return result;
+
+        if (val > result.value) {
+            result.value = val;
+            result.move = move;
+        }
+    }
+    return result;
+}
+
+// Nombre de feuilles de l'arbre de génération de coups (validation et mesure du générateur)
+template <class Rules>
+long long perft(typename Rules::State& state, int depth, bool maximizing, const Rules& rules) {
+    if (depth == 0) return 1;
+    if (rules.is_game_over(state)) return 0;
+
+    int player = maximizing ? AI_PIECE : PLAYER_PIECE;
+    typename Rules::Moves moves;
+    rules.generate_moves(state, player, moves);
+    if (depth == 1) return static_cast<long long>(moves.size);
+
+    long long total = 0;
+    Undo undo;
+    for (const auto& move : moves) {
+        rules.make_move(state, move, player, undo);
+        total += perft(state, depth - 1, !maximizing, rules);
+        rules.unmake_move(state, move, player, undo);
+    }
+    return total;
+}
+
+template <class State>
+int count_empty_cells(const State& state) {
+    int n = State::N_CELLS;
+    for (int c = 0; c < State::COLS; c++) n -= state.heights[c];
+    return n;
+}
+
+// Recherche complète depuis la racine : profondeur fixe, ou approfondissement
+// itératif si time_ms > 0. depth_reached reçoit la profondeur de la dernière itération complète.
+template <class Rules>
+RootResult run_search(const typename Rules::State& root_state, int depth, int time_ms, const Rules& rules, SearchContext& ctx, int& depth_reached) {
+    if (time_ms <= 0) {
+        depth_reached = depth;
+        return search_root(root_state, depth, rules, ctx);
+    }
+
+    ctx.timed = true;
+    ctx.deadline = std::chrono::steady_clock::now() + std::chrono::milliseconds(time_ms);
+
+    // En Classique, au-delà du nombre de cases vides la recherche est exhaustive
+    int max_depth = (ctx.mode == 2 || ctx.mode == 1) ? MAX_SEARCH_DEPTH : std::max(1, count_empty_cells(root_state));
+
+    RootResult best;
+    int completed = 0;
+    for (int d = 1; d <= max_depth; d++) {
+        RootResult iteration = search_root(root_state, d, rules, ctx, completed ? &best.move : nullptr);
+        // Une itération interrompue est ignorée (sauf si aucune n'a abouti)
+        if (ctx.aborted && completed) break;
+
+        best = iteration;
+        completed = d;
+        if (ctx.aborted || iteration.forced) break;
+    }
+    depth_reached = completed;
+    return best;
 }
 
 // =========================================================
-// INTERFACE EXTERNE (BUFFER C)
+// RÉSOLUTION EXACTE (CLASSIQUE)
 // =========================================================
+// Score théorique d'une position Classique : recherche négamax à fenêtre nulle
+// sur deux masques de bits (pions du joueur au trait, cases occupées), table de
+// bornes propre au solveur et coups triés par nombre de menaces créées.
+//
+// Score (point de vue du joueur au trait) : 0 pour une nulle, sinon positif s'il
+// gagne, d'autant plus grand que la victoire est rapide : gagner avec son k-ième
+// pion vaut (cases / 2 + 1 - k), perdre contre le k-ième pion adverse l'opposé.
+//
+// Chaque colonne occupe ROWS + 1 bits (une sentinelle au-dessus) : seules les
+// géométries qui tiennent dans 64 bits avec cette marge sont résolues (7 x 6).
 
-static std::vector<int> output_buffer;
+template <class G>
+struct SolverPosition {
+    static constexpr int ROWS = G::ROWS, COLS = G::COLS, N_CELLS = G::N_CELLS;
+    static constexpr int STRIDE = ROWS + 1;
+    static constexpr bool SUPPORTED = COLS * STRIDE < 64;
 
-extern "C" {
-    #ifdef _WIN32
-    __declspec(dllexport)
-    #endif
-    // Signature : input_buffer (Board + Context), depth, mode, out_size (ptr vers int)
-    int* get_best_move_buffer(int* input_buffer, int depth, int mode, int* out_size) {
-        
-        // On décode l'entrée (Architecture Buffer)
-        GameState root_state;
-        std::memcpy(root_state.cells, input_buffer, sizeof(int) * ROWS * COLS);
-        
-        // Lecture du Contexte
-        if (mode == 2) {
-            root_state.p1_stock = input_buffer[42];
-            root_state.p2_stock = input_buffer[43];
-        }
-
-        // On sélectionne les règles
-        std::unique_ptr<GameRules> rules;
-        if (mode == 2) rules.reset(new Variant2Rules());
-        else if (mode == 1) rules.reset(new Variant1Rules());
-        else rules.reset(new ClassicRules());
-
-        // Minimax
-        std::vector<Move> moves = rules->get_possible_moves(root_state, AI_PIECE);
-        Move best_move(0);
-        int best_val = -std::numeric_limits<int>::max();
-
-        if (moves.size() == 1) {
-            best_move = moves[0];
+    static constexpr int MIN_SCORE = -(N_CELLS / 2) + 3;     // Pire défaite possible (4e pion adverse)
+    static constexpr int MAX_SCORE = (N_CELLS + 1) / 2 - 3;  // Meilleure victoire possible
+
+    static constexpr uint64_t bottom_mask() {
+        uint64_t m = 0;
+        for (int c = 0; c < COLS; c++) m |= static_cast<uint64_t>(1) << (c * STRIDE);
+        return m;
+    }
+    static constexpr uint64_t BOTTOM = bottom_mask();
+    static constexpr uint64_t BOARD = BOTTOM * ((static_cast<uint64_t>(1) << ROWS) - 1);
+
+    static constexpr uint64_t column_mask(int c) {
+        return ((static_cast<uint64_t>(1) << ROWS) - 1) << (c * STRIDE);
+    }
+    static constexpr uint64_t top_mask(int c) {
+        return static_cast<uint64_t>(1) << (ROWS - 1 + c * STRIDE);
+    }
+
+    uint64_t current = 0; // Pions du joueur au trait
+    uint64_t mask = 0;    // Cases occupées
+    int moves = 0;        // Pions posés
+
+    // Pions 1 = joueur au trait ; renvoie false si le plateau ne respecte pas la gravité
+    static bool from_cells(const int* cells, SolverPosition& out) {
+        out = SolverPosition();
+        for (int c = 0; c < COLS; c++) {
+            bool empty_below = false;
+            for (int h = 0; h < ROWS; h++) {
+                int v = cells[(ROWS - 1 - h) * COLS + c];
+                if (v == EMPTY) { empty_below = true; continue; }
+                if (empty_below) return false;
+                uint64_t bit = static_cast<uint64_t>(1) << (c * STRIDE + h);
+                out.mask |= bit;
+                if (v == AI_PIECE) out.current |= bit;
+                out.moves++;
+            }
+        }
+        return true;
+    }
+
+    bool can_play(int c) const { return (mask & top_mask(c)) == 0; }
+
+    void play(uint64_t move) {
+        current ^= mask;
+        mask |= move;
+        moves++;
+    }
+
+    // Bit de la case jouée dans la colonne c
+    uint64_t column_move(int c) const { return (mask + BOTTOM) & column_mask(c); }
+
+    uint64_t key() const { return current + mask; }
+
+    uint64_t possible() const { return (mask + BOTTOM) & BOARD; }
+
+    uint64_t winning_cells() const { return winning_cells(current, mask); }
+    uint64_t opponent_winning_cells() const { return winning_cells(current ^ mask, mask); }
+
+    bool can_win_next() const { return winning_cells() & possible(); }
+
+    // Coups jouables qui ne donnent pas la victoire immédiate à l'adversaire (0 si tous perdent)
+    uint64_t non_losing_moves() const {
+        uint64_t moves_mask = possible();
+        uint64_t opponent_win = opponent_winning_cells();
+        uint64_t forced = moves_mask & opponent_win;
+        if (forced) {
+            if (forced & (forced - 1)) return 0; // Deux menaces à parer : perdu
+            moves_mask = forced;
+        }
+        return moves_mask & ~(opponent_win >> 1); // Pas sous une case gagnante adverse
+    }
+
+    // Nombre de cases gagnantes du joueur après le coup (ordonnancement)
+    int move_score(uint64_t move) const {
+        uint64_t w = winning_cells(current | move, mask);
+        int n = 0;
+        for (; w; w &= w - 1) n++;
+        return n;
+    }
+
+    // Cases vides qui complètent un alignement de 4 des pions donnés
+    static uint64_t winning_cells(uint64_t pos, uint64_t mask) {
+        // Verticale
+        uint64_t r = (pos << 1) & (pos << 2) & (pos << 3);
+
+        // Horizontale et diagonales : décalages de STRIDE, STRIDE - 1 et STRIDE + 1
+        for (int shift : {STRIDE, STRIDE - 1, STRIDE + 1}) {
+            uint64_t p = (pos << shift) & (pos << 2 * shift);
+            r |= p & (pos << 3 * shift);
+            r |= p & (pos >> shift);
+            p = (pos >> shift) & (pos >> 2 * shift);
+            r |= p & (pos << shift);
+            r |= p & (pos >> 3 * shift);
+        }
+        return r & (BOARD ^ mask);
+    }
+
+    // Vrai si l'un des deux joueurs a déjà aligné 4 pions
+    bool has_alignment() const {
+        for (uint64_t pos : {current, current ^ mask}) {
+            for (int shift : {1, STRIDE, STRIDE - 1, STRIDE + 1}) {
+                uint64_t m = pos & (pos >> shift);
+                if (m & (m >> 2 * shift)) return true;
+            }
+        }
+        return false;
+    }
+};
+
+// Table du solveur : une entrée par mot atomique, clé complète (49 bits) et borne
+// sur 8 bits. Les bornes sont exactes et indépendantes de la recherche : la table
+// n'a jamais besoin d'être vidée et profite aux coups suivants.
+class SolverTable {
+private:
+    std::unique_ptr<std::atomic<uint64_t>[]> slots;
+    uint64_t size = 0;
+
+public:
+    explicit SolverTable(int log2_entries) {
+        // Taille impaire : les clés (pions + cases) ne se répartissent pas bien modulo 2^n
+        size = (static_cast<uint64_t>(1) << log2_entries) - 1;
+        slots.reset(new std::atomic<uint64_t>[size]);
+        for (uint64_t i = 0; i < size; i++) slots[i].store(0, std::memory_order_relaxed);
+    }
+
+    // 0 si absente, sinon la valeur codée (voir solver_negamax)
+    int get(uint64_t key) const {
+        uint64_t d = slots[key % size].load(std::memory_order_relaxed);
+        return (d >> 8) == key ? static_cast<int>(d & 0xFF) : 0;
+    }
+
+    void put(uint64_t key, int value) {
+        slots[key % size].store((key << 8) | static_cast<uint64_t>(value), std::memory_order_relaxed);
+    }
+};
+
+const int SOLVER_TT_LOG2 = 23; // 2^23 entrées (64 Mo), allouées à la première résolution
+
+// Coups triés par score décroissant ; à score égal, l'ordre d'insertion inverse (centre d'abord)
+template <int CAP>
+struct SolverMoves {
+    uint64_t moves[CAP];
+    int scores[CAP];
+    int size = 0;
+
+    void add(uint64_t move, int score) {
+        int i = size++;
+        for (; i && scores[i - 1] > score; i--) {
+            moves[i] = moves[i - 1];
+            scores[i] = scores[i - 1];
+        }
+        moves[i] = move;
+        scores[i] = score;
+    }
+
+    uint64_t next() { return size ? moves[--size] : 0; }
+};
+
+// Négamax alpha-bêta du solveur. Précondition : le joueur au trait ne gagne pas au coup suivant.
+// Valeurs de la table : borne supérieure v codée (v - MIN + 1), borne inférieure (v + MAX - 2 MIN + 2).
+template <class G>
+int solver_negamax(const SolverPosition<G>& pos, int alpha, int beta, SolverTable& table, SearchContext& ctx) {
+    using P = SolverPosition<G>;
+    if (ctx.should_stop()) return 0;
+
+    uint64_t next = pos.non_losing_moves();
+    if (next == 0) return -(P::N_CELLS - pos.moves) / 2; // L'adversaire gagne au coup suivant
+    if (pos.moves >= P::N_CELLS - 2) return 0;           // Nulle : plus assez de cases pour gagner
+
+    int min = -(P::N_CELLS - 2 - pos.moves) / 2;
+    if (alpha < min) {
+        alpha = min;
+        if (alpha >= beta) return alpha;
+    }
+    int max = (P::N_CELLS - 1 - pos.moves) / 2;
+    if (beta > max) {
+        beta = max;
+        if (alpha >= beta) return beta;
+    }
+
+    uint64_t key = pos.key();
+    if (int v = table.get(key)) {
+        ctx.tt_hits++;
+        if (v > P::MAX_SCORE - P::MIN_SCORE + 1) {
+            min = v + 2 * P::MIN_SCORE - P::MAX_SCORE - 2;
+            if (alpha < min) {
+                alpha = min;
+                if (alpha >= beta) return alpha;
+            }
         } else {
-            for (const auto& move : moves) {
-                GameState next = rules->apply_move(root_state, move, AI_PIECE);
-                
-                // Glouton Victoire
-                if (rules->is_game_over(next) && rules->evaluate(next, AI_PIECE) > 90000) {
-                    best_move = move;
-                    break;
+            max = v + P::MIN_SCORE - 1;
+            if (beta > max) {
+                beta = max;
+                if (alpha >= beta) return beta;
+            }
+        }
+    }
+
+    SolverMoves<G::COLS> moves;
+    for (int i = G::COLS - 1; i >= 0; i--) {
+        if (uint64_t move = next & P::column_mask(G::ORDER[i])) moves.add(move, pos.move_score(move));
+    }
+
+    while (uint64_t move = moves.next()) {
+        P child = pos;
+        child.play(move);
+        int score = -solver_negamax(child, -beta, -alpha, table, ctx);
+        if (ctx.aborted) return 0; // Valeur inutilisable : rien n'est stocké
+        if (score >= beta) {
+            ctx.cutoffs++;
+            table.put(key, score + P::MAX_SCORE - 2 * P::MIN_SCORE + 2);
+            return score;
+        }
+        if (score > alpha) alpha = score;
+    }
+    table.put(key, alpha - P::MIN_SCORE + 1);
+    return alpha;
+}
+
+// Score exact par recherches à fenêtre nulle successives (dichotomie sur [min, max])
+template <class G>
+int solver_score(const SolverPosition<G>& pos, SolverTable& table, SearchContext& ctx) {
+    using P = SolverPosition<G>;
+    if (pos.can_win_next()) return (P::N_CELLS + 1 - pos.moves) / 2;
+
+    int min = -(P::N_CELLS - pos.moves) / 2;
+    int max = (P::N_CELLS + 1 - pos.moves) / 2;
+    while (min < max && !ctx.aborted) {
+        int med = min + (max - min) / 2;
+        // On teste d'abord près de 0 : les fenêtres proches de la nulle coupent davantage
+        if (med <= 0 && min / 2 < med) med = min / 2;
+        else if (med >= 0 && max / 2 > med) med = max / 2;
+        int r = solver_negamax(pos, med, med + 1, table, ctx);
+        if (r <= med) max = r;
+        else min = r;
+    }
+    return min;
+}
+
+// Nombre de demi-coups jusqu'à la fin de la partie (jeu parfait des deux côtés)
+template <class G>
+int solver_plies_to_end(int score, int moves) {
+    constexpr int N = G::N_CELLS;
+    if (score == 0) return N - moves;
+    // Le gagnant pose le pion d'indice k (k pions déjà posés) avec |score| = (N + 1 - k) / 2
+    int winner_parity = score > 0 ? moves & 1 : (moves + 1) & 1;
+    int k = N + 1 - 2 * std::abs(score);
+    if ((k & 1) != winner_parity) k--;
+    return k - moves + 1;
+}
+
+// Résultat d'une résolution (miroir ctypes : game/calculateur.py)
+struct SolveResult {
+    int score;  // Score exact (joueur au trait), voir ci-dessus
+    int col;    // Colonne d'un coup optimal
+    int plies;  // Demi-coups restants en jeu parfait (coup joué compris)
+};
+
+// Résout la position : 1 si résolue, 0 si interrompue (budget ou stop),
+// -1 si la position est invalide ou déjà terminée.
+template <class G>
+int solve_position(const int* cells, SolverTable& table, SearchContext& ctx, SolveResult& out) {
+    using P = SolverPosition<G>;
+    P pos;
+    if (!P::from_cells(cells, pos) || pos.moves >= P::N_CELLS || pos.has_alignment()) return -1;
+
+    // Victoire immédiate
+    for (int i = 0; i < G::COLS; i++) {
+        int c = G::ORDER[i];
+        if (pos.can_play(c) && (pos.winning_cells() & pos.column_move(c))) {
+            out = {(P::N_CELLS + 1 - pos.moves) / 2, c, 1};
+            return 1;
+        }
+    }
+
+    int score = solver_score(pos, table, ctx);
+    if (ctx.aborted) return 0;
+    out.score = score;
+    out.plies = solver_plies_to_end<G>(score, pos.moves);
+
+    // Premier coup (ordre du centre) qui atteint le score : test à fenêtre nulle sur l'enfant
+    uint64_t non_losing = pos.non_losing_moves();
+    out.col = -1;
+    for (int i = 0; i < G::COLS && out.col == -1; i++) {
+        int c = G::ORDER[i];
+        if (!pos.can_play(c)) continue;
+        uint64_t move = pos.column_move(c);
+        if (!(non_losing & move)) {
+            if (non_losing == 0 && out.col == -1) out.col = c; // Tout perd : n'importe quel coup
+            continue;
+        }
+        P child = pos;
+        child.play(move);
+        if (-solver_negamax(child, -score, -score + 1, table, ctx) >= score) out.col = c;
+        if (ctx.aborted) return 0;
+    }
+    return 1;
+}
+
+// =========================================================
+// CONTEXTE MOTEUR
+// =========================================================
+
+// Statistiques renvoyées à l'appelant (miroir ctypes : game/calculateur.py)
+struct SearchStats {
+    long long nodes;       // Noeuds visités
+    long long cutoffs;     // Coupures beta
+    long long tt_hits;     // Positions retrouvées dans la table de transposition
+    long long elapsed_us;  // Durée de la recherche
+    int max_depth;         // Profondeur maximale atteinte
+    int best_score;        // Score du coup choisi (point de vue IA)
+    long long kills_skipped; // Retraits écartés par l'élagage (coups, pas noeuds)
+    int aborted;           // 1 si la recherche a été interrompue (stop_search ou budget)
+};
+
+// Format des buffers d'entrée : [lignes, colonnes, cases (lignes x colonnes), stock IA, stock humain]
+const int BUFFER_HEADER = 2;
+
+// Taille d'un buffer avec en-tête pour un plateau rows x cols
+inline int buffer_size(int rows, int cols) { return BUFFER_HEADER + rows * cols + 2; }
+
+// Décodage des cases et des stocks (sans en-tête)
+template <class G>
+GameState<G> decode_input(const int* cells, int mode) {
+    GameState<G> root_state = GameState<G>::from_cells(cells);
+
+    // Lecture du Contexte
+    if (mode == 2) {
+        root_state.p1_stock = cells[G::N_CELLS];
+        root_state.p2_stock = cells[G::N_CELLS + 1];
+    }
+    return root_state;
+}
+
+// Tout l'état d'un moteur : table de transposition et réglages.
+// Les recherches n'écrivent que dans leur contexte et dans les sorties fournies
+// par l'appelant : deux moteurs s'utilisent en parallèle sans interférence, et
+// plusieurs recherches simultanées sur un même moteur partagent sa table sans verrou.
+struct Engine {
+    TranspositionTable tt;
+    std::atomic<unsigned> stop_epoch{0};
+    std::atomic<int> threads{1};
+    std::atomic<bool> prune_kills{false};
+
+    // Table du solveur exact, allouée à la première résolution (voir solve)
+    std::unique_ptr<SolverTable> solver_table;
+    std::once_flag solver_table_once;
+
+    explicit Engine(int log2_entries) : tt(log2_entries) {}
+
+    SearchContext begin_search(int mode) {
+        tt.new_search();
+        SearchContext ctx{&tt, mode == 1 || mode == 2 ? mode : 0};
+        ctx.stop_epoch = &stop_epoch;
+        ctx.epoch = stop_epoch.load();
+        ctx.threads = threads.load();
+        ctx.prune_kills = prune_kills.load();
+        return ctx;
+    }
+
+    // Interrompt les recherches en cours ; les suivantes ne sont pas affectées
+    void stop() { stop_epoch.fetch_add(1); }
+
+    // Recherche à profondeur fixe (time_ms <= 0) ou sous budget de temps sur un plateau G
+    // (cases et stocks sans en-tête). out_move[3] reçoit (colonne, ligne du kill, colonne
+    // du kill), stats les mesures (si non nul). Renvoie la profondeur de la dernière itération complète.
+    template <class G>
+    int search_board(const int* cells, int depth, int time_ms, int mode, int* out_move, SearchStats* stats) {
+        auto start = std::chrono::steady_clock::now();
+        GameState<G> root_state = decode_input<G>(cells, mode);
+        SearchContext ctx = begin_search(mode);
+        if (time_ms <= 0) depth = clamp_depth(depth);
+
+        int depth_reached = 0;
+        RootResult result = with_rules<G>(mode, [&](const auto& rules) {
+            return run_search(root_state, depth, time_ms, rules, ctx, depth_reached);
+        });
+
+        out_move[0] = result.move.col;
+        out_move[1] = result.move.kill_row;
+        out_move[2] = result.move.kill_col;
+
+        if (stats) {
+            stats->nodes = ctx.nodes;
+            stats->cutoffs = ctx.cutoffs;
+            stats->tt_hits = ctx.tt_hits;
+            stats->elapsed_us = std::chrono::duration_cast<std::chrono::microseconds>(
+                std::chrono::steady_clock::now() - start).count();
+            stats->max_depth = ctx.max_ply;
+            stats->best_score = result.value;
+            stats->kills_skipped = ctx.kills_skipped;
+            stats->aborted = ctx.aborted ? 1 : 0;
+        }
+        return depth_reached;
+    }
+
+    // Même recherche sur un buffer avec en-tête ; renvoie -1 si la taille n'est pas prise en charge
+    int search(const int* input, int depth, int time_ms, int mode, int* out_move, SearchStats* stats) {
+        return with_geometry(input[0], input[1], -1, [&](auto geometry) {
+            return search_board<decltype(geometry)>(input + BUFFER_HEADER, depth, time_ms, mode, out_move, stats);
+        });
+    }
+
+    // Recherche en lot : n buffers contigus de stride entiers (cases + stocks du plateau G)
+    template <class G>
+    void search_batch_board(const int* input, int stride, int n, int depth, int mode,
+                            int* out_cols, int* out_kills, int* out_scores) {
+        depth = clamp_depth(depth);
+        for (int i = 0; i < n; i++) {
+            GameState<G> root_state = decode_input<G>(input + i * stride, mode);
+            SearchContext ctx = begin_search(mode);
+            RootResult result = with_rules<G>(mode, [&](const auto& rules) {
+                return search_root(root_state, depth, rules, ctx);
+            });
+
+            out_cols[i] = result.move.col;
+            out_kills[2 * i] = result.move.kill_row;
+            out_kills[2 * i + 1] = result.move.kill_col;
+            out_scores[i] = result.value;
+
+            if (ctx.aborted) break;
+        }
+    }
+
+    // Lot de buffers avec en-tête, tous de la taille indiquée par le premier.
+    // Renvoie 0, ou -1 si la taille n'est pas prise en charge.
+    int search_batch(const int* input, int n, int depth, int mode, int* out_cols, int* out_kills, int* out_scores) {
+        if (n <= 0) return 0;
+        int stride = buffer_size(input[0], input[1]);
+        return with_geometry(input[0], input[1], -1, [&](auto geometry) {
+            search_batch_board<decltype(geometry)>(input + BUFFER_HEADER, stride, n, depth, mode,
+                                                   out_cols, out_kills, out_scores);
+            return 0;
+        });
+    }
+
+    // Résolution exacte (Classique) d'un buffer avec en-tête ; time_ms > 0 borne la durée.
+    // Renvoie 1 si résolue, 0 si interrompue, -1 si la position ou la taille n'est pas prise en charge.
+    int solve(const int* input, int time_ms, SolveResult* out, SearchStats* stats) {
+        return with_geometry(input[0], input[1], -1, [&](auto geometry) {
+            using G = decltype(geometry);
+            if constexpr (!SolverPosition<G>::SUPPORTED) {
+                return -1;
+            } else {
+                auto start = std::chrono::steady_clock::now();
+                std::call_once(solver_table_once, [this] { solver_table.reset(new SolverTable(SOLVER_TT_LOG2)); });
+
+                SearchContext ctx = begin_search(0);
+                if (time_ms > 0) {
+                    ctx.timed = true;
+                    ctx.deadline = start + std::chrono::milliseconds(time_ms);
                 }
+                int status = solve_position<G>(input + BUFFER_HEADER, *solver_table, ctx, *out);
 
-                int val = minimax(next, depth - 1, -std::numeric_limits<int>::max(), std::numeric_limits<int>::max(), false, rules.get());
-                
-                if (val > best_val) {
-                    best_val = val;
-                    best_move = move;
+                if (stats) {
+                    stats->nodes = ctx.nodes;
+                    stats->cutoffs = ctx.cutoffs;
+                    stats->tt_hits = ctx.tt_hits;
+                    stats->elapsed_us = std::chrono::duration_cast<std::chrono::microseconds>(
+                        std::chrono::steady_clock::now() - start).count();
+                    stats->max_depth = status == 1 ? out->plies : 0;
+                    stats->best_score = status == 1 ? out->score : 0;
+                    stats->kills_skipped = 0;
+                    stats->aborted = status == 0 ? 1 : 0;
                 }
+                return status;
             }
-        }
+        });
+    }
+
+    void reset(int log2_entries) {
+        if (log2_entries > 0) tt.resize(log2_entries);
+        else tt.clear();
+    }
+
+    void set_threads(int n) {
+        if (n <= 0) n = static_cast<int>(std::max(1u, std::thread::hardware_concurrency()));
+        threads.store(n);
+    }
+};
 
-        // On encode la sortie
-        output_buffer = best_move.to_buffer();
-        
-        if (out_size) *out_size = static_cast<int>(output_buffer.size());
-        return output_buffer.data();
+// =========================================================
+// INTERFACE EXTERNE (BUFFER C)
+// =========================================================
+// Les fonctions engine_* prennent un contexte créé par engine_create et
+// n'utilisent aucun état global : elles sont réentrantes.
+// Elles lisent des buffers avec en-tête [lignes, colonnes, cases, stocks].
+
+extern "C" {
+    #ifdef _WIN32
+    __declspec(dllexport)
+    #endif
+    // Crée un contexte de recherche (table de 2^log2_entries entrées, défaut si <= 0)
+    void* engine_create(int log2_entries) {
+        return new Engine(log2_entries > 0 ? log2_entries : TT_DEFAULT_LOG2);
+    }
+
+    #ifdef _WIN32
+    __declspec(dllexport)
+    #endif
+    void engine_destroy(void* engine) {
+        delete static_cast<Engine*>(engine);
+    }
+
+    #ifdef _WIN32
+    __declspec(dllexport)
+    #endif
+    // Recherche réentrante : toutes les sorties sont fournies par l'appelant.
+    // out_move[3] reçoit (colonne, ligne du kill, colonne du kill) ; stats peut être nul.
+    // Renvoie la profondeur de la dernière itération complète, -1 si la taille n'est pas prise en charge.
+    int engine_search(void* engine, const int* input_buffer, int depth, int time_ms, int mode,
+                      int* out_move, SearchStats* stats) {
+        return static_cast<Engine*>(engine)->search(input_buffer, depth, time_ms, mode, out_move, stats);
+    }
+
+    #ifdef _WIN32
+    __declspec(dllexport)
+    #endif
+    // Recherche en lot sur un contexte donné : n buffers avec en-tête de même taille.
+    // Sorties fournies par l'appelant : out_cols[n], out_kills[2n] (-1 si pas de kill), out_scores[n].
+    // Renvoie 0, ou -1 si la taille n'est pas prise en charge.
+    int engine_search_batch(void* engine, const int* input, int n, int depth, int mode,
+                            int* out_cols, int* out_kills, int* out_scores) {
+        return static_cast<Engine*>(engine)->search_batch(input, n, depth, mode, out_cols, out_kills, out_scores);
+    }
+
+    #ifdef _WIN32
+    __declspec(dllexport)
+    #endif
+    // Résolution exacte d'une position Classique (joueur au trait = pions 1) sur un
+    // buffer avec en-tête. time_ms <= 0 : sans limite (hors engine_stop).
+    // Renvoie 1 si résolue, 0 si interrompue, -1 si la position ou la taille n'est pas prise en charge.
+    int engine_solve(void* engine, const int* input_buffer, int time_ms, SolveResult* out, SearchStats* stats) {
+        return static_cast<Engine*>(engine)->solve(input_buffer, time_ms, out, stats);
+    }
+
+    #ifdef _WIN32
+    __declspec(dllexport)
+    #endif
+    // 1 si le moteur est compilé pour un plateau de rows lignes et cols colonnes
+    int board_supported(int rows, int cols) {
+        return with_geometry(rows, cols, 0, [](auto) { return 1; });
+    }
+
+    #ifdef _WIN32
+    __declspec(dllexport)
+    #endif
+    // perft sur un buffer avec en-tête ; -1 si la taille n'est pas prise en charge
+    long long perft_sized(const int* input, int depth, int mode) {
+        return with_geometry(input[0], input[1], -1LL, [&](auto geometry) {
+            using G = decltype(geometry);
+            auto root_state = decode_input<G>(input + BUFFER_HEADER, mode);
+            return with_rules<G>(mode, [&](const auto& rules) {
+                return perft(root_state, depth, true, rules);
+            });
+        });
+    }
+
+    #ifdef _WIN32
+    __declspec(dllexport)
+    #endif
+    // Interrompt les recherches en cours sur ce contexte (appelable depuis un autre thread)
+    void engine_stop(void* engine) {
+        static_cast<Engine*>(engine)->stop();
+    }
+
+    #ifdef _WIN32
+    __declspec(dllexport)
+    #endif
+    // Vide la table du contexte ; log2_entries > 0 la redimensionne
+    void engine_reset(void* engine, int log2_entries) {
+        static_cast<Engine*>(engine)->reset(log2_entries);
+    }
+
+    #ifdef _WIN32
+    __declspec(dllexport)
+    #endif
+    // Nombre de threads à la racine pour ce contexte (n <= 0 : tous les coeurs)
+    void engine_set_threads(void* engine, int n) {
+        static_cast<Engine*>(engine)->set_threads(n);
+    }
+
+    #ifdef _WIN32
+    __declspec(dllexport)
+    #endif
+    void engine_set_kill_pruning(void* engine, int enabled) {
+        static_cast<Engine*>(engine)->prune_kills.store(enabled != 0);
     }
 }
@@ -0,0 +1,161 @@
+"""
+Analyse en masse des parties enregistrées (game.records) : chaque partie est
+rejouée avec les règles de sa variante et chaque début de tour est annoté par le
+moteur (score vu du joueur au trait et meilleur coup).
+
+Les parties sont lues en flux et réparties par paquets sur un pool de processus ;
+au plus max_pending paquets sont en vol, la mémoire ne dépend donc pas du nombre
+de parties. Les annotations sont écrites dans l'ordre des parties.
+
+    python -m game.analysis records --depth 6 --out annotations.p4a
+"""
+import argparse
+import multiprocessing
+import os
+import struct
+import sys
+import time
+from collections import deque
+import numpy as np
+
+from game.records import GameRecord, RecordError, iter_records, iter_turns, default_record_dir
+
+MAGIC = b"P4AN"
+VERSION = 1
+FILE_HEADER = struct.Struct("<4sH")
+GAME_HEADER = struct.Struct("<BH")  # statut, nombre de positions annotées
+
+STATUS_OK = 0
+STATUS_INVALID = 1  # Enregistrement refusé par les règles (voir RecordError)
+
+DEFAULT_DEPTH = 4
+CHUNK_GAMES = 32
+
+# Moteur du processus de travail (chargé une seule fois par processus)
+_worker_engine = None
+
+
+def _init_worker():
+    global _worker_engine
+    sys.stdout = open(os.devnull, "w")
+    from game.calculateur import get_engine
+    _worker_engine = get_engine()
+
+
+def analyze_game(data: bytes, depth: int, engine=None) -> dict:
+    """
+    Rejoue une partie et évalue chaque début de tour en un seul appel au moteur.
+    Renvoie {"status", "scores" (N,) int32, "moves" (N, 3) int8 (colonne, kill)}.
+    """
+    engine = engine or _worker_engine
+    boards, stocks = [], []
+    try:
+        record = GameRecord.from_bytes(data)
+        for game in iter_turns(record):
+            player = game.current_player
+            boards.append(game.board * player)
+            stocks.append(game.get_stocks(player))
+    except RecordError:
+        return {"status": STATUS_INVALID, "scores": np.zeros(0, np.int32), "moves": np.zeros((0, 3), np.int8)}
+
+    if not boards:
+        return {"status": STATUS_OK, "scores": np.zeros(0, np.int32), "moves": np.zeros((0, 3), np.int8)}
+
+    cols, kills, scores = engine.get_best_moves_batch(np.array(boards), np.array(stocks, dtype=np.int32),
+                                                      depth=depth, mode=record.mode)
+    moves = np.empty((len(boards), 3), dtype=np.int8)
+    moves[:, 0] = cols
+    moves[:, 1:] = kills
+    return {"status": STATUS_OK, "scores": scores.astype(np.int32), "moves": moves}
+
+
+def _analyze_chunk(args):
+    chunk, depth = args
+    return [analyze_game(data, depth) for data in chunk]
+
+
+def _chunks(records, size: int):
+    chunk = []
+    for data in records:
+        chunk.append(data)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def analyze(records, depth: int = DEFAULT_DEPTH, processes: int = None,
+            chunk_games: int = CHUNK_GAMES, max_pending: int = None):
+    """
+    Annote un flux de parties (octets, voir iter_records) et renvoie les annotations
+    dans le même ordre. Au plus max_pending paquets de chunk_games parties sont en
+    cours (par défaut 4 par processus).
+    """
+    processes = processes or os.cpu_count() or 1
+    max_pending = max_pending or 4 * processes
+
+    with multiprocessing.Pool(processes, initializer=_init_worker) as pool:
+        pending = deque()
+        for chunk in _chunks(records, chunk_games):
+            pending.append(pool.apply_async(_analyze_chunk, ((chunk, depth),)))
+            # On attend le plus ancien paquet avant d'en lire d'autres
+            while len(pending) >= max_pending:
+                yield from pending.popleft().get()
+        while pending:
+            yield from pending.popleft().get()
+
+
+# ---------------------------------------------------------
+# Fichier d'annotations
+# ---------------------------------------------------------
+# En-tête "P4AN", puis pour chaque partie : statut, N, N scores int32, N x 3 coups int8.
+
+def write_annotations(path: str, annotations) -> dict:
+    """Écrit les annotations au fil de l'eau ; renvoie le nombre de parties, d'invalides et de positions."""
+    totals = {"games": 0, "invalid": 0, "positions": 0}
+    with open(path, "wb") as f:
+        f.write(FILE_HEADER.pack(MAGIC, VERSION))
+        for annotation in annotations:
+            n = len(annotation["scores"])
+            f.write(GAME_HEADER.pack(annotation["status"], n))
+            f.write(annotation["scores"].astype("<i4").tobytes())
+            f.write(annotation["moves"].astype(np.int8).tobytes())
+            totals["games"] += 1
+            totals["invalid"] += annotation["status"] == STATUS_INVALID
+            totals["positions"] += n
+    return totals
+
+
+def iter_annotations(path: str):
+    """Relit un fichier d'annotations partie par partie."""
+    with open(path, "rb") as f:
+        magic, version = FILE_HEADER.unpack(f.read(FILE_HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Fichier d'annotations invalide : {path}")
+        while True:
+            header = f.read(GAME_HEADER.size)
+            if len(header) < GAME_HEADER.size:
+                break
+            status, n = GAME_HEADER.unpack(header)
+            scores = np.frombuffer(f.read(4 * n), dtype="<i4")
+            moves = np.frombuffer(f.read(3 * n), dtype=np.int8).reshape(n, 3)
+            yield {"status": status, "scores": scores, "moves": moves}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Annote les parties enregistrées avec le moteur.")
+    parser.add_argument("records", nargs="?", default=default_record_dir(), help="Répertoire ou segment de parties")
+    parser.add_argument("--depth", type=int, default=DEFAULT_DEPTH, help="Profondeur de recherche par position")
+    parser.add_argument("--out", default="annotations.p4a", help="Fichier d'annotations")
+    parser.add_argument("--processes", type=int, default=None, help="Taille du pool (défaut : nb de coeurs)")
+    parser.add_argument("--chunk", type=int, default=CHUNK_GAMES, help="Parties par paquet envoyé à un processus")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    totals = write_annotations(args.out, analyze(iter_records(args.records), args.depth,
+                                                 args.processes, args.chunk))
+    elapsed = time.perf_counter() - start
+    print(f"{totals['games']} parties ({totals['invalid']} invalides), {totals['positions']} positions "
+          f"en {elapsed:.1f} s ({totals['positions'] / elapsed if elapsed > 0 else 0:.0f} positions/s)")
+    print(f"Annotations écrites dans {args.out}")
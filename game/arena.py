@@ -0,0 +1,201 @@
+"""
+Arène sans interface : fait s'affronter deux configurations du moteur sur de
+nombreuses parties, réparties sur un pool de processus.
+
+Exemple :
+    python -m game.arena --variant 2 --games 1000 --a depth=4 --b time=50
+    python -m game.arena --size 9x7 --a depth=8 --b depth=6
+    python -m game.arena --games 10000 --record records    # parties enregistrées (game.records)
+
+Une configuration s'écrit "clé=valeur" séparées par des virgules :
+    depth=6        profondeur fixe
+    time=100       budget par coup en millisecondes (remplace la profondeur)
+"""
+import argparse
+import math
+import multiprocessing
+import os
+import random
+import sys
+import time
+import numpy as np
+
+from game.gamemanager import variantes, InvalidMove, parse_board_size
+from game.records import RecordWriter, game_record
+
+# Moteur du processus de travail (chargé une seule fois par processus)
+_worker_engine = None
+
+
+def parse_config(text: str) -> dict:
+    """Convertit "depth=6,time=100" en dictionnaire de configuration."""
+    config = {"depth": 4, "time": None}
+    for item in filter(None, text.split(",")):
+        key, value = item.split("=")
+        if key not in config:
+            raise ValueError(f"Paramètre inconnu : {key}")
+        config[key] = int(value)
+    return config
+
+
+def config_label(config: dict) -> str:
+    if config["time"] is not None:
+        return f"time={config['time']}ms"
+    return f"depth={config['depth']}"
+
+
+def _init_worker():
+    global _worker_engine
+    # Les traces des variantes ([IA-V2] ...) n'ont pas d'intérêt ici
+    sys.stdout = open(os.devnull, "w")
+    from game.calculateur import get_engine
+    _worker_engine = get_engine()
+
+
+def _fallback_kill(game) -> tuple:
+    """Choisit le pion adverse à retirer après un coup d'ouverture aléatoire (Variante 1)."""
+    opponent = -game.current_player
+    rows, cols = np.nonzero(game.board == opponent)
+    # Le plus haut de la colonne la plus centrale : retrait le moins coûteux à rejouer
+    best = min(zip(rows, cols), key=lambda rc: (abs(rc[1] - game.width // 2), rc[0]))
+    return int(best[0]), int(best[1])
+
+
+def play_game(variant: int, configs: tuple, first: int, seed: int, opening_plies: int, max_plies: int,
+              size: tuple = (7, 6)) -> dict:
+    """
+    Joue une partie complète sur un plateau size (largeur, hauteur). configs[0] joue
+    les pions -1 (qui commencent), configs[1] les pions 1 ; first indique quelle
+    configuration a les pions -1. Renvoie le résultat du point de vue de la configuration A.
+    """
+    rng = random.Random(seed)
+    game = variantes[variant](width=size[0], height=size[1])
+    # Pions -1 (ils commencent) puis pions 1
+    sides = {-1: first, 1: 1 - first}
+    latencies = ([], [])
+
+    ply = 0
+    while not (game.victory or game.draw) and ply < max_plies:
+        player = game.current_player
+        index = sides[player]
+
+        if ply < opening_plies:
+            # Ouverture aléatoire pour diversifier les parties
+            legal = [c for c in range(game.width) if game.get_top_row(c) != -1]
+            try:
+                game.play((0, rng.choice(legal)))
+            except InvalidMove:
+                pass
+        else:
+            config = configs[index]
+            start = time.perf_counter()
+            move = game.request_engine_move(_worker_engine, config["depth"], config["time"])
+            latencies[index].append(time.perf_counter() - start)
+            game.apply_ai_move(move)
+
+        # Alignement de 3 pendant l'ouverture aléatoire (Variante 1) : le moteur,
+        # lui, renvoie directement son retrait avec la pose
+        if game.event and not (game.victory or game.draw):
+            game.play(_fallback_kill(game))
+        ply += 1
+
+    if game.victory:
+        winner = sides[game.current_player]
+        outcome = 1.0 if winner == 0 else 0.0
+    else:
+        outcome = 0.5
+
+    return {"outcome": outcome, "plies": ply, "latencies": latencies, "record": game_record(game)}
+
+
+def _play_game_task(args):
+    return play_game(*args)
+
+
+def elo_difference(score: float, games: int) -> float:
+    """Écart Elo estimé à partir du score moyen (borné pour 0 % / 100 %)."""
+    eps = 0.5 / max(games, 1)
+    score = min(max(score, eps), 1 - eps)
+    return -400 * math.log10(1 / score - 1)
+
+
+def run_tournament(variant: int, config_a: dict, config_b: dict, games: int = 100,
+                   processes: int = None, opening_plies: int = 2, max_plies: int = 200, seed: int = 0,
+                   size: tuple = (7, 6), record_dir: str = None) -> dict:
+    """
+    Lance le tournoi et renvoie les statistiques agrégées.
+    Si record_dir est fourni, chaque partie y est enregistrée dès qu'elle se termine.
+    """
+    # Chaque configuration joue autant de parties avec les pions -1 qu'avec les pions 1
+    tasks = [(variant, (config_a, config_b), i % 2, seed + i, opening_plies, max_plies, size) for i in range(games)]
+
+    start = time.perf_counter()
+    results = []
+    writer = RecordWriter(record_dir) if record_dir else None
+    with multiprocessing.Pool(processes, initializer=_init_worker) as pool:
+        for result in pool.imap_unordered(_play_game_task, tasks, chunksize=max(1, games // 64)):
+            if writer is not None:
+                writer.append(result["record"])
+            results.append(result)
+    if writer is not None:
+        writer.close()
+    elapsed = time.perf_counter() - start
+
+    wins = sum(1 for r in results if r["outcome"] == 1.0)
+    losses = sum(1 for r in results if r["outcome"] == 0.0)
+    draws = len(results) - wins - losses
+    score = (wins + 0.5 * draws) / max(len(results), 1)
+
+    summary = {
+        "variant": variantes[variant].name,
+        "size": f"{size[0]}x{size[1]}",
+        "games": len(results),
+        "wins": wins,
+        "draws": draws,
+        "losses": losses,
+        "score": score,
+        "elo": elo_difference(score, len(results)),
+        "games_per_second": len(results) / elapsed if elapsed > 0 else 0.0,
+        "latency_ms": {},
+    }
+
+    for index, config in enumerate((config_a, config_b)):
+        samples = np.array([t for r in results for t in r["latencies"][index]]) * 1000
+        label = ("A " if index == 0 else "B ") + config_label(config)
+        if samples.size:
+            summary["latency_ms"][label] = {
+                "p50": float(np.percentile(samples, 50)),
+                "p90": float(np.percentile(samples, 90)),
+                "p99": float(np.percentile(samples, 99)),
+                "max": float(samples.max()),
+            }
+    return summary
+
+
+def print_summary(summary: dict) -> None:
+    print(f"Variante : {summary['variant']} sur {summary['size']} ({summary['games']} parties)")
+    print(f"A : {summary['wins']} victoires / {summary['draws']} nuls / {summary['losses']} défaites "
+          f"(score {summary['score']:.3f}, Elo A-B {summary['elo']:+.0f})")
+    print(f"Débit : {summary['games_per_second']:.1f} parties/s")
+    for label, lat in summary["latency_ms"].items():
+        print(f"Latence {label} : p50 {lat['p50']:.2f} ms, p90 {lat['p90']:.2f} ms, "
+              f"p99 {lat['p99']:.2f} ms, max {lat['max']:.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tournoi IA contre IA sans interface.")
+    parser.add_argument("--variant", type=int, default=0, choices=range(len(variantes)),
+                        help="0 Classique, 1 Variante 1, 2 Variante 2")
+    parser.add_argument("--a", default="depth=4", help="Configuration A (ex : depth=6)")
+    parser.add_argument("--b", default="depth=2", help="Configuration B (ex : time=50)")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--processes", type=int, default=None, help="Taille du pool (défaut : nb de coeurs)")
+    parser.add_argument("--opening-plies", type=int, default=2, help="Coups aléatoires en début de partie")
+    parser.add_argument("--max-plies", type=int, default=200, help="Partie nulle au-delà")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--record", default=None, help="Répertoire où enregistrer les parties")
+    parser.add_argument("--size", type=parse_board_size, default=(7, 6), help="Plateau largeur x hauteur (7x6, 8x7, 9x7)")
+    args = parser.parse_args()
+
+    print_summary(run_tournament(args.variant, parse_config(args.a), parse_config(args.b), args.games,
+                                 args.processes, args.opening_plies, args.max_plies, args.seed, args.size, args.record))
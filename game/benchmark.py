@@ -0,0 +1,270 @@
+"""
+Banc d'essai du moteur : débit (noeuds/s), temps et coup choisi par profondeur,
+sur des positions fixes pour chaque variante, ainsi que des comptages perft.
+
+    python -m game.benchmark --out bench.json
+    python -m game.benchmark --compare bench.json      # signale les régressions
+    python -m game.benchmark --imports                 # coût d'import des modules sans interface
+    python -m game.benchmark --size 9x7 --depths 6,8   # plateau agrandi
+    python -m game.benchmark --prune-kills             # + noeuds économisés par l'élagage (Variante 2)
+
+Les positions sont décrites par la suite des coups joués depuis le plateau vide
+(colonne, ou (ligne, colonne) pour un retrait) : elles restent valides quelles
+que soient les évolutions du moteur.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+from game.gamemanager import variantes, parse_board_size
+
+POSITIONS = {
+    # Classique
+    0: {
+        "vide": [],
+        "ouverture": [3, 4, 1, 6],
+        "milieu": [3, 2, 3, 3, 2, 4, 3, 2, 2, 3, 4],
+        "fin": [1, 0, 3, 6, 4, 2, 4, 2, 4, 4, 5, 6, 2, 2, 4, 4, 6, 0, 3, 2],
+    },
+    # Variante 1 (3 pour 1)
+    1: {
+        "vide": [],
+        "ouverture": [3, 4, 1, 6],
+        "milieu": [4, 1, 4, 1, 3, 3, 3, 6, 3, 1, (5, 3)],
+        "fin": [4, 5, 4, 2, 2, 4, 1, 0, 3, 6, 6, 4, 2, 5, (5, 3), 6, 2, 2, 0, 2],
+    },
+    # Variante 2 (stock)
+    2: {
+        "vide": [],
+        "ouverture": [3, 4, 1, 6],
+        "milieu": [3, 2, 3, 3, 2, 4, 3, 2, 2, 3, 4],
+        "fin": [1, 0, 3, 6, 4, 2, 4, 2, 4, 4, (5, 6), 2, 4, 6, 0, (1, 4), 4, 3, 2, 6],
+    },
+}
+
+DEFAULT_DEPTHS = [2, 4, 6, 8]
+PERFT_DEPTH = 6
+
+# Modules utilisables sans interface graphique (workers d'analyse, arène, outils)
+HEADLESS_MODULES = ["game.bitboard", "game.gamemanager", "game.calculateur", "game.controller"]
+IMPORT_REPEAT = 5
+
+# Exécuté dans un interpréteur neuf : durée de l'import et présence de Qt
+_IMPORT_PROBE = (
+    "import sys, time\n"
+    "t = time.perf_counter()\n"
+    "import {module}\n"
+    "print((time.perf_counter() - t) * 1000, 'PyQt6' in sys.modules)\n"
+)
+
+
+def build_position(mode: int, moves: list, size: tuple = (7, 6)):
+    """
+    Rejoue une suite de coups et renvoie (plateau vu du joueur au trait, stocks).
+    Les lignes des retraits sont comptées sur 6 lignes : sur un plateau plus haut,
+    elles sont décalées pour viser les mêmes pions.
+    """
+    game = variantes[mode](width=size[0], height=size[1])
+    shift = size[1] - 6
+    for move in moves:
+        game.play((move[0] + shift, move[1]) if isinstance(move, tuple) else (0, move))
+    player = game.current_player
+    return game.board * player, game.get_stocks(player)
+
+
+def run_benchmark(ai, depths=DEFAULT_DEPTHS, perft_depth=PERFT_DEPTH, modes=(0, 1, 2), size=(7, 6),
+                  prune_kills=False) -> dict:
+    """
+    prune_kills : recherches avec élagage des retraits ; en Variante 2, chaque mesure est
+    refaite sans élagage ("nodes_unpruned") pour chiffrer les noeuds économisés.
+    """
+    ai.set_kill_pruning(prune_kills)
+    results = []
+    perfts = []
+
+    for mode in modes:
+        for name, moves in POSITIONS[mode].items():
+            board, (own, opp) = build_position(mode, moves, size)
+
+            for depth in depths:
+                # Table vide : chaque mesure est indépendante des précédentes
+                ai.reset_transposition_table()
+                start = time.perf_counter()
+                move = ai.get_best_move(board, depth, mode, p1_stock=own, p2_stock=opp)
+                elapsed = time.perf_counter() - start
+                nodes = ai.last_search_nodes()
+
+                extra = {}
+                if prune_kills and mode == 2:
+                    ai.set_kill_pruning(False)
+                    ai.reset_transposition_table()
+                    ai.get_best_move(board, depth, mode, p1_stock=own, p2_stock=opp)
+                    extra["nodes_unpruned"] = ai.last_search_nodes()
+                    ai.set_kill_pruning(True)
+
+                results.append({
+                    "mode": mode,
+                    "position": name,
+                    "depth": depth,
+                    "nodes": nodes,
+                    "time_ms": elapsed * 1000,
+                    "nps": nodes / elapsed if elapsed > 0 else 0.0,
+                    "move": [move["col"], *(move["kill"] or (-1, -1))],
+                    **extra,
+                })
+
+            start = time.perf_counter()
+            count = ai.perft(board, perft_depth, mode, own, opp)
+            elapsed = time.perf_counter() - start
+            perfts.append({
+                "mode": mode,
+                "position": name,
+                "depth": perft_depth,
+                "count": count,
+                "time_ms": elapsed * 1000,
+            })
+
+    return {
+        "meta": {
+            "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "size": f"{size[0]}x{size[1]}",
+        },
+        "search": results,
+        "perft": perfts,
+    }
+
+
+def measure_imports(modules=HEADLESS_MODULES, repeat=IMPORT_REPEAT) -> list:
+    """
+    Mesure le temps d'import de chaque module dans un processus neuf (médiane de
+    repeat lancements) : c'est le coût payé à chaque démarrage d'un worker.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get("PYTHONPATH")])))
+    results = []
+    for module in modules:
+        times = []
+        qt = False
+        for _ in range(repeat):
+            out = subprocess.run([sys.executable, "-c", _IMPORT_PROBE.format(module=module)],
+                                 capture_output=True, text=True, env=env, check=True).stdout.split()
+            times.append(float(out[0]))
+            qt = qt or out[1] == "True"
+        times.sort()
+        results.append({"module": module, "time_ms": times[len(times) // 2], "qt": qt})
+    return results
+
+
+def print_imports(entries: list) -> None:
+    print(f"{'module':<20} {'import (ms)':>11}  Qt")
+    for e in entries:
+        print(f"{e['module']:<20} {e['time_ms']:>11.1f}  {'oui' if e['qt'] else 'non'}")
+
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.10, min_time_ms: float = 1.0) -> list:
+    """
+    Compare deux rapports et renvoie la liste des régressions :
+    temps ou noeuds au-delà de la tolérance, ou comptage perft différent.
+    Les écarts de temps inférieurs à min_time_ms (bruit de mesure) sont ignorés.
+    """
+    def index(entries):
+        return {(e["mode"], e["position"], e["depth"]): e for e in entries}
+
+    regressions = []
+    if current["meta"].get("size", "7x6") != baseline["meta"].get("size", "7x6"):
+        return [f"tailles de plateau différentes : {baseline['meta'].get('size', '7x6')} -> {current['meta'].get('size', '7x6')}"]
+    base_search = index(baseline["search"])
+    for key, entry in index(current["search"]).items():
+        ref = base_search.get(key)
+        if ref is None:
+            continue
+        for metric in ("time_ms", "nodes"):
+            if metric == "time_ms" and entry[metric] - ref[metric] < min_time_ms:
+                continue
+            if ref[metric] > 0 and entry[metric] > ref[metric] * (1 + tolerance):
+                regressions.append(f"{key} {metric} : {ref[metric]:.1f} -> {entry[metric]:.1f}")
+
+    base_perft = index(baseline["perft"])
+    for key, entry in index(current["perft"]).items():
+        ref = base_perft.get(key)
+        if ref is not None and ref["count"] != entry["count"]:
+            regressions.append(f"{key} perft : {ref['count']} -> {entry['count']}")
+
+    return regressions
+
+
+def print_report(report: dict) -> None:
+    print(f"{'mode':>4} {'position':<10} {'prof':>4} {'noeuds':>10} {'temps (ms)':>11} {'noeuds/s':>11}  coup")
+    for e in report["search"]:
+        print(f"{e['mode']:>4} {e['position']:<10} {e['depth']:>4} {e['nodes']:>10} "
+              f"{e['time_ms']:>11.2f} {e['nps']:>11.0f}  {e['move']}")
+    pruned = [e for e in report["search"] if "nodes_unpruned" in e]
+    if pruned:
+        print("\nÉlagage des retraits (Variante 2) : noeuds sans élagage -> avec")
+        for e in pruned:
+            saved = e["nodes_unpruned"] - e["nodes"]
+            share = saved / e["nodes_unpruned"] * 100 if e["nodes_unpruned"] else 0.0
+            print(f"{e['position']:<10} prof {e['depth']:>2} : {e['nodes_unpruned']:>10} -> {e['nodes']:>10}  "
+                  f"({saved} économisés, {share:.1f} %)")
+    print()
+    for e in report["perft"]:
+        print(f"perft mode {e['mode']} {e['position']:<10} profondeur {e['depth']} : "
+              f"{e['count']} ({e['time_ms']:.1f} ms)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Banc d'essai du moteur (C++ ou Python de secours).")
+    parser.add_argument("--depths", default=",".join(map(str, DEFAULT_DEPTHS)), help="Profondeurs (ex : 2,4,6)")
+    parser.add_argument("--perft-depth", type=int, default=PERFT_DEPTH)
+    parser.add_argument("--out", default=None, help="Fichier JSON de sortie")
+    parser.add_argument("--compare", default=None, help="Rapport de référence à comparer")
+    parser.add_argument("--prune-kills", action="store_true", help="Élagage des retraits inutiles (Variante 2)")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Marge avant régression (0.10 = 10 %%)")
+    parser.add_argument("--engine", choices=["native", "python"], default="native", help="Moteur mesuré")
+    parser.add_argument("--size", type=parse_board_size, default=(7, 6), help="Plateau largeur x hauteur (7x6, 8x7, 9x7)")
+    parser.add_argument("--imports", action="store_true", help="Mesure seulement le coût d'import des modules sans interface")
+    args = parser.parse_args()
+
+    if args.imports:
+        entries = measure_imports()
+        print_imports(entries)
+        if args.out:
+            with open(args.out, "w") as f:
+                json.dump({"imports": entries}, f, indent=2)
+        # Aucun de ces modules ne doit charger PyQt6
+        sys.exit(1 if any(e["qt"] for e in entries) else 0)
+
+    if args.engine == "python":
+        from game.pyengine import PythonEngine
+        ai = PythonEngine()
+    else:
+        from game.calculateur import AIModel
+        ai = AIModel()
+    # On mesure le moteur lui-même, pas la bibliothèque d'ouvertures
+    ai.books = {}
+    ai.cache = None
+
+    report = run_benchmark(ai, [int(d) for d in args.depths.split(",")], args.perft_depth, size=args.size,
+                           prune_kills=args.prune_kills)
+    print_report(report)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print("\nRégressions :")
+            for line in regressions:
+                print("  " + line)
+            sys.exit(1)
+        print("\nAucune régression.")
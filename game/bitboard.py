@@ -0,0 +1,157 @@
+import numpy as np
+
+
+class BitBoard:
+    """
+    Représentation compacte du plateau : deux masques de bits (un par joueur)
+    et la hauteur de chaque colonne.
+
+    Chaque colonne occupe (height + 1) bits, du bas vers le haut ; le bit
+    supplémentaire reste toujours à 0 et sert de séparateur, ce qui permet de
+    tester les alignements par décalage + ET logique sans débordement d'une
+    colonne sur l'autre.
+    """
+
+    def __init__(self, width=7, height=6):
+        self.width = width
+        self.height = height
+        self._stride = height + 1
+        self._masks = {1: 0, -1: 0}
+        self._heights = [0] * width
+
+        # Décalages associés aux 4 directions d'alignement :
+        # vertical, horizontal, diagonale (\) et diagonale (/)
+        self._shifts = (1, self._stride, self._stride - 1, self._stride + 1)
+        self._col_mask = (1 << height) - 1
+
+        # On garde une vue NumPy synchronisée pour l'affichage
+        self._array = np.zeros((height, width), dtype=int)
+
+    @classmethod
+    def from_array(cls, board: np.ndarray) -> "BitBoard":
+        """Construit un BitBoard à partir d'un plateau NumPy (gravité supposée respectée)."""
+        height, width = board.shape
+        bb = cls(width, height)
+        for c in range(width):
+            for r in range(height - 1, -1, -1):
+                p = int(board[r, c])
+                if p == 0:
+                    break
+                bb.drop(c, p)
+        return bb
+
+    # ---------------------------------------------------------
+    # Conversion d'indices
+    # ---------------------------------------------------------
+
+    def _bit(self, r: int, c: int) -> int:
+        """Position du bit correspondant à la case (r, c) du tableau NumPy."""
+        return c * self._stride + (self.height - 1 - r)
+
+    @property
+    def array(self) -> np.ndarray:
+        """Vue NumPy du plateau (mise à jour incrémentalement)."""
+        return self._array
+
+    def mask(self, player: int) -> int:
+        return self._masks[player]
+
+    @property
+    def occupied(self) -> int:
+        return self._masks[1] | self._masks[-1]
+
+    def key(self) -> int:
+        """Clé unique de la position (pions du joueur 1 + masque d'occupation)."""
+        bottom = 0
+        for c in range(self.width):
+            bottom |= 1 << (c * self._stride)
+        return self._masks[1] + self.occupied + bottom
+
+    # ---------------------------------------------------------
+    # Opérations élémentaires (temps constant)
+    # ---------------------------------------------------------
+
+    def top_row(self, col: int) -> int:
+        """Première ligne vide d'une colonne ou -1 si pleine."""
+        if not (0 <= col < self.width):
+            return -1
+        h = self._heights[col]
+        if h >= self.height:
+            return -1
+        return self.height - 1 - h
+
+    def drop(self, col: int, player: int) -> int:
+        """Pose un pion en haut de la colonne et renvoie la ligne occupée."""
+        row = self.top_row(col)
+        if row == -1:
+            return -1
+        self._masks[player] |= 1 << (col * self._stride + self._heights[col])
+        self._heights[col] += 1
+        self._array[row, col] = player
+        return row
+
+    def remove(self, r: int, c: int) -> None:
+        """Retire le pion en (r, c) et fait tomber les pions situés au-dessus."""
+        level = self.height - 1 - r
+        if level >= self._heights[c]:
+            return
+        base = c * self._stride
+        below = (1 << level) - 1
+
+        for player in (1, -1):
+            m = self._masks[player]
+            col_bits = (m >> base) & self._col_mask
+            # On garde le bas intact et on décale le haut d'un cran
+            new_bits = (col_bits & below) | ((col_bits >> (level + 1)) << level)
+            self._masks[player] = (m & ~(self._col_mask << base)) | (new_bits << base)
+
+        self._heights[c] -= 1
+        self._sync_column(c)
+
+    def _sync_column(self, c: int) -> None:
+        base = c * self._stride
+        p1 = self._masks[1] >> base
+        p2 = self._masks[-1] >> base
+        for level in range(self.height):
+            r = self.height - 1 - level
+            if (p1 >> level) & 1: self._array[r, c] = 1
+            elif (p2 >> level) & 1: self._array[r, c] = -1
+            else: self._array[r, c] = 0
+
+    def is_full(self) -> bool:
+        return all(h == self.height for h in self._heights)
+
+    # ---------------------------------------------------------
+    # Détection d'alignements
+    # ---------------------------------------------------------
+
+    def has_won(self, player: int) -> bool:
+        """Vrai si le joueur possède un alignement de 4 n'importe où."""
+        b = self._masks[player]
+        for s in self._shifts:
+            m = b & (b >> s)
+            if m & (m >> (2 * s)):
+                return True
+        return False
+
+    def check_alignment(self, r: int, c: int, player: int, n: int) -> bool:
+        """Vérifie si le pion en (r, c) fait partie d'un alignement de n pions."""
+        if not (0 <= r < self.height and 0 <= c < self.width):
+            return False
+        b = self._masks[player]
+        cell = 1 << self._bit(r, c)
+        if not b & cell:
+            return False
+
+        for s in self._shifts:
+            # Bits de départ de chaque segment de n pions consécutifs
+            starts = b
+            for k in range(1, n):
+                starts &= b >> (k * s)
+            if not starts:
+                continue
+            # On regarde si la case appartient à l'un de ces segments
+            for k in range(n):
+                if (starts << (k * s)) & cell:
+                    return True
+        return False
@@ -2,10 +2,228 @@ import ctypes
 import numpy as np
 import os
 import platform
+import threading
+from game.openingbook import OpeningBook, default_book_path
+from game.resultcache import ResultCache
+from game.tablebase import TableBase, default_tablebase_path
 
-class AIModel:
-    """Interface Python pour la librairie C++ de l'IA (Architecture Buffer)."""
-    def __init__(self):
+class SearchStats(ctypes.Structure):
+    """Miroir de la structure C++ SearchStats (statistiques d'une recherche)."""
+    _fields_ = [
+        ("nodes", ctypes.c_longlong),
+        ("cutoffs", ctypes.c_longlong),
+        ("tt_hits", ctypes.c_longlong),
+        ("elapsed_us", ctypes.c_longlong),
+        ("max_depth", ctypes.c_int),
+        ("best_score", ctypes.c_int),
+        ("kills_skipped", ctypes.c_longlong),
+        ("aborted", ctypes.c_int),
+    ]
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name, _ in self._fields_}
+
+
+class SolveResult(ctypes.Structure):
+    """Miroir de la structure C++ SolveResult (résolution exacte, voir AIModel.solve)."""
+    _fields_ = [
+        ("score", ctypes.c_int),
+        ("col", ctypes.c_int),
+        ("plies", ctypes.c_int),
+    ]
+
+
+# Niveau « Parfait » : une profondeur d'au moins SOLVE_DEPTH demande la résolution exacte
+# (Classique 7 x 6) dans SOLVE_BUDGET_MS ; sinon, ou si elle n'aboutit pas à temps,
+# le coup vient d'une recherche à SOLVE_FALLBACK_DEPTH.
+SOLVE_DEPTH = 42
+SOLVE_FALLBACK_DEPTH = 8
+SOLVE_BUDGET_MS = 1000
+
+# En-tête des buffers de l'API engine_* : [lignes, colonnes, cases..., stock IA, stock humain]
+BUFFER_HEADER = 2
+
+
+def buffer_size(shape) -> int:
+    """Taille du buffer avec en-tête d'un plateau (lignes, colonnes)."""
+    return BUFFER_HEADER + shape[0] * shape[1] + 2
+
+
+def check_depth(depth: int, time_ms=None) -> None:
+    """Profondeur fixe d'au moins 1 (ignorée si un budget de temps est fourni)."""
+    if time_ms is None and depth < 1:
+        raise ValueError(f"Profondeur de recherche invalide : {depth} (au moins 1)")
+
+
+def batch_outputs(n: int, out_cols=None, out_kills=None, out_scores=None) -> tuple:
+    """
+    Tableaux de sortie de get_best_moves_batch : alloués s'ils ne sont pas fournis,
+    sinon leur forme est vérifiée (le C++ écrit N entrées sans contrôle). Remplis de -1.
+    """
+    outputs = []
+    for name, out, shape in (("out_cols", out_cols, (n,)), ("out_kills", out_kills, (n, 2)),
+                             ("out_scores", out_scores, (n,))):
+        if out is None:
+            out = np.empty(shape, dtype=np.int32)
+        elif np.shape(out) != shape:
+            raise ValueError(f"{name} : forme {np.shape(out)} au lieu de {shape}")
+        out.fill(-1)
+        outputs.append(out)
+    return tuple(outputs)
+
+
+class BaseEngine:
+    """
+    Partie commune aux moteurs (natif ou de secours) : bibliothèques d'ouvertures,
+    cache des résultats et contrat de get_best_move. Les sous-classes fournissent
+    _search, stop_search, reset_transposition_table, perft et get_best_moves_batch.
+
+    cache_entries / cache_bytes bornent le cache des résultats (None : pas de borne,
+    cache_entries=0 : pas de cache). cache_path : fichier de persistance du cache,
+    rechargé à la création s'il existe (voir save_cache).
+    """
+    def __init__(self, cache_entries=4096, cache_bytes=None, cache_path=None):
+        # Données propres au thread appelant (buffers, noeuds de la dernière recherche)
+        self._local = threading.local()
+
+        # Résultats des recherches à profondeur fixe déjà effectuées
+        self.cache = ResultCache(cache_entries, cache_bytes) if cache_entries != 0 else None
+        self.cache_path = cache_path
+        self.kill_pruning = False  # Réglage courant (voir set_kill_pruning), pris dans la clé du cache
+        if self.cache is not None and cache_path and os.path.exists(cache_path):
+            self.cache.load(cache_path)
+
+        # Bibliothèques d'ouvertures et tables de finales par mode (chargées si présentes)
+        self.books = {}
+        self.tablebases = {}
+        for mode in (0, 1, 2):
+            if os.path.exists(default_book_path(mode)):
+                self.load_opening_book(default_book_path(mode))
+            if os.path.exists(default_tablebase_path(mode)):
+                self.load_tablebase(default_tablebase_path(mode))
+
+    def close(self) -> None:
+        """Libère les ressources du moteur."""
+
+    def last_search_nodes(self) -> int:
+        """Nombre de noeuds visités par la dernière recherche du thread courant."""
+        return getattr(self._local, "last_nodes", 0)
+
+    def supports_board(self, height: int, width: int) -> bool:
+        """Le moteur sait-il jouer sur un plateau de cette taille ?"""
+        return True
+
+    def set_search_threads(self, n: int) -> None:
+        """Nombre de threads de recherche (sans effet si le moteur n'en gère qu'un)."""
+
+    def set_kill_pruning(self, enabled: bool) -> None:
+        """Élagage des retraits de la Variante 2 (sans effet si non géré)."""
+
+    def save_cache(self, path: str = None) -> None:
+        """Sauvegarde le cache des résultats (par défaut dans cache_path)."""
+        path = path or self.cache_path
+        if self.cache is not None and path:
+            self.cache.save(path)
+
+    def load_opening_book(self, path: str) -> None:
+        """Projette en mémoire une bibliothèque d'ouvertures (remplace celle du même mode)."""
+        book = OpeningBook(path)
+        self.books[book.mode] = book
+
+    def load_tablebase(self, path: str) -> None:
+        """Projette en mémoire une table de finales (remplace celle du même mode)."""
+        tablebase = TableBase(path)
+        self.tablebases[tablebase.mode] = tablebase
+
+    def get_best_move(self, board, depth, mode, p1_stock=0, p2_stock=0, time_ms=None) -> dict:
+        """
+        Meilleur coup {"col", "kill", "depth", "stats"} : table de finales, bibliothèque
+        d'ouvertures, puis cache, puis recherche du moteur.
+        Si time_ms est fourni, la profondeur est ignorée : le moteur approfondit
+        itérativement dans ce budget et la profondeur atteinte est renvoyée ("depth").
+        Une profondeur >= SOLVE_DEPTH demande un coup parfait en Classique (voir solve).
+        Un coup exact (table de finales ou solveur) porte "solved" ({"result", "plies", ...}) ;
+        "depth" vaut alors le nombre de demi-coups restants.
+        Lève ValueError si depth < 1 sans budget de temps.
+        """
+        check_depth(depth, time_ms)
+
+        # Table de finales : on ne l'utilise que si la recherche demandée verrait la
+        # fin de la partie (les niveaux faciles ne deviennent pas parfaits en finale)
+        tablebase = self.tablebases.get(mode)
+        if tablebase is not None:
+            entry = tablebase.lookup(board, p1_stock, p2_stock)
+            if entry is not None and (time_ms is not None or depth >= entry["plies"]):
+                return {"col": entry["col"], "kill": entry["kill"], "depth": entry["plies"],
+                        "stats": None, "solved": entry}
+
+        if depth >= SOLVE_DEPTH:
+            if mode == 0:
+                try:
+                    solved = self.solve(board, time_ms if time_ms is not None else SOLVE_BUDGET_MS)
+                except ValueError:
+                    solved = None # Plateau agrandi : pas de résolution exacte
+                if solved is not None:
+                    return {"col": solved["col"], "kill": None, "depth": solved["plies"],
+                            "stats": solved["stats"], "solved": solved}
+            depth = SOLVE_FALLBACK_DEPTH
+
+        # On consulte la bibliothèque d'ouvertures avant le moteur
+        # (sauf si on demande une recherche moins profonde : niveaux faciles)
+        book = self.books.get(mode)
+        if book is not None and (time_ms is not None or depth >= book.depth):
+            move = book.lookup(board, p1_stock, p2_stock)
+            if move is not None:
+                move["depth"] = book.depth
+                move["stats"] = None # Aucune recherche
+                return move
+
+        # Recherche à profondeur fixe déjà effectuée (les recherches chronométrées
+        # dépendent de la machine : elles ne sont pas mises en cache)
+        cacheable = self.cache is not None and time_ms is None
+        pruned = self.kill_pruning and mode == 2
+        if cacheable:
+            move = self.cache.lookup(board, depth, mode, p1_stock, p2_stock, pruned)
+            if move is not None:
+                move["stats"] = None # Aucune recherche
+                return move
+
+        move = self._search(board, depth, mode, p1_stock, p2_stock, time_ms)
+
+        # Une recherche interrompue (stop_search) n'a pas de valeur
+        if cacheable and not move["stats"]["aborted"]:
+            self.cache.store(board, depth, mode, p1_stock, p2_stock, move, pruned)
+        return move
+
+    def solve(self, board, time_ms=None):
+        """
+        Résolution exacte d'une position Classique, joueur au trait = pions 1.
+        Renvoie {"score", "result", "col", "plies", "stats"}, ou None si le moteur n'a
+        pas de solveur ou n'a pas abouti dans time_ms (voir AIModel.solve).
+        """
+        return None
+
+    def warm_up(self, depth: int = 4) -> None:
+        """Recherche factice sur le plateau vide de chaque variante (pages et table chargées)."""
+        board = np.zeros((6, 7), dtype=np.int32)
+        for mode in (0, 1, 2):
+            self._search(board, depth, mode)
+
+    def new_game(self) -> None:
+        """
+        Remise à zéro entre deux parties : recherche en cours abandonnée et table de
+        transposition vidée. Le cache des résultats et les bibliothèques sont conservés.
+        """
+        self.stop_search()
+        self.reset_transposition_table()
+
+
+class AIModel(BaseEngine):
+    """
+    Interface Python pour la librairie C++ de l'IA (Architecture Buffer).
+    Les options du cache sont celles de BaseEngine.
+    """
+    def __init__(self, cache_entries=4096, cache_bytes=None, cache_path=None):
         # On charge la librairie selon l'OS
         if platform.system() == "Darwin": lib_name = "libai_lib.dylib"
         elif platform.system() == "Windows": lib_name = "ai_lib.dll"
@@ -22,52 +240,281 @@ class AIModel:
             print(f"ERREUR FATALE : Impossible de charger {lib_path}. {e}")
             raise
 
-        # On définit la signature C++ (Buffer)
-        # Signature : int* get_best_move_buffer(int* input_buffer, int depth, int mode, int* out_size)
-        
-        self.lib.get_best_move_buffer.argtypes = [
+        # Tailles de plateau : buffers avec en-tête [lignes, colonnes, cases..., stocks]
+        # Signatures : int board_supported(int rows, int cols) / long long perft_sized(const int* input, int depth, int mode)
+        self.lib.board_supported.argtypes = [ctypes.c_int, ctypes.c_int]
+        self.lib.board_supported.restype = ctypes.c_int
+        self.lib.perft_sized.argtypes = [
+            np.ctypeslib.ndpointer(dtype=np.int32, ndim=1, flags='C_CONTIGUOUS'), # input_buffer
+            ctypes.c_int,                                                         # depth
+            ctypes.c_int                                                          # mode
+        ]
+        self.lib.perft_sized.restype = ctypes.c_longlong
+
+        # API réentrante : un contexte natif (table de transposition, réglages) par AIModel
+        # Signatures : void* engine_create(int log2_entries) / void engine_destroy(void* engine)
+        self.lib.engine_create.argtypes = [ctypes.c_int]
+        self.lib.engine_create.restype = ctypes.c_void_p
+        self.lib.engine_destroy.argtypes = [ctypes.c_void_p]
+        self.lib.engine_destroy.restype = None
+
+        # Signature : int engine_search(void* engine, const int* input_buffer, int depth, int time_ms,
+        #                               int mode, int* out_move, SearchStats* stats)
+        # input_buffer porte l'en-tête de dimensions ; renvoie -1 si la taille n'est pas prise en charge
+        self.lib.engine_search.argtypes = [
+            ctypes.c_void_p,                                                      # engine
             np.ctypeslib.ndpointer(dtype=np.int32, ndim=1, flags='C_CONTIGUOUS'), # input_buffer
             ctypes.c_int,                                                         # depth
+            ctypes.c_int,                                                         # time_ms (<= 0 : profondeur fixe)
             ctypes.c_int,                                                         # mode
-            ctypes.POINTER(ctypes.c_int)                                          # out_size (pointeur)
+            np.ctypeslib.ndpointer(dtype=np.int32, ndim=1, flags='C_CONTIGUOUS'), # out_move (3)
+            ctypes.POINTER(SearchStats)                                           # stats
         ]
-        # Le retour est un pointeur vers un tableau d'entiers (int*)
-        self.lib.get_best_move_buffer.restype = ctypes.POINTER(ctypes.c_int)
+        self.lib.engine_search.restype = ctypes.c_int
 
-    def decode_move(self, result_list: list) -> dict:
-        """Traduit la liste d'entiers renvoyée par le C++ en dictionnaire."""
-        if not result_list:
-            return {"col": 0, "kill": None} # Sécurité
+        # Signature : int engine_search_batch(void* engine, const int* input, int n, int depth, int mode,
+        #                                     int* out_cols, int* out_kills, int* out_scores)
+        # input : N buffers avec en-tête de même taille ; renvoie -1 si la taille n'est pas prise en charge
+        int_buffer = np.ctypeslib.ndpointer(dtype=np.int32, flags='C_CONTIGUOUS')
+        self.lib.engine_search_batch.argtypes = [
+            ctypes.c_void_p,  # engine
+            int_buffer,       # input (N buffers avec en-tête)
+            ctypes.c_int,     # n
+            ctypes.c_int,     # depth
+            ctypes.c_int,     # mode
+            int_buffer,       # out_cols (N)
+            int_buffer,       # out_kills (N x 2)
+            int_buffer        # out_scores (N)
+        ]
+        self.lib.engine_search_batch.restype = ctypes.c_int
 
-        col = result_list[0]
-        move = {"col": col, "kill": None}
-        
-        # Si la liste contient 3 éléments (ex: [-1, 5, 2]), c'est une destruction
-        if len(result_list) >= 3:
-            move["kill"] = (result_list[1], result_list[2])
-            
-        return move
+        # Signature : int engine_solve(void* engine, const int* input_buffer, int time_ms,
+        #                              SolveResult* out, SearchStats* stats)
+        # Renvoie 1 si résolue, 0 si interrompue, -1 si la position n'est pas prise en charge
+        self.lib.engine_solve.argtypes = [
+            ctypes.c_void_p,
+            np.ctypeslib.ndpointer(dtype=np.int32, ndim=1, flags='C_CONTIGUOUS'),
+            ctypes.c_int,
+            ctypes.POINTER(SolveResult),
+            ctypes.POINTER(SearchStats)
+        ]
+        self.lib.engine_solve.restype = ctypes.c_int
+
+        # Signatures : void engine_stop(void*) / engine_reset(void*, int) /
+        #              engine_set_threads(void*, int) / engine_set_kill_pruning(void*, int)
+        self.lib.engine_stop.argtypes = [ctypes.c_void_p]
+        self.lib.engine_stop.restype = None
+        for name in ("engine_reset", "engine_set_threads", "engine_set_kill_pruning"):
+            getattr(self.lib, name).argtypes = [ctypes.c_void_p, ctypes.c_int]
+            getattr(self.lib, name).restype = None
+
+        self._engine = self.lib.engine_create(0)
 
-    def get_best_move(self, board, depth, mode, p1_stock=0, p2_stock=0) -> dict:
+        # Buffers d'entrée/sortie préalloués (un jeu par thread appelant, voir _buffers)
+        super().__init__(cache_entries, cache_bytes, cache_path)
+
+    def close(self) -> None:
+        """Libère le contexte natif (appelé automatiquement à la destruction)."""
+        if getattr(self, "_engine", None):
+            self.lib.engine_destroy(self._engine)
+            self._engine = None
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def _buffers(self, shape):
         """
-        Prépare le buffer (Plateau + Stocks), appelle le C++, et traduit la réponse.
+        Buffers (entrée, coup, statistiques) du thread courant, créés au premier appel.
+        Un buffer d'entrée par taille de plateau, en-tête déjà rempli.
         """
-        # On construit le Buffer d'Entrée (42 cases + 2 Stocks = 44 entiers)
-        flat_board = board.flatten().astype(np.int32)
-        
-        input_buffer = np.zeros(44, dtype=np.int32)
-        input_buffer[:42] = flat_board
-        # Ajout du contexte (Stocks) à la fin du buffer
-        input_buffer[42] = p1_stock
-        input_buffer[43] = p2_stock
-        
-        # On prépare le pointeur de taille de sortie
-        out_size = ctypes.c_int(0)
-        
-        # Appel C++
-        result_ptr = self.lib.get_best_move_buffer(input_buffer, depth, mode, ctypes.byref(out_size))
-        
-        # On lit le résultat (Conversion Pointeur C -> Liste Python)
-        result_list = [result_ptr[i] for i in range(out_size.value)]
-        
-        return self.decode_move(result_list)
+        local = self._local
+        if not hasattr(local, "inputs"):
+            local.inputs = {}
+            local.out_move = np.empty(3, dtype=np.int32)
+            local.stats = SearchStats()
+            local.last_nodes = 0
+        if shape not in local.inputs:
+            input_buffer = np.zeros(buffer_size(shape), dtype=np.int32)
+            input_buffer[:BUFFER_HEADER] = shape
+            local.inputs[shape] = input_buffer
+        return local
+
+    def _check_board(self, shape) -> None:
+        if not self.supports_board(*shape):
+            raise ValueError(f"Plateau {shape[1]} x {shape[0]} non pris en charge par le moteur natif")
+
+    def supports_board(self, height: int, width: int) -> bool:
+        """Tailles compilées dans la librairie (voir Geometry dans ai_core.cpp)."""
+        return bool(self.lib.board_supported(height, width))
+
+    def perft(self, board, depth, mode, p1_stock=0, p2_stock=0) -> int:
+        """Nombre de feuilles de l'arbre des coups générés par le moteur (IA au trait)."""
+        self._check_board(board.shape)
+        input_buffer = np.empty(buffer_size(board.shape), dtype=np.int32)
+        input_buffer[:BUFFER_HEADER] = board.shape
+        input_buffer[BUFFER_HEADER:-2] = board.reshape(-1)
+        input_buffer[-2] = p1_stock
+        input_buffer[-1] = p2_stock
+        return self.lib.perft_sized(input_buffer, depth, mode)
+
+    def set_search_threads(self, n: int) -> None:
+        """
+        Répartit les coups de la racine sur n threads (table de transposition partagée).
+        n = 1 (défaut) garde une recherche séquentielle déterministe ; n <= 0 utilise tous les coeurs.
+        """
+        self.lib.engine_set_threads(self._engine, n)
+
+    def set_kill_pruning(self, enabled: bool) -> None:
+        """
+        Variante 2 : écarte les retraits qui ne changent la valeur d'aucune fenêtre de 4.
+        Recherche plus rapide mais approchée. stats["kills_skipped"] compte les retraits
+        écartés (des coups, pas les noeuds de leurs sous-arbres) ; les noeuds économisés
+        se mesurent contre une recherche sans élagage (python -m game.benchmark --prune-kills).
+        """
+        self.lib.engine_set_kill_pruning(self._engine, 1 if enabled else 0)
+        self.kill_pruning = bool(enabled)
+
+    def stop_search(self) -> None:
+        """Demande l'arrêt des recherches en cours (depuis n'importe quel thread)."""
+        self.lib.engine_stop(self._engine)
+
+    def reset_transposition_table(self, log2_entries: int = 0) -> None:
+        """
+        Vide la table de transposition du moteur.
+        Si log2_entries > 0, la table est redimensionnée à 2**log2_entries entrées.
+        """
+        self.lib.engine_reset(self._engine, log2_entries)
+
+    def solve(self, board, time_ms=None):
+        """
+        Résout exactement une position Classique (7 x 6), joueur au trait = pions 1.
+
+        "score" : 0 si nulle, > 0 si le joueur au trait gagne (plus grand si la victoire
+        est plus rapide), < 0 s'il perd ; "result" : 1, 0 ou -1 ; "col" : un coup optimal ;
+        "plies" : demi-coups jusqu'à la fin en jeu parfait, coup joué compris.
+        La table du solveur est conservée d'un appel à l'autre (bornes exactes).
+
+        time_ms borne la durée (None : sans limite, stop_search reste possible) ; renvoie
+        None si la résolution n'a pas abouti. Lève ValueError si la position n'est pas
+        prise en charge (taille, gravité non respectée, partie terminée).
+        """
+        self._check_board(board.shape)
+        buffers = self._buffers(board.shape)
+        input_buffer = buffers.inputs[board.shape]
+        np.copyto(input_buffer[BUFFER_HEADER:-2], board.reshape(-1), casting="unsafe")
+        input_buffer[-2:] = 0
+        out = SolveResult()
+        stats = buffers.stats
+
+        status = self.lib.engine_solve(self._engine, input_buffer, int(time_ms) if time_ms else 0,
+                                       ctypes.byref(out), ctypes.byref(stats))
+        buffers.last_nodes = stats.nodes
+        if status < 0:
+            raise ValueError("Position non résoluble (taille, gravité non respectée ou partie terminée)")
+        if status == 0:
+            return None
+        return {
+            "score": out.score,
+            "result": (out.score > 0) - (out.score < 0),
+            "col": out.col,
+            "plies": out.plies,
+            "stats": stats.to_dict(),
+        }
+
+    def get_best_moves_batch(self, boards, stocks=None, depth=4, mode=0,
+                             out_cols=None, out_kills=None, out_scores=None):
+        """
+        Calcule le meilleur coup de N positions en un seul appel C++.
+        boards : (N, H, W) de même taille, stocks : (N, 2) [stock IA, stock humain] ou None.
+        Les tableaux de sortie (int32, contigus) peuvent être fournis pour éviter toute allocation.
+        Renvoie (cols (N,), kills (N, 2) avec -1 si pas de kill, scores (N,)).
+        """
+        check_depth(depth)
+        boards = np.asarray(boards)
+        n = boards.shape[0]
+        shape = boards.shape[1:]
+        self._check_board(shape)
+
+        # Un seul buffer contigu : N lignes [lignes, colonnes, cases..., 2 stocks]
+        input_buffer = np.zeros((n, buffer_size(shape)), dtype=np.int32)
+        input_buffer[:, :BUFFER_HEADER] = shape
+        input_buffer[:, BUFFER_HEADER:-2] = boards.reshape(n, -1)
+        if stocks is not None:
+            input_buffer[:, -2:] = stocks
+
+        out_cols, out_kills, out_scores = batch_outputs(n, out_cols, out_kills, out_scores)
+
+        self.lib.engine_search_batch(self._engine, input_buffer, n, depth, mode, out_cols, out_kills, out_scores)
+        return out_cols, out_kills, out_scores
+
+    def _search(self, board, depth, mode, p1_stock=0, p2_stock=0, time_ms=None) -> dict:
+        """Recherche native seule (sans bibliothèque d'ouvertures ni cache)."""
+        # Buffer d'Entrée (en-tête + cases + 2 Stocks) et sorties, réutilisés d'un appel à l'autre
+        self._check_board(board.shape)
+        buffers = self._buffers(board.shape)
+        input_buffer = buffers.inputs[board.shape]
+        np.copyto(input_buffer[BUFFER_HEADER:-2], board.reshape(-1), casting="unsafe")
+        input_buffer[-2] = p1_stock
+        input_buffer[-1] = p2_stock
+        out_move = buffers.out_move
+        stats = buffers.stats
+
+        # Appel C++ réentrant (profondeur fixe, ou budget de temps si time_ms est fourni)
+        reached = self.lib.engine_search(self._engine, input_buffer, depth,
+                                         int(time_ms) if time_ms is not None else 0,
+                                         mode, out_move, ctypes.byref(stats))
+        buffers.last_nodes = stats.nodes
+
+        col, kill_row, kill_col = (int(v) for v in out_move)
+        return {
+            "col": col,
+            "kill": (kill_row, kill_col) if kill_row != -1 else None,
+            "depth": reached,
+            "stats": stats.to_dict(),
+        }
+
+
+# Moteur partagé par toutes les parties du processus (voir get_engine)
+_shared_engine = None
+_shared_engine_lock = threading.Lock()
+
+
+def get_engine(warm_up: bool = True, backend: str = None) -> BaseEngine:
+    """
+    Renvoie le moteur du processus, créé au premier appel : la librairie n'est chargée
+    qu'une fois et son contexte natif est réutilisé d'une partie à l'autre.
+
+    backend (par défaut la variable d'environnement P4_ENGINE, sinon "auto") :
+    "native" exige la librairie C++, "python" impose le moteur de secours,
+    "auto" se rabat sur le moteur Python si la librairie est introuvable.
+    Lève ValueError si le moteur déjà créé n'est pas celui demandé ("auto" les accepte tous).
+    """
+    global _shared_engine
+    backend = backend or os.environ.get("P4_ENGINE", "auto")
+    if backend not in ("auto", "native", "python"):
+        raise ValueError(f"Moteur inconnu : {backend} (auto, native ou python)")
+    with _shared_engine_lock:
+        if _shared_engine is None:
+            if backend == "python":
+                from game.pyengine import PythonEngine
+                engine = PythonEngine()
+            else:
+                try:
+                    engine = AIModel()
+                except OSError:
+                    if backend == "native":
+                        raise
+                    from game.pyengine import PythonEngine
+                    print("Moteur natif indisponible : utilisation du moteur Python de secours")
+                    engine = PythonEngine()
+            if warm_up:
+                engine.warm_up()
+            _shared_engine = engine
+        # Seul le premier appel crée le moteur : une demande contraire n'est pas ignorée
+        current = "native" if isinstance(_shared_engine, AIModel) else "python"
+        if backend not in ("auto", current):
+            raise ValueError(f"Moteur {current} déjà créé pour ce processus : {backend} demandé")
+        return _shared_engine
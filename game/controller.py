@@ -1,16 +1,30 @@
-from game.gamemanager import variantes, InvalidMove
-from game.graphicinterface import Interface
+from concurrent.futures import ThreadPoolExecutor
+from game.gamemanager import variantes, InvalidMove, BOARD_SIZES
+from game.calculateur import get_engine, SOLVE_DEPTH
+from game.records import RecordWriter, game_record
 
 
 class Controller:
     """Contrôleur principal gérant la boucle de jeu et les interactions utilisateur."""
     def __init__(self):
+        # PyQt6 n'est chargé qu'ici : game.gamemanager et game.calculateur restent utilisables sans Qt
+        from game.graphicinterface import Interface
         self._interface = Interface()
         self._variantes = variantes
         self._gestionnaire = None
         self._in_menu = True
         self._in_game = False
 
+        # Les recherches de l'IA tournent hors du thread graphique (ctypes relâche le GIL).
+        # Un seul worker : les recherches s'exécutent l'une après l'autre.
+        self._ai_executor = ThreadPoolExecutor(max_workers=1)
+
+        # Chargement et préchauffage du moteur pendant l'affichage des menus
+        self._ai_executor.submit(get_engine)
+
+        # Parties terminées ajoutées aux enregistrements (répertoire P4_RECORDS ou records/)
+        self._records = RecordWriter()
+
     def start(self):
         """Lance l'application."""
         while self._interface._running:
@@ -19,6 +33,19 @@ class Controller:
             elif self._in_game:
                 self.game_loop()
 
+        if self._gestionnaire:
+            self._gestionnaire.cancel_ai_search()
+        self._ai_executor.shutdown(wait=False, cancel_futures=True)
+        self._records.close()
+
+    def save_record(self):
+        """Enregistre la partie terminée (un échec d'écriture n'interrompt pas le jeu)."""
+        try:
+            self._records.append(game_record(self._gestionnaire))
+            self._records.flush()
+        except OSError as e:
+            print(f"Erreur d'enregistrement de la partie : {e}")
+
     def menu_principal(self):
         # On affiche le choix de la Variante
         choix_variante = self._interface.send_menu(
@@ -29,6 +56,16 @@ class Controller:
         if choix_variante is None: 
             return # Fermeture de la fenêtre
 
+        # On affiche le choix de la taille du plateau
+        choix_taille = self._interface.send_menu(
+            "Taille du plateau",
+            [f"{w} x {h}" for w, h in BOARD_SIZES]
+        )
+
+        if choix_taille is None:
+            return
+        width, height = BOARD_SIZES[choix_taille]
+
         # On affiche le choix du Mode
         choix_mode = self._interface.send_menu(
             "Choisissez le mode de jeu",
@@ -40,23 +77,29 @@ class Controller:
 
         mode_solo = (choix_mode == 0)
         difficulty = 4
+        time_budget = None
 
         # On demande la difficulté pour le mode solo
         if mode_solo:
-            choix_diff = self._interface.send_menu(
-                "Niveau de difficulté",
-                ["Facile", "Moyen", "Difficile", "Expert"]
-            )
+            # Niveau -> (profondeur de recherche, budget en ms) ; le niveau chronométré
+            # borne la latence plutôt que la profondeur
+            niveaux = [("Facile", 2, None), ("Moyen", 4, None), ("Difficile", 6, None),
+                       ("Expert", 8, None), ("Chrono (1 s par coup)", 4, 1000)]
+            # Résolution exacte : Classique sur le plateau standard uniquement
+            if self._variantes[choix_variante].engine_mode == 0 and (width, height) == BOARD_SIZES[0]:
+                niveaux.append(("Parfait (résolution exacte)", SOLVE_DEPTH, None))
+
+            choix_diff = self._interface.send_menu("Niveau de difficulté", [n[0] for n in niveaux])
             if choix_diff is None: return
-            
-            # Mapping : Index -> Profondeur de recherche
-            niveaux = [2, 4, 6, 8]
-            difficulty = niveaux[choix_diff]
+            _, difficulty, time_budget = niveaux[choix_diff]
 
         # Initialisation du gestionnaire
         self._gestionnaire = self._variantes[choix_variante](
             mode_solo=mode_solo, 
-            difficulty=difficulty
+            difficulty=difficulty,
+            time_budget=time_budget,
+            width=width,
+            height=height
         )
         
         self._in_menu = False
@@ -106,18 +149,8 @@ class Controller:
             
             # Gestion du tour IA
             if getattr(self._gestionnaire, 'mode_solo', False):
-                
-                info_p1, info_p2 = self._get_display_infos()
-                self._interface.refresh_only(
-                    self._gestionnaire.current_player, 
-                    self._gestionnaire.board, 
-                    p1_info=info_p1, 
-                    p2_info=info_p2
-                )
-                
-                self._interface.pause(700) 
-                
-                self._gestionnaire.play_ai_turn()
+                if not self.ai_turn():
+                    return
 
                 if self.check_game_end():
                     return
@@ -125,11 +158,49 @@ class Controller:
         except InvalidMove:
             pass
 
+    def ai_turn(self):
+        """
+        Lance la recherche de l'IA dans un thread de travail et garde l'interface active.
+        Renvoie False si la partie a été quittée pendant la réflexion.
+        """
+        gestionnaire = self._gestionnaire
+        future = self._ai_executor.submit(gestionnaire.compute_ai_move)
+
+        info_p1, info_p2 = self._get_display_infos()
+        done = self._interface.wait_for_ai(
+            gestionnaire.current_player,
+            gestionnaire.board,
+            future,
+            p1_info=info_p1,
+            p2_info=info_p2
+        )
+
+        if done is None:
+            # Retour menu (ou fermeture) : on abandonne la recherche en cours
+            future.cancel()
+            gestionnaire.cancel_ai_search()
+            self._in_game = False
+            self._in_menu = True
+            self._gestionnaire = None
+            return False
+
+        try:
+            move_data = done.result()
+        except Exception as e:
+            print(f"Erreur critique IA : {e}")
+            return True
+
+        gestionnaire.apply_ai_move(move_data)
+        return True
+
     def check_game_end(self):
         """Vérifie les conditions de fin de partie ou les événements."""
         
         info_p1, info_p2 = self._get_display_infos()
 
+        if self._gestionnaire.victory or self._gestionnaire.draw:
+            self.save_record()
+
         if self._gestionnaire.victory:
             self._interface.refresh_only(
                 self._gestionnaire.current_player, 
@@ -0,0 +1,184 @@
+"""
+Évaluation vectorisée de plateaux : détection des victoires, des alignements de 3
+et heuristique des fenêtres, sur une pile (N, H, W) de plateaux en une seule passe (6 x 7 par défaut).
+
+Les scores sont ceux du moteur C++ (evaluate_window, bonus central, victoires,
+munitions de la Variante 2), du point de vue du joueur 1 (l'IA) : un plateau
+vu du joueur au trait s'obtient avec board * player.
+
+Les fenêtres sont décrites par des tables d'indices (cases aplaties r * width + c)
+calculées une fois par dimension de plateau, dans le même ordre que le moteur.
+
+    from game.evaluation import evaluate, has_won
+    scores = evaluate(boards, mode=2, p1_stock=stocks[:, 0], p2_stock=stocks[:, 1])
+"""
+import numpy as np
+
+# Pondérations du moteur (ai_core.cpp)
+SCORE_WIN = 100000
+SCORE_3_THREAT = 100
+SCORE_2_BUILD = 5
+SCORE_BLOCK_3 = -80
+SCORE_STOCK_UNIT = 50
+CENTER_BONUS = 3
+
+# Nombre de plateaux traités à la fois : borne la mémoire des tableaux (N, fenêtres, 4)
+CHUNK = 1 << 16
+
+_window_tables = {}
+
+
+def window_indices(height: int = 6, width: int = 7, length: int = 4) -> np.ndarray:
+    """
+    Indices (cases aplaties) de chaque fenêtre de `length` cases alignées :
+    horizontales, verticales, puis les deux diagonales (mis en cache).
+    """
+    key = (height, width, length)
+    if key not in _window_tables:
+        windows = []
+        steps = ((0, 1, range(height), range(width - length + 1)),
+                 (1, 0, range(height - length + 1), range(width)),
+                 (1, 1, range(height - length + 1), range(width - length + 1)),
+                 (-1, 1, range(length - 1, height), range(width - length + 1)))
+        for dr, dc, rows, cols in steps:
+            # Le moteur parcourt les verticales colonne par colonne
+            pairs = [(r, c) for c in cols for r in rows] if dc == 0 else [(r, c) for r in rows for c in cols]
+            for r, c in pairs:
+                windows.append([(r + k * dr) * width + c + k * dc for k in range(length)])
+        table = np.array(windows, dtype=np.intp).reshape(-1, length)
+        table.flags.writeable = False
+        _window_tables[key] = table
+    return _window_tables[key]
+
+
+def _window_score_table() -> np.ndarray:
+    """Score d'une fenêtre indexé par [pions IA][pions adverses] (evaluate_window)."""
+    table = np.zeros((5, 5), dtype=np.int64)
+    for a in range(5):
+        for o in range(5 - a):
+            empty = 4 - a - o
+            if a == 4:
+                table[a, o] = SCORE_WIN
+            elif a == 3 and empty == 1:
+                table[a, o] = SCORE_3_THREAT
+            elif a == 2 and empty == 2:
+                table[a, o] = SCORE_2_BUILD
+            elif o == 3 and empty == 1:
+                table[a, o] = SCORE_BLOCK_3
+    return table
+
+
+WINDOW_SCORES = _window_score_table()
+
+
+def center_columns(width: int = 7) -> tuple:
+    """Colonnes qui rapportent CENTER_BONUS : une seule si la largeur est impaire, deux sinon."""
+    return tuple(sorted({(width - 1) // 2, width // 2}))
+
+
+def as_stack(boards) -> np.ndarray:
+    """Plateau (H, W) ou pile (N, H, W) -> pile (N, H, W) de int8."""
+    boards = np.asarray(boards)
+    if boards.ndim == 2:
+        boards = boards[None]
+    if boards.ndim != 3:
+        raise ValueError(f"Pile de plateaux (N, H, W) attendue, reçu {boards.shape}")
+    return boards.astype(np.int8, copy=False)
+
+
+def _chunks(boards: np.ndarray):
+    """Découpe la pile aplatie (N, H * W) en blocs de CHUNK plateaux."""
+    flat = boards.reshape(len(boards), -1)
+    for start in range(0, len(flat), CHUNK):
+        yield start, flat[start:start + CHUNK]
+
+
+def _has_line(boards, player: int, length: int) -> np.ndarray:
+    boards = as_stack(boards)
+    windows = window_indices(boards.shape[1], boards.shape[2], length)
+    result = np.zeros(len(boards), dtype=bool)
+    for start, flat in _chunks(boards):
+        mine = flat == player
+        result[start:start + len(flat)] = mine[:, windows].all(axis=2).any(axis=1)
+    return result
+
+
+def has_won(boards, player: int) -> np.ndarray:
+    """Booléen (N,) : le joueur aligne au moins 4 pions."""
+    return _has_line(boards, player, 4)
+
+
+def has_three(boards, player: int) -> np.ndarray:
+    """Booléen (N,) : le joueur aligne au moins 3 pions (déclencheur de la Variante 1)."""
+    return _has_line(boards, player, 3)
+
+
+def winners(boards) -> np.ndarray:
+    """
+    Vainqueur de chaque plateau (N,) : 1, -1, 0 si aucun,
+    2 si les deux joueurs sont alignés (partie nulle après un retrait).
+    """
+    p1 = has_won(boards, 1)
+    p2 = has_won(boards, -1)
+    result = np.where(p1, 1, np.where(p2, -1, 0))
+    result[p1 & p2] = 2
+    return result
+
+
+def window_counts(boards) -> tuple:
+    """Nombre de pions du joueur 1 et du joueur -1 dans chaque fenêtre : deux (N, fenêtres) int8."""
+    boards = as_stack(boards)
+    windows = window_indices(boards.shape[1], boards.shape[2])
+    ai = np.empty((len(boards), len(windows)), dtype=np.int8)
+    opp = np.empty_like(ai)
+    for start, flat in _chunks(boards):
+        cells = flat[:, windows]
+        ai[start:start + len(flat)] = (cells == 1).sum(axis=2, dtype=np.int8)
+        opp[start:start + len(flat)] = (cells == -1).sum(axis=2, dtype=np.int8)
+    return ai, opp
+
+
+def _scan(boards: np.ndarray) -> tuple:
+    """Une passe sur les fenêtres : (score positionnel, victoire du joueur 1, victoire du joueur -1)."""
+    windows = window_indices(boards.shape[1], boards.shape[2])
+    scores = WINDOW_SCORES.ravel()
+    center = list(center_columns(boards.shape[2]))
+    total = np.empty(len(boards), dtype=np.int64)
+    p1 = np.empty(len(boards), dtype=bool)
+    p2 = np.empty(len(boards), dtype=bool)
+    for start, flat in _chunks(boards):
+        end = start + len(flat)
+        cells = flat[:, windows]
+        ai = (cells == 1).sum(axis=2, dtype=np.int8)
+        opp = (cells == -1).sum(axis=2, dtype=np.int8)
+        total[start:end] = scores[ai * 5 + opp].sum(axis=1)
+        total[start:end] += CENTER_BONUS * (boards[start:end][:, :, center] == 1).sum(axis=(1, 2))
+        p1[start:end] = (ai == 4).any(axis=1)
+        p2[start:end] = (opp == 4).any(axis=1)
+    return total, p1, p2
+
+
+def position_score(boards) -> np.ndarray:
+    """
+    Heuristique positionnelle du moteur (N,) : bonus central + somme des fenêtres,
+    sans tenir compte des victoires (GameState::position_score).
+    """
+    return _scan(as_stack(boards))[0]
+
+
+def evaluate(boards, mode: int = 0, p1_stock=0, p2_stock=0) -> np.ndarray:
+    """
+    Score statique de chaque plateau (N,) identique à Rules::evaluate du moteur :
+    ±SCORE_WIN * 10 pour une victoire, 0 si les deux joueurs sont alignés (un retrait
+    des variantes peut compléter les deux), et les munitions (scalaires ou tableaux (N,))
+    en Variante 2.
+    """
+    scores, p1, p2 = _scan(as_stack(boards))
+    if mode == 2:
+        scores += SCORE_STOCK_UNIT * (np.asarray(p1_stock, dtype=np.int64) - np.asarray(p2_stock, dtype=np.int64))
+
+    scores[p2] = -SCORE_WIN * 10
+    scores[p1] = SCORE_WIN * 10
+    if mode != 0:
+        scores[p1 & p2] = 0
+    return scores
@@ -1,6 +1,18 @@
 import numpy as np
 from abc import ABC, abstractmethod
-from game.calculateur import AIModel
+from game.bitboard import BitBoard
+from game.evaluation import has_won
+from game.records import encode_drop, encode_kill, STOCK_FLAG
+
+# Tailles de plateau proposées (largeur, hauteur), toutes prises en charge par le moteur
+BOARD_SIZES = ((7, 6), (8, 7), (9, 7))
+
+def parse_board_size(text: str) -> tuple:
+    """Convertit "8x7" (largeur x hauteur) en (8, 7) ; ValueError si la taille n'est pas proposée."""
+    width, height = (int(v) for v in text.lower().split("x"))
+    if (width, height) not in BOARD_SIZES:
+        raise ValueError(f"Taille inconnue : {text}")
+    return width, height
 
 class InvalidMove(Exception):
     """Exception levée lorsqu'un coup n'est pas valide."""
@@ -12,14 +24,26 @@ class Gestionnaire(ABC):
     Implémente le pattern Template Method pour la gestion des tours.
     """
     name: str = "Jeu"
-
-    def __init__(self, mode_solo=False, difficulty=4):
-        self._width = 7
-        self._height = 6
-        self._board = np.zeros((self._height, self._width), dtype=int)
+    engine_mode: int = 0  # Identifiant des règles côté C++ (0 Classique, 1 V1, 2 V2)
+
+    def __init__(self, mode_solo=False, difficulty=4, bitboard=False, time_budget=None, width=7, height=6):
+        if (width, height) not in BOARD_SIZES:
+            raise ValueError(f"Plateau {width} x {height} non pris en charge (tailles : {BOARD_SIZES})")
+        self._width = width
+        self._height = height
+
+        # Backend optionnel : masques de bits + vue NumPy synchronisée
+        self._bits = BitBoard(self._width, self._height) if bitboard else None
+        if self._bits is not None:
+            self._board = self._bits.array
+        else:
+            self._board = np.zeros((self._height, self._width), dtype=int)
         
         # 1 = Joueur IA/Rouge, -1 = Joueur Humain/Jaune
         self._current_player = -1  
+
+        # Coups joués, un octet chacun (format de game.records)
+        self._history = bytearray()
         
         self._victory = False
         self._draw = False
@@ -30,17 +54,32 @@ class Gestionnaire(ABC):
 
         self.mode_solo = mode_solo
         self.difficulty = difficulty
+        # Budget de temps par coup (ms) : s'il est défini, il remplace la profondeur fixe
+        self.time_budget = time_budget
         self.ai_engine = None
         
         if self.mode_solo:
             try:
-                self.ai_engine = AIModel()
-                print(f"IA chargée avec succès. Difficulté : {difficulty}")
+                # Import différé : les règles seules n'ont besoin ni de ctypes ni du moteur
+                from game.calculateur import get_engine
+                # Moteur partagé du processus : seule la table de la partie précédente est vidée
+                self.ai_engine = get_engine()
+                self.ai_engine.new_game()
+                if time_budget is not None:
+                    print(f"IA chargée avec succès. Budget : {time_budget} ms par coup")
+                else:
+                    print(f"IA chargée avec succès. Difficulté : {difficulty}")
             except Exception as e:
                 print(f"Erreur critique IA : {e}")
 
     @property
-    def board(self): return self._board
+    def board(self):
+        if self._bits is not None:
+            # Vue en lecture seule : les coups passent par le BitBoard
+            view = self._board.view()
+            view.flags.writeable = False
+            return view
+        return self._board
 
     @property
     def current_player(self): return self._current_player
@@ -57,6 +96,11 @@ class Gestionnaire(ABC):
     @property
     def message_event(self): return self._message_event
 
+    @property
+    def history(self) -> bytes:
+        """Coups joués depuis le début de la partie (voir game.records)."""
+        return bytes(self._history)
+
     @property
     def width(self): return self._width
 
@@ -72,6 +116,9 @@ class Gestionnaire(ABC):
 
     def check_alignment(self, r: int, c: int, player: int, n: int) -> bool:
         """Vérifie si le pion en (r, c) fait partie d'un alignement de n pions."""
+        if self._bits is not None:
+            return self._bits.check_alignment(r, c, player, n)
+
         directions = [(0, 1), (1, 0), (1, 1), (1, -1)]
         
         for dr, dc in directions:
@@ -97,6 +144,8 @@ class Gestionnaire(ABC):
 
     def get_top_row(self, col: int) -> int:
         """Retourne la première ligne vide d'une colonne ou -1 si pleine."""
+        if self._bits is not None:
+            return self._bits.top_row(col)
         if not (0 <= col < self._width):
             return -1
         for r in range(self._height - 1, -1, -1):
@@ -104,19 +153,52 @@ class Gestionnaire(ABC):
                 return r
         return -1
 
+    def _drop(self, col: int) -> int:
+        """Pose un pion du joueur courant dans la colonne et renvoie la ligne (-1 si pleine)."""
+        if self._bits is not None:
+            row = self._bits.drop(col, self._current_player)
+        else:
+            row = self.get_top_row(col)
+            if row != -1:
+                self._board[row, col] = self._current_player
+        if row != -1:
+            self._history.append(encode_drop(col))
+        return row
+
+    def _apply_gravity_column(self, col):
+        """Fait tomber les pions d'une colonne après un retrait."""
+        new_col = [p for p in self._board[:, col] if p != 0]
+        padding = [0] * (self._height - len(new_col))
+        self._board[:, col] = np.array(padding + new_col)
+
+    def _remove_piece(self, r: int, c: int) -> None:
+        """Retire le pion en (r, c) puis applique la gravité sur la colonne."""
+        self._history.append(encode_kill(r, c))
+        if self._bits is not None:
+            self._bits.remove(r, c)
+            return
+        self._board[r, c] = 0
+        self._apply_gravity_column(c)
+
+    def _is_full(self) -> bool:
+        if self._bits is not None:
+            return self._bits.is_full()
+        return bool(np.all(self._board != 0))
+
     def verify_victory_condition(self):
         """Vérifie si le plateau contient un gagnant (scan global post-gravité)."""
         has_p1_won = False
         has_p2_won = False
 
-        for r in range(self._height):
-            for c in range(self._width):
-                p = self._board[r, c]
-                if p != 0:
-                    if self.check_alignment(r, c, p, 4):
-                        if p == self._current_player: has_p1_won = True
-                        else: has_p2_won = True
-        
+        if self._bits is not None:
+            # Test en temps constant sur les masques
+            has_p1_won = self._bits.has_won(self._current_player)
+            has_p2_won = self._bits.has_won(-self._current_player)
+        else:
+            # Toutes les fenêtres de 4 cases testées en une passe NumPy
+            has_p1_won = bool(has_won(self._board, self._current_player)[0])
+            has_p2_won = bool(has_won(self._board, -self._current_player)[0])
+
         if has_p1_won and has_p2_won:
             self._draw = True
         elif has_p1_won:
@@ -124,39 +206,52 @@ class Gestionnaire(ABC):
         elif has_p2_won:
             self._victory = True
             self._current_player *= -1 
-        elif np.all(self._board != 0):
+        elif self._is_full():
             self._draw = True
 
-    def play_ai_turn(self):
-        """Orchestre le tour de l'IA avec gestion des stocks pour la V2."""
+    def compute_ai_move(self):
+        """
+        Interroge le moteur sans modifier l'état de la partie.
+        Peut être appelée hors du thread graphique ; renvoie None si l'IA n'a pas à jouer.
+        """
         # On s'assure que l'IA ne joue que si c'est le Joueur 1
         if self._current_player != 1:
-            return
+            return None
 
         if not self.ai_engine or self._victory or self._draw:
-            return
+            return None
 
-        # On prépare les données pour le C++ (Mode + Stocks)
-        mode_int = 0
-        stock_ai = 0
-        stock_human = 0
-
-        if isinstance(self, Variante_1): 
-            mode_int = 1
-        elif isinstance(self, Variante_2): 
-            mode_int = 2
-            stock_ai = self.p1_stock
-            stock_human = self.p2_stock
-
-        # On appelle le C++ avec la signature buffer
-        move_data = self.ai_engine.get_best_move(
-            self._board, 
-            self.difficulty, 
-            mode_int, 
-            p1_stock=stock_ai, 
-            p2_stock=stock_human
+        return self.request_engine_move(self.ai_engine, self.difficulty, self.time_budget)
+
+    def get_stocks(self, player: int) -> tuple:
+        """Stocks (joueur, adversaire) transmis au moteur. Aucun hors Variante 2."""
+        return 0, 0
+
+    def request_engine_move(self, engine, depth, time_ms=None) -> dict:
+        """
+        Demande au moteur le coup du joueur courant, quel qu'il soit.
+        Le moteur joue toujours les pions 1 : on lui présente le plateau vu du joueur courant.
+        """
+        player = self._current_player
+        own_stock, opp_stock = self.get_stocks(player)
+
+        # On appelle le C++ avec la signature buffer (sur une copie du plateau)
+        return engine.get_best_move(
+            self._board * player, 
+            depth, 
+            self.engine_mode, 
+            p1_stock=own_stock, 
+            p2_stock=opp_stock,
+            time_ms=time_ms
         )
-        
+
+    def apply_ai_move(self, move_data):
+        """Exécute pour le joueur courant le coup calculé par le moteur selon la variante active."""
+        if move_data is None:
+            return
+        if self._victory or self._draw:
+            return
+
         col = move_data['col']
         kill_target = move_data['kill']
 
@@ -169,6 +264,15 @@ class Gestionnaire(ABC):
              print(f"[IA] Coup Simple : Col {col}")
              self.play(col)
 
+    def cancel_ai_search(self):
+        """Abandonne une recherche en cours (ex : retour au menu pendant la réflexion)."""
+        if self.ai_engine:
+            self.ai_engine.stop_search()
+
+    def play_ai_turn(self):
+        """Orchestre le tour de l'IA avec gestion des stocks pour la V2."""
+        self.apply_ai_move(self.compute_ai_move())
+
     @abstractmethod
     def play(self, move):
         """Méthode principale appelée par le contrôleur."""
@@ -184,15 +288,13 @@ class ClassicGame(Gestionnaire):
         else:
             column = move    
         
-        row = self.get_top_row(column)
+        row = self._drop(column)
         if row == -1:
             raise InvalidMove("Colonne pleine")
-
-        self._board[row, column] = self._current_player
         
         if self.check_alignment(row, column, self._current_player, 4):
             self._victory = True
-        elif np.all(self._board != 0):
+        elif self._is_full():
             self._draw = True
         else:
             self._current_player *= -1
@@ -200,6 +302,7 @@ class ClassicGame(Gestionnaire):
 
 class Variante_1(Gestionnaire):
     name = "3 pour 1"
+    engine_mode = 1
 
     def get_info_status(self, player: int) -> str:
         """Guide le joueur pendant la phase de destruction."""
@@ -207,22 +310,15 @@ class Variante_1(Gestionnaire):
             return "Retirez un pion adverse"
         return None
 
-    def _apply_gravity_column(self, col):
-        new_col = [p for p in self._board[:, col] if p != 0]
-        padding = [0] * (self._height - len(new_col))
-        self._board[:, col] = np.array(padding + new_col)
-
     def play_ai_atomic_v1(self, col, kill_target):
         """L'IA joue et tue dans la même séquence (Spécifique V1)."""
-        row = self.get_top_row(col)
+        row = self._drop(col)
         if row == -1: return 
-        self._board[row, col] = self._current_player
 
         if kill_target:
             k_row, k_col = kill_target
             if self._board[k_row, k_col] != self._current_player and self._board[k_row, k_col] != 0:
-                self._board[k_row, k_col] = 0
-                self._apply_gravity_column(k_col)
+                self._remove_piece(k_row, k_col)
 
         self.verify_victory_condition()
         if not self._victory and not self._draw:
@@ -243,8 +339,7 @@ class Variante_1(Gestionnaire):
             if target_val == self._current_player:
                 raise InvalidMove("Vous ne pouvez pas détruire votre propre pion !")
 
-            self._board[click_r, click_c] = 0
-            self._apply_gravity_column(click_c)
+            self._remove_piece(click_r, click_c)
             
             self._event = False
             self.verify_victory_condition()
@@ -255,10 +350,8 @@ class Variante_1(Gestionnaire):
 
         # Phase de pose du pion
         col = click_c
-        row = self.get_top_row(col)
+        row = self._drop(col)
         if row == -1: raise InvalidMove("Colonne pleine")
-        
-        self._board[row, col] = self._current_player
 
         if self.check_alignment(row, col, self._current_player, 4):
             self._victory = True
@@ -269,15 +362,16 @@ class Variante_1(Gestionnaire):
             self._message_event = "BONUS ! Cliquez sur un pion ADVERSE pour le détruire."
             return
 
-        if np.all(self._board != 0): self._draw = True
+        if self._is_full(): self._draw = True
         else: self._current_player *= -1
 
 
 class Variante_2(Gestionnaire):
     name = "3 pour 1 v2"
+    engine_mode = 2
 
-    def __init__(self, mode_solo=False, difficulty=4):
-        super().__init__(mode_solo, difficulty)
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
         self.p1_stock = 0 # Stock Joueur IA/Rouge (1)
         self.p2_stock = 0 # Stock Joueur Humain/Jaune (-1)
 
@@ -286,27 +380,34 @@ class Variante_2(Gestionnaire):
         stock = self.p1_stock if player == 1 else self.p2_stock
         return f"Coups Spéciaux : {stock}"
 
-    def _apply_gravity_column(self, col):
-        """Identique à V1 : Gestion de la gravité."""
-        new_col = [p for p in self._board[:, col] if p != 0]
-        padding = [0] * (self._height - len(new_col))
-        self._board[:, col] = np.array(padding + new_col)
+    def get_stocks(self, player: int) -> tuple:
+        if player == 1:
+            return self.p1_stock, self.p2_stock
+        return self.p2_stock, self.p1_stock
+
+    def _add_stock(self, player: int, delta: int) -> None:
+        if player == 1: self.p1_stock += delta
+        else: self.p2_stock += delta
+        # Le gain de munition est noté sur la pose qui l'a rapporté
+        if delta > 0:
+            self._history[-1] |= STOCK_FLAG
 
     def play_ai_atomic_v2(self, col, kill_target):
         """
         L'IA choisit soit de poser (col != -1), soit de tuer (kill_target != None).
         Elle ne fait pas les deux en même temps dans cette variante.
         """
+        player = self._current_player
+
         # Cas 1 : Destruction (L'IA utilise son stock)
-        if kill_target and self.p1_stock > 0:
+        if kill_target and self.get_stocks(player)[0] > 0:
             k_row, k_col = kill_target
             target = self._board[k_row, k_col]
             
-            if target == -1: 
+            if target == -player: 
                 print(f"[IA-V2] Utilise un coup spécial en ({k_row}, {k_col})")
-                self._board[k_row, k_col] = 0
-                self._apply_gravity_column(k_col)
-                self.p1_stock -= 1
+                self._remove_piece(k_row, k_col)
+                self._add_stock(player, -1)
                 
                 self.verify_victory_condition()
                 if not self._victory and not self._draw:
@@ -315,16 +416,15 @@ class Variante_2(Gestionnaire):
         
         # Cas 2 : Pose (L'IA pose un pion, faute de kill ou par choix)
         final_col = col if col != -1 else 0 # Fallback sécurité
-        row = self.get_top_row(final_col)
+        row = self._drop(final_col)
         
         if row != -1:
-            self._board[row, final_col] = self._current_player
             
             # Gain de stock si alignement de 3 sans victoire
             if self.check_alignment(row, final_col, self._current_player, 3):
                 if not self.check_alignment(row, final_col, self._current_player, 4):
                     print("[IA-V2] Gagne +1 Stock")
-                    self.p1_stock += 1
+                    self._add_stock(player, 1)
 
         self.verify_victory_condition()
         if not self._victory and not self._draw:
@@ -355,11 +455,8 @@ class Variante_2(Gestionnaire):
             if current_stock <= 0:
                 raise InvalidMove("Pas de coup spécial en stock (Alignez 3 pour en gagner).")
 
-            self._board[click_r, click_c] = 0
-            self._apply_gravity_column(click_c)
-            
-            if self._current_player == 1: self.p1_stock -= 1
-            else: self.p2_stock -= 1
+            self._remove_piece(click_r, click_c)
+            self._add_stock(self._current_player, -1)
 
             self.verify_victory_condition()
             if not self._victory and not self._draw:
@@ -368,22 +465,19 @@ class Variante_2(Gestionnaire):
 
         # Option B : Pose (Clic sur Vide / Colonne)
         col = click_c
-        row = self.get_top_row(col)
+        row = self._drop(col)
         if row == -1: raise InvalidMove("Colonne pleine")
 
-        self._board[row, col] = self._current_player
-
         if self.check_alignment(row, col, self._current_player, 4):
             self._victory = True
             return
 
         # On ne gagne du stock que si on n'a pas gagné la partie
         if self.check_alignment(row, col, self._current_player, 3):
-            if self._current_player == 1: self.p1_stock += 1
-            else: self.p2_stock += 1
+            self._add_stock(self._current_player, 1)
             self._message_event = "Alignement de 3 ! +1 Coup Spécial."
         
-        if np.all(self._board != 0): self._draw = True
+        if self._is_full(): self._draw = True
         else: self._current_player *= -1
 
 variantes = [ClassicGame, Variante_1, Variante_2]
@@ -1,59 +1,222 @@
 import sys
 import numpy as np
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-                             QPushButton, QLabel, QMessageBox)
-from PyQt6.QtGui import QPainter, QColor, QBrush, QFont
-from PyQt6.QtCore import Qt, QRectF, pyqtSignal, QEventLoop, QTimer
+                             QPushButton, QLabel, QMessageBox, QStackedWidget)
+from PyQt6.QtGui import QPainter, QColor, QBrush, QFont, QPixmap
+from PyQt6.QtCore import Qt, QRect, QRectF, QPointF, pyqtSignal, QEventLoop, QTimer, QObject, QElapsedTimer
+from concurrent.futures import Future
 from typing import Optional
 
+# Couleurs des pions (Rouge / Jaune) et des cases vides
+PIECE_COLORS = {-1: "#e74c3c", 1: "#f1c40f"}
+EMPTY_COLOR = "#ecf0f1"
+BOARD_COLOR = "#34495e"
+
+GRAVITY = 80.0          # Accélération des pions qui tombent (cases / s²)
+DEFAULT_REFRESH = 60.0  # Fréquence d'animation si l'écran ne l'indique pas (Hz)
+
+
+class _FallingPiece:
+    """Pion en cours de chute dans une colonne (positions en lignes, -1 = au-dessus du plateau)."""
+    __slots__ = ("piece", "col", "row_from", "row_to", "row")
+
+    def __init__(self, piece: int, col: int, row_from: float, row_to: int):
+        self.piece = piece
+        self.col = col
+        self.row_from = row_from
+        self.row_to = row_to
+        self.row = row_from
+
+
 class BoardWidget(QWidget):
-    """Widget personnalisé pour le rendu graphique du plateau."""
+    """
+    Rendu du plateau en mode retenu : le widget garde sa copie du plateau et
+    n'invalide que les cases modifiées par set_board. Le plateau vide et les pions
+    sont rendus une fois dans des pixmaps (refaits au redimensionnement) ; les
+    poses et la gravité après un retrait sont animées à la fréquence de l'écran.
+    """
     cell_cliquee = pyqtSignal(int, int)  # Signal émettant (row, col) lors d'un clic
 
-    def __init__(self, board_ref):
+    def __init__(self, board=None):
         super().__init__()
-        self.board = board_ref
         self.setMinimumSize(400, 350)
-
-    def paintEvent(self, event):
-        if self.board is None: return
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-
-        # On calcule les dimensions dynamiques
+        self._cells = None
+        self._background = None
+        self._pieces = {}
+        self._falling = []
+        self._hidden = set()  # Cases d'arrivée des pions en chute (dessinées à l'atterrissage)
+        self._clock = QElapsedTimer()
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self._step_animation)
+        if board is not None:
+            self.set_board(board, animate=False)
+
+    @property
+    def board(self):
+        return self._cells
+
+    # ---------------------------------------------------------
+    # Géométrie
+    # ---------------------------------------------------------
+
+    def _geometry(self):
+        """(taille d'une case, décalage x, décalage y) pour la taille actuelle du widget."""
+        rows, cols = self._cells.shape
         w, h = self.width(), self.height()
-        rows, cols = self.board.shape
         size = min(w / cols, h / rows)
+        return size, (w - cols * size) / 2, (h - rows * size) / 2
+
+    def _cell_rect(self, row: float, col: int) -> QRect:
+        size, off_x, off_y = self._geometry()
+        return QRectF(off_x + col * size, off_y + row * size, size, size).toAlignedRect().adjusted(-1, -1, 1, 1)
+
+    # ---------------------------------------------------------
+    # Mise à jour
+    # ---------------------------------------------------------
+
+    def set_board(self, board: np.ndarray, animate: bool = True) -> None:
+        """Affiche un nouvel état : seules les cases qui ont changé sont redessinées."""
+        board = np.array(board, dtype=np.int8)
+        if self._cells is None or self._cells.shape != board.shape:
+            self._stop_animation()
+            self._cells = board
+            self._background = None
+            self.update()
+            return
+
+        changed = np.argwhere(board != self._cells)
+        if not len(changed):
+            return
+        old, self._cells = self._cells, board
+        self._stop_animation()
+
+        columns = sorted({int(c) for _, c in changed})
+        if animate:
+            for c in columns:
+                self._falling.extend(self._column_moves(old[:, c], board[:, c], c))
+        for r, c in changed:
+            self.update(self._cell_rect(r, c))
+        if self._falling:
+            self._hidden = {(int(f.row_to), f.col) for f in self._falling}
+            self._clock.start()
+            self._timer.start(max(1, int(1000 / self._refresh_rate())))
+
+    @staticmethod
+    def _column_moves(old_col, new_col, c: int) -> list:
+        """
+        Pions qui tombent dans une colonne : un pion posé (pile + 1) ou les pions
+        au-dessus d'un retrait (pile - 1). Tout autre changement est affiché sans animation.
+        """
+        rows = len(old_col)
+        old_stack = [int(p) for p in old_col[::-1] if p]
+        new_stack = [int(p) for p in new_col[::-1] if p]
+        if len(new_stack) == len(old_stack) + 1 and new_stack[:-1] == old_stack:
+            return [_FallingPiece(new_stack[-1], c, -1, rows - len(new_stack))]
+        if len(new_stack) == len(old_stack) - 1:
+            for k in range(len(old_stack)):
+                if old_stack[:k] + old_stack[k + 1:] == new_stack:
+                    # Les pions au-dessus du retrait descendent d'une ligne
+                    return [_FallingPiece(old_stack[i], c, rows - 1 - i, rows - i) for i in range(k + 1, len(old_stack))]
+        return []
+
+    def _refresh_rate(self) -> float:
+        screen = self.screen()
+        rate = screen.refreshRate() if screen is not None else 0
+        return rate if rate > 0 else DEFAULT_REFRESH
+
+    def _step_animation(self) -> None:
+        t = self._clock.elapsed() / 1000
+        for f in self._falling:
+            row = min(f.row_from + 0.5 * GRAVITY * t * t, f.row_to)
+            # Zone balayée depuis la dernière image (ancienne et nouvelle position)
+            self.update(self._cell_rect(f.row, f.col).united(self._cell_rect(row, f.col)))
+            f.row = row
+            if row >= f.row_to:
+                self._hidden.discard((f.row_to, f.col))
+        self._falling = [f for f in self._falling if f.row < f.row_to]
+        if not self._falling:
+            self._timer.stop()
+
+    def _stop_animation(self) -> None:
+        """Termine les chutes en cours (les pions sont dessinés à leur place)."""
+        for f in self._falling:
+            self.update(self._cell_rect(f.row, f.col))
+            self.update(self._cell_rect(f.row_to, f.col))
+        self._falling = []
+        self._hidden = set()
+        self._timer.stop()
+
+    # ---------------------------------------------------------
+    # Rendu
+    # ---------------------------------------------------------
+
+    def resizeEvent(self, event):
+        self._background = None
+        super().resizeEvent(event)
+
+    def _render_cache(self) -> None:
+        """Plateau vide et pions pré-rendus à la taille actuelle (antialiasing calculé une fois)."""
+        dpr = self.devicePixelRatioF()
+        size, off_x, off_y = self._geometry()
         radius = size * 0.8
-        off_x = (w - cols * size) / 2
-        off_y = (h - rows * size) / 2
+        rows, cols = self._cells.shape
 
-        painter.fillRect(self.rect(), QColor("#34495e"))
-
-        # On dessine les pions
+        self._background = QPixmap(int(self.width() * dpr), int(self.height() * dpr))
+        self._background.setDevicePixelRatio(dpr)
+        self._background.fill(QColor(BOARD_COLOR))
+        painter = QPainter(self._background)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QBrush(QColor(EMPTY_COLOR)))
         for r in range(rows):
             for c in range(cols):
-                val = self.board[r, c]
-                if val == -1: color = QColor("#e74c3c")   # Rouge
-                elif val == 1: color = QColor("#f1c40f") # Jaune
-                else: color = QColor("#ecf0f1")           # Vide
+                painter.drawEllipse(QRectF(off_x + c * size + (size - radius) / 2,
+                                           off_y + r * size + (size - radius) / 2, radius, radius))
+        painter.end()
+
+        side = max(1, int(size * dpr))
+        for piece, color in PIECE_COLORS.items():
+            pixmap = QPixmap(side, side)
+            pixmap.setDevicePixelRatio(dpr)
+            pixmap.fill(Qt.GlobalColor.transparent)
+            painter = QPainter(pixmap)
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(QBrush(QColor(color)))
+            painter.drawEllipse(QRectF((size - radius) / 2, (size - radius) / 2, radius, radius))
+            painter.end()
+            self._pieces[piece] = pixmap
 
-                x = off_x + c * size + (size - radius)/2
-                y = off_y + r * size + (size - radius)/2
+    def paintEvent(self, event):
+        if self._cells is None: return
+        if self._background is None or self._background.deviceIndependentSize().toSize() != self.size():
+            self._render_cache()
 
-                painter.setBrush(QBrush(color))
-                painter.setPen(Qt.PenStyle.NoPen)
-                painter.drawEllipse(QRectF(x, y, radius, radius))
+        # Qt limite le dessin à la zone invalidée : on ne parcourt que les cases qui la touchent
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self._background)
+
+        size, off_x, off_y = self._geometry()
+        rows, cols = self._cells.shape
+        area = event.rect()
+        c0 = max(0, int((area.left() - off_x) // size))
+        c1 = min(cols - 1, int((area.right() - off_x) // size))
+        r0 = max(0, int((area.top() - off_y) // size))
+        r1 = min(rows - 1, int((area.bottom() - off_y) // size))
+        for r in range(r0, r1 + 1):
+            for c in range(c0, c1 + 1):
+                piece = int(self._cells[r, c])
+                if piece and (r, c) not in self._hidden:
+                    painter.drawPixmap(QPointF(off_x + c * size, off_y + r * size), self._pieces[piece])
+
+        for f in self._falling:
+            painter.drawPixmap(QPointF(off_x + f.col * size, off_y + f.row * size), self._pieces[f.piece])
 
     def mousePressEvent(self, event):
-        if event.button() == Qt.MouseButton.LeftButton:
+        if event.button() == Qt.MouseButton.LeftButton and self._cells is not None:
             # On convertit les coordonnées Pixel -> Indices Grille
-            w, h = self.width(), self.height()
-            rows, cols = self.board.shape
-            size = min(w / cols, h / rows)
-            
-            off_x = (w - cols * size) / 2
-            off_y = (h - rows * size) / 2
+            rows, cols = self._cells.shape
+            size, off_x, off_y = self._geometry()
 
             x_click = event.position().x() - off_x
             y_click = event.position().y() - off_y
@@ -65,6 +228,11 @@ class BoardWidget(QWidget):
                 self.cell_cliquee.emit(row, col)
 
 
+class _AIBridge(QObject):
+    """Relaie la fin d'un calcul de l'IA (thread de travail) vers le thread graphique."""
+    termine = pyqtSignal(object)
+
+
 class Interface:
     """Gère la fenêtre principale et la synchronisation avec le Contrôleur."""
     def __init__(self):
@@ -75,9 +243,14 @@ class Interface:
         self.window.resize(600, 650)
         self.window.setStyleSheet("background-color: #2c3e50;")
 
-        self.central_widget = QWidget()
+        # Deux pages : les menus (reconstruits à chaque choix) et la partie (créée une
+        # fois puis mise à jour sur place, sans détruire ni recréer de widget)
+        self.central_widget = QStackedWidget()
         self.window.setCentralWidget(self.central_widget)
-        self.layout = QVBoxLayout(self.central_widget)
+        self.menu_page = QWidget()
+        self.layout = QVBoxLayout(self.menu_page)
+        self.central_widget.addWidget(self.menu_page)
+        self._build_game_page()
 
         self.window.show()
 
@@ -87,8 +260,15 @@ class Interface:
         self._running = True
         self.app.aboutToQuit.connect(self._on_quit)
 
+        # Recherche de l'IA en attente (calculée dans un thread de travail)
+        self._ai_bridge = _AIBridge()
+        self._ai_bridge.termine.connect(self._check_ai)
+        self._pending_ai = None
+        self._ai_delay_done = False
+
     def _on_quit(self):
         self._running = False
+        self._pending_ai = None
         if self.loop.isRunning():
             self.result = None
             self.loop.quit()
@@ -109,10 +289,79 @@ class Interface:
             item = self.layout.takeAt(0)
             if item.widget(): item.widget().deleteLater()
 
+    def _build_game_page(self) -> None:
+        """Page de partie : titre, barre d'info (stocks), plateau et bouton de retour."""
+        self.game_page = QWidget()
+        layout = QVBoxLayout(self.game_page)
+
+        self._title = QLabel()
+        self._title_color = None
+        self._title.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(self._title)
+
+        self._info_bar = QWidget()
+        info_layout = QHBoxLayout(self._info_bar)
+        info_layout.setContentsMargins(10, 0, 10, 0)
+
+        # Label Joueur 1 (Gauche - Rouge)
+        self._lbl_p1 = QLabel()
+        self._lbl_p1.setStyleSheet("color: #e74c3c; font-weight: bold; font-size: 14px;")
+        self._lbl_p1.setAlignment(Qt.AlignmentFlag.AlignLeft)
+        info_layout.addWidget(self._lbl_p1)
+
+        # Label Joueur 2 (Droite - Jaune)
+        self._lbl_p2 = QLabel()
+        self._lbl_p2.setStyleSheet("color: #f1c40f; font-weight: bold; font-size: 14px;")
+        self._lbl_p2.setAlignment(Qt.AlignmentFlag.AlignRight)
+        info_layout.addWidget(self._lbl_p2)
+        layout.addWidget(self._info_bar)
+
+        # Les clics ne sont transmis que pendant send_game (voir _on_cell)
+        self.board_widget = BoardWidget()
+        self.board_widget.cell_cliquee.connect(self._on_cell)
+        layout.addWidget(self.board_widget)
+        self._accept_clicks = False
+
+        self._back_button = QPushButton("Retour Menu")
+        self._back_button.setStyleSheet("background-color: #95a5a6; color: white;")
+        self._back_button.clicked.connect(self._on_back)
+        layout.addWidget(self._back_button)
+        self._back_action = None
+
+        self.central_widget.addWidget(self.game_page)
+
+    def _show_game(self, title: str, color: str, board: np.ndarray, p1_info: str, p2_info: str, back_action) -> None:
+        """Met à jour la page de partie sur place ; back_action=None masque le bouton de retour."""
+        self._title.setText(title)
+        if color != self._title_color:
+            self._title_color = color
+            self._title.setStyleSheet(f"color: {color}; font-size: 24px; font-weight: bold;")
+
+        self._info_bar.setVisible(bool(p1_info or p2_info))
+        self._lbl_p1.setText(p1_info or "")
+        self._lbl_p2.setText(p2_info or "")
+
+        self.board_widget.set_board(board)
+        self._back_action = back_action
+        self._back_button.setVisible(back_action is not None)
+        self._accept_clicks = False
+        self.central_widget.setCurrentWidget(self.game_page)
+
+    def _on_cell(self, row: int, col: int) -> None:
+        if self._accept_clicks:
+            self._accept_clicks = False
+            self._resume((row, col))
+
+    def _on_back(self) -> None:
+        if self._back_action is not None:
+            self._accept_clicks = False
+            self._back_action()
+
     def send_menu(self, title: str, options: list[str]) -> Optional[int]:
         """Affiche un menu de sélection."""
         if not self._running: return None
         self._clean_ui()
+        self.central_widget.setCurrentWidget(self.menu_page)
 
         lbl = QLabel(title)
         lbl.setStyleSheet("color: white; font-size: 20px; font-weight: bold;")
@@ -128,74 +377,65 @@ class Interface:
 
         return self._wait()
 
-    def _add_info_bar(self, p1_info: str, p2_info: str):
-        """Helper pour ajouter la barre d'info (stocks) si nécessaire."""
-        if p1_info or p2_info:
-            info_widget = QWidget()
-            info_layout = QHBoxLayout(info_widget)
-            info_layout.setContentsMargins(10, 0, 10, 0)
-
-            # Label Joueur 1 (Gauche - Rouge)
-            lbl_p1 = QLabel(p1_info if p1_info else "")
-            lbl_p1.setStyleSheet("color: #e74c3c; font-weight: bold; font-size: 14px;")
-            lbl_p1.setAlignment(Qt.AlignmentFlag.AlignLeft)
-            info_layout.addWidget(lbl_p1)
-
-            # Label Joueur 2 (Droite - Jaune)
-            lbl_p2 = QLabel(p2_info if p2_info else "")
-            lbl_p2.setStyleSheet("color: #f1c40f; font-weight: bold; font-size: 14px;")
-            lbl_p2.setAlignment(Qt.AlignmentFlag.AlignRight)
-            info_layout.addWidget(lbl_p2)
-
-            self.layout.addWidget(info_widget)
-
     def send_game(self, player: int, board: np.ndarray, p1_info: str = None, p2_info: str = None) -> Optional[tuple[int]]:
         """Affiche le plateau de jeu et attend une action utilisateur."""
         if not self._running: return None
-        self._clean_ui()
 
         nom, code_couleur = self._get_player_info(player)
-
-        lbl = QLabel(f"Au tour de : {nom}")
-        lbl.setStyleSheet(f"color: {code_couleur}; font-size: 24px; font-weight: bold;")
-        lbl.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.layout.addWidget(lbl)
-
-        # Ajout de la barre d'info si les arguments sont fournis
-        self._add_info_bar(p1_info, p2_info)
-
-        board_widget = BoardWidget(board)
-        board_widget.cell_cliquee.connect(lambda r, c: self._resume((r, c)))
-        
-        self.layout.addWidget(board_widget)
-
-        btn = QPushButton("Retour Menu")
-        btn.setStyleSheet("background-color: #95a5a6; color: white;")
-        btn.clicked.connect(lambda: self._resume(None))
-        self.layout.addWidget(btn)
+        self._show_game(f"Au tour de : {nom}", code_couleur, board, p1_info, p2_info,
+                        back_action=lambda: self._resume(None))
+        self._accept_clicks = True
 
         return self._wait()
 
     def refresh_only(self, player: int, board: np.ndarray, message: str = None, p1_info: str = None, p2_info: str = None) -> None:
         """Met à jour l'affichage sans attendre d'action."""
         if not self._running: return
-        self._clean_ui()
-       
-        nom, code_couleur = self._get_player_info(player)
 
+        nom, code_couleur = self._get_player_info(player)
         texte = message if message else f"Au tour de : {nom}"
+        self._show_game(texte, code_couleur, board, p1_info, p2_info, back_action=None)
 
-        lbl = QLabel(texte)
-        lbl.setStyleSheet(f"color: {code_couleur}; font-size: 24px; font-weight: bold;")
-        lbl.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.layout.addWidget(lbl)
+        QApplication.processEvents()
 
-        self._add_info_bar(p1_info, p2_info)
+    def wait_for_ai(self, player: int, board: np.ndarray, future: Future, p1_info: str = None,
+                    p2_info: str = None, min_delay: int = 700) -> Optional[Future]:
+        """
+        Affiche l'état "réflexion" pendant que l'IA calcule dans un autre thread.
+        Renvoie le Future terminé, ou None si l'utilisateur quitte la partie entre-temps.
+        Le délai minimal laisse le temps de voir le coup précédent.
+        """
+        if not self._running: return None
 
-        board_widget = BoardWidget(board)
-        self.layout.addWidget(board_widget)
+        _, code_couleur = self._get_player_info(player)
+        self._show_game("L'IA réfléchit...", code_couleur, board, p1_info, p2_info,
+                        back_action=self._cancel_ai)
 
-        QApplication.processEvents()
+        self._pending_ai = future
+        self._ai_delay_done = False
+        QTimer.singleShot(min_delay, lambda f=future: self._on_ai_delay(f))
+        # Le signal est émis depuis le thread de travail : livraison en file dans le thread graphique
+        future.add_done_callback(self._ai_bridge.termine.emit)
+
+        return self._wait()
+
+    def _on_ai_delay(self, future: Future) -> None:
+        if future is self._pending_ai:
+            self._ai_delay_done = True
+            self._check_ai(future)
+
+    def _check_ai(self, future: Future) -> None:
+        """Débloque le contrôleur quand le calcul est fini et le délai minimal écoulé."""
+        # Un calcul abandonné peut terminer plus tard : on l'ignore
+        if future is not self._pending_ai:
+            return
+        if self._ai_delay_done and future.done():
+            self._pending_ai = None
+            self._resume(future)
+
+    def _cancel_ai(self) -> None:
+        self._pending_ai = None
+        self._resume(None)
 
     def notify_victory(self, player: int) -> None:
         nom = "ROUGE" if player == -1 else "JAUNE"
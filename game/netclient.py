@@ -0,0 +1,133 @@
+"""
+Client du serveur de parties (game.server) et générateur de charge : N parties
+solo jouées en parallèle sur quelques connexions, coups humains aléatoires.
+
+    python -m game.netclient --port 4040 --games 1000 --connections 8 --depth 4
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+
+from game.server import DEFAULT_PORT, percentiles
+
+
+class ServerError(Exception):
+    """Réponse {"ok": false} du serveur."""
+
+
+class Client:
+    """Connexion au serveur : chaque requête porte un id, les réponses sont associées à leur requête."""
+
+    def __init__(self, reader, writer):
+        self._reader = reader
+        self._writer = writer
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._listener = asyncio.create_task(self._listen())
+
+    @classmethod
+    async def connect(cls, host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> "Client":
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def _listen(self):
+        try:
+            while line := await self._reader.readline():
+                response = json.loads(line)
+                future = self._pending.pop(response.get("id"), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Connexion fermée par le serveur"))
+
+    async def request(self, cmd: str, **fields) -> dict:
+        """Envoie une requête et attend sa réponse ; lève ServerError si elle est refusée."""
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        self._writer.write(json.dumps({"id": request_id, "cmd": cmd, **fields}).encode() + b"\n")
+        await self._writer.drain()
+        response = await future
+        if not response["ok"]:
+            raise ServerError(response["error"])
+        return response
+
+    async def close(self):
+        self._writer.close()
+        await self._writer.wait_closed()
+        self._listener.cancel()
+
+
+def random_move(state: dict, rng: random.Random):
+    """Coup humain aléatoire : un pion adverse pendant un retrait de la Variante 1, une colonne sinon."""
+    board = state["board"]
+    if state["event"]:
+        targets = [[r, c] for r, row in enumerate(board) for c, v in enumerate(row) if v == -state["player"]]
+        return rng.choice(targets)
+    return rng.choice([c for c in range(state["width"]) if board[0][c] == 0])
+
+
+async def play_random_game(client: Client, rng: random.Random, variant: int, depth: int, size=(7, 6)) -> dict:
+    """Une partie solo complète ; renvoie l'état final et les durées des requêtes de coups."""
+    state = (await client.request("new", variant=variant, solo=True, difficulty=depth,
+                                  width=size[0], height=size[1]))["state"]
+    latencies = []
+    while not (state["victory"] or state["draw"]):
+        start = time.perf_counter()
+        state = (await client.request("play", game=state["game"], move=random_move(state, rng)))["state"]
+        latencies.append(time.perf_counter() - start)
+    await client.request("close", game=state["game"])
+    return {"state": state, "latencies": latencies}
+
+
+async def _load(args):
+    clients = [await Client.connect(args.host, args.port) for _ in range(args.connections)]
+    slots = asyncio.Semaphore(args.concurrency)
+    latencies, errors = [], 0
+
+    async def one_game(i):
+        nonlocal errors
+        async with slots:
+            rng = random.Random(args.seed + i)
+            try:
+                result = await play_random_game(clients[i % len(clients)], rng, i % 3 if args.variant < 0 else args.variant,
+                                                args.depth)
+                latencies.extend(result["latencies"])
+            except ServerError:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one_game(i) for i in range(args.games)))
+    elapsed = time.perf_counter() - start
+
+    metrics = (await clients[0].request("metrics"))["metrics"]
+    for client in clients:
+        await client.close()
+
+    lat = percentiles(latencies)
+    print(f"{args.games} parties ({errors} refusées) en {elapsed:.1f} s : "
+          f"{args.games / elapsed:.1f} parties/s, {len(latencies) / elapsed:.0f} coups/s")
+    if lat:
+        print(f"Latence d'un coup (client) : p50 {lat['p50']:.1f} ms  p90 {lat['p90']:.1f} ms  "
+              f"p99 {lat['p99']:.1f} ms  max {lat['max']:.1f} ms")
+    print("Serveur :", json.dumps(metrics, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Client de charge pour game.server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--games", type=int, default=100, help="Nombre de parties à jouer")
+    parser.add_argument("--concurrency", type=int, default=1000, help="Parties simultanées")
+    parser.add_argument("--connections", type=int, default=4, help="Connexions TCP partagées par les parties")
+    parser.add_argument("--variant", type=int, default=-1, help="0, 1, 2 (défaut : en alternance)")
+    parser.add_argument("--depth", type=int, default=4, help="Profondeur de l'IA")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    asyncio.run(_load(args))
@@ -0,0 +1,175 @@
+"""
+Bibliothèque d'ouvertures : coups précalculés pour les premiers coups de chaque variante.
+
+Format du fichier (little-endian) :
+    en-tête  : magic "P4BK", version, mode, profondeur de recherche, nombre de coups (plies), N
+    clés     : N x uint64 triées (clé de position, cf. position_key)
+    coups    : N x 3 int8 (colonne, ligne du kill, colonne du kill ; -1 si absent)
+
+Le fichier est projeté en mémoire (memmap) : une recherche ne lit que les
+quelques pages visitées par la dichotomie.
+
+Génération :
+    python -m game.openingbook --mode 0 --plies 6 --depth 8
+"""
+import argparse
+import os
+import struct
+import numpy as np
+
+from game.bitboard import BitBoard
+
+MAGIC = b"P4BK"
+VERSION = 1
+HEADER = struct.Struct("<4sHHHHI")
+
+# Les bibliothèques ne couvrent que le plateau standard (clé de position sur 64 bits)
+BOOK_SHAPE = (6, 7)
+
+# Emplacement par défaut (chargé automatiquement par AIModel s'il existe)
+BOOK_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ai_engine", "books")
+
+
+def default_book_path(mode: int) -> str:
+    return os.path.join(BOOK_DIR, f"book_mode{mode}.bin")
+
+
+_bit_weights = {}
+
+
+def _weights(height: int, width: int) -> np.ndarray:
+    """Poids 2**bit de chaque case dans la disposition du BitBoard (mis en cache)."""
+    if (height, width) not in _bit_weights:
+        rows = np.arange(height)[:, None]
+        cols = np.arange(width)[None, :]
+        bits = cols * (height + 1) + (height - 1 - rows)
+        _bit_weights[(height, width)] = np.left_shift(np.uint64(1), bits.astype(np.uint64))
+    return _bit_weights[(height, width)]
+
+
+def position_key(board: np.ndarray, p1_stock: int = 0, p2_stock: int = 0) -> int:
+    """
+    Clé unique d'une position : clé du BitBoard (pions du joueur 1 + occupation + ligne
+    du bas) et stocks (7 bits chacun) au-dessus. Calcul vectorisé équivalent à BitBoard.key().
+    """
+    height, width = board.shape
+    weights = _weights(height, width)
+    bottom = sum(1 << (c * (height + 1)) for c in range(width))
+    key = int(weights[board == 1].sum()) + int(weights[board != 0].sum()) + bottom
+
+    shift = width * (height + 1)
+    return key | (min(p1_stock, 127) << shift) | (min(p2_stock, 127) << (shift + 7))
+
+
+class OpeningBook:
+    """Lecture d'une bibliothèque d'ouvertures projetée en mémoire."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            magic, version, mode, depth, plies, count = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Fichier de bibliothèque invalide : {path}")
+
+        self.path = path
+        self.mode = mode
+        self.depth = depth
+        self.plies = plies
+        self.size = count
+
+        if count:
+            self._keys = np.memmap(path, dtype="<u8", mode="r", offset=HEADER.size, shape=(count,))
+            self._moves = np.memmap(path, dtype=np.int8, mode="r",
+                                    offset=HEADER.size + 8 * count, shape=(count, 3))
+        else:
+            self._keys = np.zeros(0, dtype="<u8")
+            self._moves = np.zeros((0, 3), dtype=np.int8)
+
+    def lookup(self, board: np.ndarray, p1_stock: int = 0, p2_stock: int = 0):
+        """Renvoie le coup mémorisé ({"col", "kill"}) ou None si la position est absente."""
+        # Au-delà de l'ouverture (ou sur un autre plateau), inutile de calculer la clé
+        if board.shape != BOOK_SHAPE or np.count_nonzero(board) > self.plies or self.size == 0:
+            return None
+
+        key = np.uint64(position_key(board, p1_stock, p2_stock))
+        idx = int(np.searchsorted(self._keys, key))
+        if idx >= self.size or self._keys[idx] != key:
+            return None
+
+        col, kill_row, kill_col = (int(v) for v in self._moves[idx])
+        return {"col": col, "kill": (kill_row, kill_col) if kill_row != -1 else None}
+
+
+def enumerate_positions(mode: int, plies: int, width: int = 7, height: int = 6) -> list:
+    """
+    Énumère les positions d'ouverture où le joueur 1 (IA) a le trait, pour les deux
+    ordres de jeu possibles. On s'arrête sur les branches où un alignement de 3
+    déclenche une règle de variante (kill en V1, stock en V2) : ces positions sont
+    laissées au moteur.
+    """
+    positions = {}
+
+    for starter in (-1, 1):
+        frontier = {BitBoard(width, height).key(): (BitBoard(width, height), starter)}
+        for ply in range(plies + 1):
+            next_frontier = {}
+            for key, (bb, player) in frontier.items():
+                if player == 1:
+                    positions[key] = bb.array.copy()
+                if ply == plies:
+                    continue
+
+                for col in range(width):
+                    child = BitBoard.from_array(bb.array)
+                    row = child.drop(col, player)
+                    if row == -1:
+                        continue
+                    if child.has_won(player):
+                        continue
+                    if mode != 0 and child.check_alignment(row, col, player, 3):
+                        continue
+                    next_frontier.setdefault(child.key(), (child, -player))
+            frontier = next_frontier
+
+    return list(positions.values())
+
+
+def build_opening_book(path: str, mode: int, plies: int, depth: int, ai=None) -> int:
+    """Calcule et écrit la bibliothèque ; renvoie le nombre de positions stockées."""
+    if ai is None:
+        from game.calculateur import AIModel
+        ai = AIModel()
+
+    boards = enumerate_positions(mode, plies)
+    if boards:
+        cols, kills, _ = ai.get_best_moves_batch(np.array(boards), depth=depth, mode=mode)
+    else:
+        cols = kills = np.zeros(0, dtype=np.int32)
+
+    keys = np.array([position_key(b) for b in boards], dtype="<u8")
+    moves = np.zeros((len(boards), 3), dtype=np.int8)
+    if len(boards):
+        moves[:, 0] = cols
+        moves[:, 1:] = kills
+
+    order = np.argsort(keys, kind="stable")
+    keys, moves = keys[order], moves[order]
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, mode, depth, plies, len(keys)))
+        f.write(keys.tobytes())
+        f.write(moves.tobytes())
+    return len(keys)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Génère une bibliothèque d'ouvertures.")
+    parser.add_argument("--mode", type=int, default=0, choices=[0, 1, 2], help="Variante (0, 1 ou 2)")
+    parser.add_argument("--plies", type=int, default=6, help="Nombre de coups couverts")
+    parser.add_argument("--depth", type=int, default=8, help="Profondeur de recherche par position")
+    parser.add_argument("--out", default=None, help="Fichier de sortie")
+    args = parser.parse_args()
+
+    out = args.out or default_book_path(args.mode)
+    n = build_opening_book(out, args.mode, args.plies, args.depth)
+    print(f"{n} positions écrites dans {out}")
@@ -0,0 +1,630 @@
+"""
+Moteur de secours en Python pur, utilisé quand la librairie C++ est absente
+(compilation échouée, plateforme non prise en charge) ou sur demande.
+
+Même contrat que AIModel (get_best_move, stop_search, perft...) et mêmes règles
+et heuristique que ai_core.cpp : générateurs de coups identiques, scores de
+fenêtres tenus à jour à chaque pose. La recherche est un negamax alpha-bêta
+avec approfondissement itératif, table de transposition indexée par les deux
+masques de bits du plateau et coups meurtriers (killers).
+
+Toutes les tailles de plateau sont acceptées : les tables (fenêtres, ordre des
+colonnes, cases centrales) sont calculées une fois par taille (voir geometry).
+
+Choisi automatiquement par get_engine si la librairie manque, ou imposé avec
+P4_ENGINE=python. Mesure : python -m game.benchmark --engine python
+"""
+import time
+import numpy as np
+
+from game.calculateur import BaseEngine, batch_outputs, check_depth
+from game.evaluation import window_indices, center_columns, WINDOW_SCORES, SCORE_WIN, SCORE_STOCK_UNIT, CENTER_BONUS
+
+WIN_VALUE = SCORE_WIN * 10
+INFINITY = 1 << 30
+MAX_SEARCH_DEPTH = 64
+TT_DEFAULT_ENTRIES = 1 << 20
+CHECK_EVERY = 1024  # Noeuds entre deux vérifications du temps et de l'arrêt
+
+_SCORE = WINDOW_SCORES.tolist()
+
+
+def column_order(width: int) -> tuple:
+    """Colonnes du centre vers l'extérieur, la gauche d'abord (même ordre que le moteur natif)."""
+    return tuple(sorted(range(width), key=lambda c: (abs(2 * c - (width - 1)), c)))
+
+
+class Geometry:
+    """Tables d'une taille de plateau : fenêtres de chaque case, ordre des colonnes, cases centrales."""
+    __slots__ = ("rows", "cols", "n_cells", "order", "n_windows", "of_cell", "center")
+
+    def __init__(self, rows: int, cols: int):
+        self.rows = rows
+        self.cols = cols
+        self.n_cells = rows * cols
+        self.order = column_order(cols)
+        windows = window_indices(rows, cols).tolist()
+        self.n_windows = len(windows)
+        self.of_cell = [tuple(w for w, cells in enumerate(windows) if idx in cells) for idx in range(self.n_cells)]
+        centers = center_columns(cols)
+        self.center = [idx % cols in centers for idx in range(self.n_cells)]
+
+
+_geometries = {}
+
+
+def geometry(rows: int = 6, cols: int = 7) -> Geometry:
+    """Tables du plateau rows x cols (calculées au premier appel)."""
+    if (rows, cols) not in _geometries:
+        _geometries[rows, cols] = Geometry(rows, cols)
+    return _geometries[rows, cols]
+
+
+class SearchAborted(Exception):
+    """Budget de temps écoulé ou stop_search : la recherche en cours est abandonnée."""
+
+
+class Position:
+    """
+    Plateau vu de l'IA (1) : cases, hauteurs, masques de bits de chaque joueur
+    (bit i = case i) et contenu de chaque fenêtre de 4, mis à jour à chaque pose ou retrait.
+    """
+    __slots__ = ("geo", "cells", "heights", "ai_bits", "opp_bits", "ai_count", "opp_count",
+                 "score", "ai_wins", "player_wins", "p1_stock", "p2_stock")
+
+    def __init__(self, board=None, p1_stock=0, p2_stock=0, shape=(6, 7)):
+        if board is not None:
+            board = np.asarray(board)
+            shape = board.shape
+        geo = self.geo = geometry(*shape)
+        self.cells = [0] * geo.n_cells
+        self.heights = [0] * geo.cols
+        self.ai_bits = 0
+        self.opp_bits = 0
+        self.ai_count = [0] * geo.n_windows
+        self.opp_count = [0] * geo.n_windows
+        self.score = 0
+        self.ai_wins = 0
+        self.player_wins = 0
+        self.p1_stock = int(p1_stock)
+        self.p2_stock = int(p2_stock)
+        if board is not None:
+            rows, cols = geo.rows, geo.cols
+            for idx, piece in enumerate(board.reshape(-1).tolist()):
+                if piece:
+                    self.place(idx, 1 if piece > 0 else -1)
+            for c in range(cols):
+                h = 0
+                while h < rows and self.cells[(rows - 1 - h) * cols + c]:
+                    h += 1
+                self.heights[c] = h
+
+    def key(self, player: int, mode: int) -> tuple:
+        # La table est partagée par toutes les recherches du moteur : la variante et la
+        # taille du plateau font partie de la clé (comme zobrist.mode côté C++)
+        return (self.ai_bits, self.opp_bits, self.p1_stock, self.p2_stock, player, mode, self.geo.rows, self.geo.cols)
+
+    def top_row(self, c: int) -> int:
+        h = self.heights[c]
+        rows = self.geo.rows
+        return rows - 1 - h if h < rows else -1
+
+    def has_won(self, player: int) -> bool:
+        return (self.ai_wins if player == 1 else self.player_wins) > 0
+
+    def completes_window(self, idx: int, player: int) -> bool:
+        own, opp = (self.ai_count, self.opp_count) if player == 1 else (self.opp_count, self.ai_count)
+        for w in self.geo.of_cell[idx]:
+            if own[w] == 3 and opp[w] == 0:
+                return True
+        return False
+
+    # Pose / retrait élémentaires (sans gravité)
+    def place(self, idx: int, piece: int) -> None:
+        of_cell = self.geo.of_cell[idx]
+        self.cells[idx] = piece
+        score = self.score
+        if piece == 1:
+            self.ai_bits |= 1 << idx
+            if self.geo.center[idx]:
+                score += CENTER_BONUS
+            ai_count, opp_count = self.ai_count, self.opp_count
+            for w in of_cell:
+                a, o = ai_count[w], opp_count[w]
+                score += _SCORE[a + 1][o] - _SCORE[a][o]
+                ai_count[w] = a + 1
+                if a == 3:
+                    self.ai_wins += 1
+        else:
+            self.opp_bits |= 1 << idx
+            ai_count, opp_count = self.ai_count, self.opp_count
+            for w in of_cell:
+                o = opp_count[w]
+                row = _SCORE[ai_count[w]]
+                score += row[o + 1] - row[o]
+                opp_count[w] = o + 1
+                if o == 3:
+                    self.player_wins += 1
+        self.score = score
+
+    def clear(self, idx: int) -> None:
+        of_cell = self.geo.of_cell[idx]
+        piece = self.cells[idx]
+        self.cells[idx] = 0
+        score = self.score
+        if piece == 1:
+            self.ai_bits &= ~(1 << idx)
+            if self.geo.center[idx]:
+                score -= CENTER_BONUS
+            ai_count, opp_count = self.ai_count, self.opp_count
+            for w in of_cell:
+                a, o = ai_count[w], opp_count[w]
+                score += _SCORE[a - 1][o] - _SCORE[a][o]
+                ai_count[w] = a - 1
+                if a == 4:
+                    self.ai_wins -= 1
+        else:
+            self.opp_bits &= ~(1 << idx)
+            ai_count, opp_count = self.ai_count, self.opp_count
+            for w in of_cell:
+                o = opp_count[w]
+                row = _SCORE[ai_count[w]]
+                score += row[o - 1] - row[o]
+                opp_count[w] = o - 1
+                if o == 4:
+                    self.player_wins -= 1
+        self.score = score
+
+    def drop(self, c: int, piece: int) -> int:
+        r = self.top_row(c)
+        if r == -1:
+            return -1
+        self.place(r * self.geo.cols + c, piece)
+        self.heights[c] += 1
+        return r
+
+    def undrop(self, c: int) -> None:
+        self.heights[c] -= 1
+        self.clear((self.geo.rows - 1 - self.heights[c]) * self.geo.cols + c)
+
+    def collapse(self, r: int, c: int) -> int:
+        """Retire le pion en (r, c), fait descendre ceux du dessus et renvoie le pion retiré."""
+        cols = self.geo.cols
+        piece = self.cells[r * cols + c]
+        self.clear(r * cols + c)
+        rr = r - 1
+        while rr >= 0 and self.cells[rr * cols + c]:
+            p = self.cells[rr * cols + c]
+            self.clear(rr * cols + c)
+            self.place((rr + 1) * cols + c, p)
+            rr -= 1
+        self.heights[c] -= 1
+        return piece
+
+    def uncollapse(self, r: int, c: int, piece: int) -> None:
+        cols = self.geo.cols
+        for rr in range(self.geo.rows - self.heights[c], r + 1):
+            p = self.cells[rr * cols + c]
+            self.clear(rr * cols + c)
+            self.place((rr - 1) * cols + c, p)
+        self.place(r * cols + c, piece)
+        self.heights[c] += 1
+
+
+# ---------------------------------------------------------
+# Règles (mêmes générateurs que ai_core.cpp)
+# ---------------------------------------------------------
+# Un coup est un triplet (colonne, ligne du kill, colonne du kill), -1 si absent.
+# make_move renvoie de quoi annuler le coup avec unmake_move.
+
+class ClassicRules:
+    def generate_moves(self, pos: Position, player: int) -> list:
+        cells = pos.cells
+        return [(c, -1, -1) for c in pos.geo.order if not cells[c]]
+
+    def make_move(self, pos: Position, move: tuple, player: int):
+        return pos.drop(move[0], player)
+
+    def unmake_move(self, pos: Position, move: tuple, player: int, undo) -> None:
+        if undo != -1:
+            pos.undrop(move[0])
+
+    def evaluate(self, pos: Position) -> int:
+        if pos.ai_wins:
+            return WIN_VALUE
+        if pos.player_wins:
+            return -WIN_VALUE
+        return pos.score
+
+    def is_game_over(self, pos: Position) -> bool:
+        return pos.ai_wins > 0 or pos.player_wins > 0
+
+
+class Variant1Rules(ClassicRules):
+    """Une pose qui aligne 3 pions oblige à retirer un pion adverse (coup composé)."""
+
+    @staticmethod
+    def forms_alignment_3(pos: Position, r: int, c: int, player: int) -> bool:
+        cells = pos.cells
+        rows, cols = pos.geo.rows, pos.geo.cols
+        for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+            count = 1
+            for sign in (-1, 1):
+                nr, nc = r + sign * dr, c + sign * dc
+                while 0 <= nr < rows and 0 <= nc < cols and cells[nr * cols + nc] == player:
+                    count += 1
+                    nr += sign * dr
+                    nc += sign * dc
+            if count >= 3:
+                return True
+        return False
+
+    def generate_moves(self, pos: Position, player: int) -> list:
+        opp = -player
+        cells = pos.cells
+        cols = pos.geo.cols
+        moves = []
+        for c in pos.geo.order:
+            r = pos.top_row(c)
+            if r == -1:
+                continue
+            # Une pose gagnante termine la partie : pas de retrait
+            if pos.completes_window(r * cols + c, player) or not self.forms_alignment_3(pos, r, c, player):
+                moves.append((c, -1, -1))
+                continue
+            # Seul le plus haut pion d'une série verticale adverse est retenu (même résultat après gravité)
+            before = len(moves)
+            for idx in range(pos.geo.n_cells):
+                if cells[idx] == opp and not (idx >= cols and cells[idx - cols] == opp):
+                    moves.append((c, idx // cols, idx % cols))
+            if len(moves) == before:
+                moves.append((c, -1, -1))
+        return moves
+
+    def make_move(self, pos: Position, move: tuple, player: int):
+        row = pos.drop(move[0], player)
+        killed = 0
+        if row != -1 and move[1] != -1:
+            killed = pos.collapse(move[1], move[2])
+        return row, killed
+
+    def unmake_move(self, pos: Position, move: tuple, player: int, undo) -> None:
+        row, killed = undo
+        if killed:
+            pos.uncollapse(move[1], move[2], killed)
+        if row != -1:
+            pos.undrop(move[0])
+
+    def evaluate(self, pos: Position) -> int:
+        # Un retrait peut compléter les deux alignements à la fois : partie nulle
+        if pos.ai_wins and pos.player_wins:
+            return 0
+        return super().evaluate(pos)
+
+
+class Variant2Rules(ClassicRules):
+    """Aligner 3 pions rapporte une munition ; une munition permet de retirer un pion adverse."""
+
+    @staticmethod
+    def causes_alignment_3(pos: Position, r: int, c: int, player: int) -> bool:
+        cells = pos.cells
+        rows, cols = pos.geo.rows, pos.geo.cols
+        count = 0
+        for i in range(max(0, c - 2), min(cols - 1, c + 2) + 1):
+            count = count + 1 if cells[r * cols + i] == player else 0
+            if count >= 3:
+                return True
+        count = 0
+        for i in range(max(0, r - 2), min(rows - 1, r + 2) + 1):
+            count = count + 1 if cells[i * cols + c] == player else 0
+            if count >= 3:
+                return True
+        return False
+
+    def generate_moves(self, pos: Position, player: int) -> list:
+        # Coup gagnant immédiat : joué seul
+        cols = pos.geo.cols
+        won = pos.has_won(player)
+        for c in range(cols):
+            r = pos.top_row(c)
+            if r != -1 and (won or pos.completes_window(r * cols + c, player)):
+                return [(c, -1, -1)]
+
+        cells = pos.cells
+        moves = [(c, -1, -1) for c in pos.geo.order if not cells[c]]
+        stock = pos.p1_stock if player == 1 else pos.p2_stock
+        if stock > 0:
+            opp = -player
+            moves.extend((-1, idx // cols, idx % cols) for idx in range(pos.geo.n_cells) if cells[idx] == opp)
+        return moves
+
+    def make_move(self, pos: Position, move: tuple, player: int):
+        stocks = (pos.p1_stock, pos.p2_stock)
+        col, kr, kc = move
+        if col != -1:
+            # Pose : la victoire prime sur le bonus d'alignement
+            r = pos.drop(col, player)
+            if r != -1 and not pos.has_won(player) and self.causes_alignment_3(pos, r, col, player):
+                if player == 1: pos.p1_stock += 1
+                else: pos.p2_stock += 1
+            return stocks + (r, 0)
+        if pos.cells[kr * pos.geo.cols + kc]:
+            # Destruction : coûte une munition
+            killed = pos.collapse(kr, kc)
+            if player == 1: pos.p1_stock -= 1
+            else: pos.p2_stock -= 1
+            return stocks + (-1, killed)
+        return stocks + (-1, 0)
+
+    def unmake_move(self, pos: Position, move: tuple, player: int, undo) -> None:
+        p1_stock, p2_stock, row, killed = undo
+        if row != -1:
+            pos.undrop(move[0])
+        elif killed:
+            pos.uncollapse(move[1], move[2], killed)
+        pos.p1_stock = p1_stock
+        pos.p2_stock = p2_stock
+
+    def evaluate(self, pos: Position) -> int:
+        # Un retrait peut compléter les deux alignements à la fois : partie nulle
+        if pos.ai_wins and pos.player_wins:
+            return 0
+        if pos.ai_wins:
+            return WIN_VALUE
+        if pos.player_wins:
+            return -WIN_VALUE
+        return pos.score + SCORE_STOCK_UNIT * (pos.p1_stock - pos.p2_stock)
+
+
+RULES = {0: ClassicRules(), 1: Variant1Rules(), 2: Variant2Rules()}
+
+
+# ---------------------------------------------------------
+# Recherche
+# ---------------------------------------------------------
+
+class _Search:
+    """État d'une recherche : compteurs, coups meurtriers, échéance et époque d'arrêt."""
+
+    def __init__(self, engine, mode: int, deadline=None):
+        self.engine = engine
+        self.mode = mode
+        self.rules = RULES[mode]
+        self.tt = engine._tt
+        self.epoch = engine._stop_epoch
+        self.deadline = deadline
+        self.killers = [[None, None] for _ in range(MAX_SEARCH_DEPTH + 2)]
+        self.nodes = 0
+        self.cutoffs = 0
+        self.tt_hits = 0
+        self.max_ply = 0
+
+    def check(self) -> None:
+        if self.engine._stop_epoch != self.epoch:
+            raise SearchAborted()
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            raise SearchAborted()
+
+    def order(self, moves: list, tt_move, ply: int) -> list:
+        """Coup de la table en premier, puis les coups meurtriers de ce niveau."""
+        front = [m for m in (tt_move, *self.killers[ply]) if m is not None and m in moves]
+        if not front:
+            return moves
+        front = list(dict.fromkeys(front))
+        return front + [m for m in moves if m not in front]
+
+    def negamax(self, pos: Position, depth: int, alpha: int, beta: int, player: int, ply: int) -> int:
+        """Valeur de la position pour le joueur au trait (player)."""
+        self.nodes += 1
+        if self.nodes % CHECK_EVERY == 0:
+            self.check()
+        if ply > self.max_ply:
+            self.max_ply = ply
+
+        rules = self.rules
+        if depth == 0 or rules.is_game_over(pos):
+            return player * rules.evaluate(pos)
+
+        key = pos.key(player, self.mode)
+        tt_move = None
+        entry = self.tt.get(key)
+        if entry is not None:
+            self.tt_hits += 1
+            e_depth, e_value, e_flag, tt_move = entry
+            if e_depth >= depth:
+                if e_flag == 0:
+                    return e_value
+                if e_flag > 0:
+                    alpha = max(alpha, e_value)
+                else:
+                    beta = min(beta, e_value)
+                if alpha >= beta:
+                    return e_value
+
+        # Drapeaux calculés sur la fenêtre effectivement cherchée (après resserrement par la table)
+        alpha_orig = alpha
+
+        moves = rules.generate_moves(pos, player)
+        if not moves:
+            return 0
+        moves = self.order(moves, tt_move, ply)
+
+        best = -INFINITY
+        best_move = moves[0]
+        for move in moves:
+            undo = rules.make_move(pos, move, player)
+            value = -self.negamax(pos, depth - 1, -beta, -alpha, -player, ply + 1)
+            rules.unmake_move(pos, move, player, undo)
+            if value > best:
+                best = value
+                best_move = move
+            if value > alpha:
+                alpha = value
+            if alpha >= beta:
+                self.cutoffs += 1
+                killers = self.killers[ply]
+                if killers[0] != move:
+                    killers[1] = killers[0]
+                    killers[0] = move
+                break
+
+        # Drapeau : 0 exact, 1 borne inférieure, -1 borne supérieure
+        flag = -1 if best <= alpha_orig else (1 if best >= beta else 0)
+        if len(self.tt) >= self.engine._tt_entries:
+            self.tt.clear()
+        self.tt[key] = (depth, best, flag, best_move)
+        return best
+
+    def root(self, pos: Position, depth: int, preferred=None) -> tuple:
+        """Renvoie (coup, valeur, forcé ?) pour l'IA au trait à profondeur fixe."""
+        rules = self.rules
+        moves = rules.generate_moves(pos, 1)
+        if not moves:
+            return (0, -1, -1), -INFINITY, False
+        if len(moves) == 1:
+            # Coup forcé : score statique de la position obtenue
+            undo = rules.make_move(pos, moves[0], 1)
+            value = rules.evaluate(pos)
+            rules.unmake_move(pos, moves[0], 1, undo)
+            return moves[0], value, True
+
+        if preferred is not None and preferred in moves:
+            moves.remove(preferred)
+            moves.insert(0, preferred)
+
+        # Victoire immédiate : jouée sans recherche
+        for move in moves:
+            undo = rules.make_move(pos, move, 1)
+            value = rules.evaluate(pos)
+            over = rules.is_game_over(pos)
+            rules.unmake_move(pos, move, 1, undo)
+            if over and value > 90000:
+                return move, value, True
+
+        best_move, best = moves[0], -INFINITY
+        for move in moves:
+            undo = rules.make_move(pos, move, 1)
+            value = -self.negamax(pos, depth - 1, -INFINITY, -best, -1, 1)
+            rules.unmake_move(pos, move, 1, undo)
+            if value > best:
+                best, best_move = value, move
+        return best_move, best, False
+
+
+class PythonEngine(BaseEngine):
+    """
+    Moteur de secours sans librairie native, même contrat que AIModel.
+    Les options du cache sont celles de BaseEngine ; tt_entries borne la table
+    de transposition (vidée lorsqu'elle est pleine).
+    """
+
+    def __init__(self, cache_entries=4096, cache_bytes=None, cache_path=None, tt_entries=TT_DEFAULT_ENTRIES):
+        self._tt = {}
+        self._tt_entries = tt_entries
+        self._stop_epoch = 0
+        super().__init__(cache_entries, cache_bytes, cache_path)
+
+    def stop_search(self) -> None:
+        """Demande l'arrêt des recherches en cours (depuis n'importe quel thread)."""
+        self._stop_epoch += 1
+
+    def reset_transposition_table(self, log2_entries: int = 0) -> None:
+        """Vide la table de transposition ; si log2_entries > 0, elle est bornée à 2**log2_entries entrées."""
+        self._tt = {}
+        if log2_entries > 0:
+            self._tt_entries = 1 << log2_entries
+
+    def warm_up(self, depth: int = 2) -> None:
+        """Recherche courte sur le plateau vide de chaque variante (tables précalculées)."""
+        super().warm_up(depth)
+
+    def perft(self, board, depth, mode, p1_stock=0, p2_stock=0) -> int:
+        """Nombre de feuilles de l'arbre des coups générés (IA au trait)."""
+        rules = RULES[mode]
+        pos = Position(board, p1_stock, p2_stock)
+
+        def count(depth, player):
+            if depth == 0:
+                return 1
+            if rules.is_game_over(pos):
+                return 0
+            moves = rules.generate_moves(pos, player)
+            if depth == 1:
+                return len(moves)
+            total = 0
+            for move in moves:
+                undo = rules.make_move(pos, move, player)
+                total += count(depth - 1, -player)
+                rules.unmake_move(pos, move, player, undo)
+            return total
+
+        return count(depth, 1)
+
+    def get_best_moves_batch(self, boards, stocks=None, depth=4, mode=0,
+                             out_cols=None, out_kills=None, out_scores=None):
+        """Même sortie que AIModel.get_best_moves_batch (recherche position par position)."""
+        check_depth(depth)
+        boards = np.asarray(boards)
+        n = boards.shape[0]
+        out_cols, out_kills, out_scores = batch_outputs(n, out_cols, out_kills, out_scores)
+
+        for i in range(n):
+            own, opp = stocks[i] if stocks is not None else (0, 0)
+            search = _Search(self, mode)
+            move, value, _ = search.root(Position(boards[i], own, opp), depth)
+            out_cols[i] = move[0]
+            out_kills[i] = move[1:]
+            out_scores[i] = value
+        return out_cols, out_kills, out_scores
+
+    def _search(self, board, depth, mode, p1_stock=0, p2_stock=0, time_ms=None) -> dict:
+        """
+        Approfondissement itératif jusqu'à depth, ou jusqu'à épuisement de time_ms.
+        Une itération interrompue est ignorée (sauf si aucune n'a abouti).
+        """
+        start = time.perf_counter()
+        deadline = start + time_ms / 1000 if time_ms is not None else None
+        search = _Search(self, mode, deadline)
+        root = Position(board, p1_stock, p2_stock)
+
+        if time_ms is None:
+            max_depth = depth
+        elif mode == 0:
+            # En Classique, au-delà du nombre de cases vides la recherche est exhaustive
+            max_depth = max(1, root.geo.n_cells - sum(root.heights))
+        else:
+            max_depth = MAX_SEARCH_DEPTH
+
+        best = ((0, -1, -1), -INFINITY, False)
+        completed = 0
+        aborted = False
+        for d in range(1, max(1, max_depth) + 1):
+            pos = Position(board, p1_stock, p2_stock)  # Une recherche abandonnée laisse pos incohérent
+            try:
+                result = search.root(pos, d, best[0] if completed else None)
+            except SearchAborted:
+                aborted = True
+                break
+            best, completed = result, d
+            if result[2]:
+                break
+
+        elapsed = time.perf_counter() - start
+        self._local.last_nodes = search.nodes
+        (col, kill_row, kill_col), value, _ = best
+        return {
+            "col": col,
+            "kill": (kill_row, kill_col) if kill_row != -1 else None,
+            "depth": completed,
+            "stats": {
+                "nodes": search.nodes,
+                "cutoffs": search.cutoffs,
+                "tt_hits": search.tt_hits,
+                "elapsed_us": int(elapsed * 1e6),
+                "max_depth": search.max_ply,
+                "best_score": value,
+                "kills_skipped": 0,
+                "aborted": int(aborted),
+            },
+        }
+
@@ -0,0 +1,237 @@
+"""
+Enregistrement des parties : format binaire compact, fichiers segmentés en ajout
+seul et relecture à travers les règles (ClassicGame, Variante_1, Variante_2).
+
+Un coup tient sur un octet :
+    pose     : 0b000s cccc   colonne c, s = 1 si le joueur gagne une munition (Variante 2)
+    retrait  : 0b1rrr cccc   pion retiré en (r, c) ; coûte une munition en Variante 2
+En Variante 1, la pose qui aligne 3 pions est suivie de l'octet du retrait.
+
+Une partie : en-tête (mode, largeur, hauteur, résultat, nombre de coups) puis un
+octet par coup. Un segment : en-tête de fichier "P4GR" puis les parties bout à bout ;
+un nouveau segment est ouvert quand le courant dépasse segment_bytes.
+
+    with RecordWriter("records") as writer:
+        writer.append(game_record(game))
+    for record in iter_records("records"):
+        final = replay(record)
+"""
+import glob
+import os
+import struct
+import threading
+
+MAGIC = b"P4GR"
+VERSION = 1
+FILE_HEADER = struct.Struct("<4sH")
+RECORD_HEADER = struct.Struct("<BBBbH")  # mode, largeur, hauteur, résultat, nombre de coups
+
+STOCK_FLAG = 0x10
+KILL_FLAG = 0x80
+RESULT_UNFINISHED = 2  # Résultat : 1 ou -1 (vainqueur), 0 (nulle), 2 (partie non terminée)
+
+SEGMENT_BYTES = 64 << 20
+SEGMENT_PATTERN = "games-{:05d}.p4r"
+
+# Emplacement par défaut (remplacé par la variable d'environnement P4_RECORDS)
+RECORD_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "records")
+
+
+class RecordError(ValueError):
+    """Enregistrement illisible ou incohérent avec les règles de sa variante."""
+
+
+def default_record_dir() -> str:
+    return os.environ.get("P4_RECORDS", RECORD_DIR)
+
+
+def encode_drop(col: int) -> int:
+    return col
+
+
+def encode_kill(row: int, col: int) -> int:
+    return KILL_FLAG | (row << 4) | col
+
+
+class GameRecord:
+    """Partie enregistrée : variante, dimensions, résultat et octets des coups."""
+    __slots__ = ("mode", "width", "height", "result", "plies")
+
+    def __init__(self, mode: int, width: int, height: int, result: int, plies: bytes):
+        self.mode = mode
+        self.width = width
+        self.height = height
+        self.result = result
+        self.plies = bytes(plies)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "GameRecord":
+        mode, width, height, result, n = RECORD_HEADER.unpack_from(data)
+        plies = data[RECORD_HEADER.size:RECORD_HEADER.size + n]
+        if len(plies) != n:
+            raise RecordError("Enregistrement tronqué")
+        return cls(mode, width, height, result, plies)
+
+    def to_bytes(self) -> bytes:
+        return RECORD_HEADER.pack(self.mode, self.width, self.height, self.result, len(self.plies)) + self.plies
+
+    def moves(self):
+        """Coups décodés : ("drop", colonne, munition gagnée ?) ou ("kill", ligne, colonne)."""
+        for byte in self.plies:
+            if byte & KILL_FLAG:
+                yield "kill", (byte >> 4) & 0x7, byte & 0xF
+            else:
+                yield "drop", byte & 0xF, bool(byte & STOCK_FLAG)
+
+
+def game_result(game) -> int:
+    """Résultat d'une partie (Gestionnaire) : vainqueur, 0 si nulle, RESULT_UNFINISHED sinon."""
+    if game.victory:
+        return game.current_player
+    return 0 if game.draw else RESULT_UNFINISHED
+
+
+def game_record(game) -> bytes:
+    """Enregistrement binaire d'une partie (Gestionnaire), terminée ou non."""
+    return GameRecord(game.engine_mode, game.width, game.height, game_result(game), game.history).to_bytes()
+
+
+# ---------------------------------------------------------
+# Fichiers segmentés
+# ---------------------------------------------------------
+
+class RecordWriter:
+    """
+    Ajoute des parties à la suite des segments d'un répertoire. Le dernier segment
+    est complété tant qu'il ne dépasse pas segment_bytes, puis un nouveau est créé.
+    """
+
+    def __init__(self, directory: str = None, segment_bytes: int = SEGMENT_BYTES):
+        self.directory = directory or default_record_dir()
+        self.segment_bytes = segment_bytes
+        self._file = None
+        self._lock = threading.Lock()
+        existing = segment_paths(self.directory) if os.path.isdir(self.directory) else []
+        self._index = len(existing) - 1 if existing else 0
+
+    def _open_segment(self):
+        os.makedirs(self.directory, exist_ok=True)
+        while True:
+            path = os.path.join(self.directory, SEGMENT_PATTERN.format(self._index))
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            if size < self.segment_bytes:
+                break
+            self._index += 1
+        self._file = open(path, "ab")
+        if size == 0:
+            self._file.write(FILE_HEADER.pack(MAGIC, VERSION))
+
+    def append(self, record: bytes) -> None:
+        with self._lock:
+            if self._file is None:
+                self._open_segment()
+            self._file.write(record)
+            if self._file.tell() >= self.segment_bytes:
+                self._file.close()
+                self._file = None
+                self._index += 1
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def segment_paths(path: str) -> list:
+    """Segments d'un répertoire dans l'ordre d'écriture (ou le fichier lui-même)."""
+    if os.path.isdir(path):
+        return sorted(glob.glob(os.path.join(path, SEGMENT_PATTERN.replace("{:05d}", "*"))))
+    return [path]
+
+
+def iter_records(path: str):
+    """
+    Lit les parties une à une (octets bruts, voir GameRecord.from_bytes) sans charger
+    les segments en mémoire. Une partie tronquée en fin de segment (écriture
+    interrompue) est ignorée.
+    """
+    for segment in segment_paths(path):
+        with open(segment, "rb") as f:
+            magic, version = FILE_HEADER.unpack(f.read(FILE_HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise RecordError(f"Segment invalide : {segment}")
+            while True:
+                header = f.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    break
+                n = RECORD_HEADER.unpack(header)[-1]
+                plies = f.read(n)
+                if len(plies) < n:
+                    break
+                yield header + plies
+
+
+# ---------------------------------------------------------
+# Relecture
+# ---------------------------------------------------------
+
+def new_game(record: GameRecord):
+    """Partie vide de la variante et des dimensions de l'enregistrement."""
+    # Import différé : gamemanager enregistre ses coups avec ce module
+    from game.gamemanager import variantes
+    try:
+        return variantes[record.mode](width=record.width, height=record.height)
+    except (IndexError, ValueError) as e:
+        raise RecordError(f"En-tête invalide : {e}")
+
+
+def iter_turns(record: GameRecord, game=None):
+    """
+    Rejoue la partie avec les règles de sa variante et renvoie la partie à chaque
+    début de tour (avant le coup, hors retrait de la Variante 1). Lève RecordError
+    si un coup est refusé ou si les munitions ou le résultat ne correspondent pas.
+    """
+    from game.gamemanager import InvalidMove
+
+    if game is None:
+        game = new_game(record)
+
+    for kind, a, b in record.moves():
+        if game.victory or game.draw:
+            raise RecordError("Coup joué après la fin de la partie")
+        if not game.event:
+            yield game
+        player = game.current_player
+        stock = game.get_stocks(player)[0]
+        try:
+            game.play((-1, a) if kind == "drop" else (a, b))
+        except (InvalidMove, IndexError) as e:
+            raise RecordError(f"Coup refusé : {e}")
+        if kind == "drop" and (game.get_stocks(player)[0] > stock) != b:
+            raise RecordError("Munition enregistrée incohérente")
+
+    result = game_result(game)
+    if record.result != RESULT_UNFINISHED and result != record.result:
+        raise RecordError(f"Résultat enregistré {record.result}, obtenu {result}")
+
+
+def replay(record):
+    """Rejoue une partie (GameRecord ou octets) et renvoie le Gestionnaire final."""
+    if not isinstance(record, GameRecord):
+        record = GameRecord.from_bytes(record)
+    game = new_game(record)
+    for _ in iter_turns(record, game):
+        pass
+    return game
@@ -0,0 +1,146 @@
+"""
+Cache des résultats du moteur entre deux appels (revanches, parties rejouées, analyses).
+
+Les positions sont rangées sous forme canonique : un plateau et son symétrique
+gauche-droite partagent la même entrée, et le coup mémorisé est retourné en miroir
+à la lecture si besoin. Les règles des trois variantes sont symétriques.
+"""
+import os
+import pickle
+import threading
+from collections import OrderedDict
+import numpy as np
+
+# Modes dont les règles sont invariantes par symétrie gauche-droite
+MIRROR_MODES = (0, 1, 2)
+
+# Coût fixe estimé d'une entrée (tuple, dictionnaire, chaînage de l'OrderedDict)
+ENTRY_OVERHEAD = 200
+
+
+def canonical_board(board: np.ndarray, mode: int) -> tuple:
+    """Renvoie (octets du plateau canonique, miroir appliqué ?)."""
+    cells = np.ascontiguousarray(board, dtype=np.int8)
+    if mode not in MIRROR_MODES:
+        return cells.tobytes(), False
+    direct = cells.tobytes()
+    mirrored = np.ascontiguousarray(cells[:, ::-1]).tobytes()
+    if mirrored < direct:
+        return mirrored, True
+    return direct, False
+
+
+def mirror_move(col: int, kill, width: int) -> tuple:
+    """Symétrique d'un coup : la colonne -1 (retrait seul) reste inchangée."""
+    if col != -1:
+        col = width - 1 - col
+    if kill is not None:
+        kill = (kill[0], width - 1 - kill[1])
+    return col, kill
+
+
+class ResultCache:
+    """
+    Cache LRU (colonne, kill, profondeur) indexé par position canonique,
+    profondeur, mode, stocks et élagage des retraits (pruned : recherche approchée,
+    cf. AIModel.set_kill_pruning). Borné en nombre d'entrées et/ou en octets.
+    """
+
+    def __init__(self, max_entries: int = 4096, max_bytes: int = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()  # AIModel peut être appelé depuis plusieurs threads
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _cost(key) -> int:
+        return len(key[0]) + ENTRY_OVERHEAD
+
+    def lookup(self, board: np.ndarray, depth: int, mode: int, p1_stock: int = 0, p2_stock: int = 0,
+               pruned: bool = False):
+        """Renvoie le coup mémorisé ({"col", "kill", "depth"}) ou None."""
+        cells, mirrored = canonical_board(board, mode)
+        key = (cells, board.shape, depth, mode, p1_stock, p2_stock, pruned)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+        col, kill, reached = entry
+        if mirrored:
+            col, kill = mirror_move(col, kill, board.shape[1])
+        return {"col": col, "kill": kill, "depth": reached}
+
+    def store(self, board: np.ndarray, depth: int, mode: int, p1_stock: int, p2_stock: int, move: dict,
+              pruned: bool = False) -> None:
+        cells, mirrored = canonical_board(board, mode)
+        key = (cells, board.shape, depth, mode, p1_stock, p2_stock, pruned)
+        col, kill = move["col"], move["kill"]
+        if mirrored:
+            col, kill = mirror_move(col, kill, board.shape[1])
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            else:
+                self._bytes += self._cost(key)
+            self._entries[key] = (col, kill, move.get("depth", depth))
+            self._evict()
+
+    def _evict(self) -> None:
+        while self._entries and (
+            (self.max_entries is not None and len(self._entries) > self.max_entries)
+            or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            key, _ = self._entries.popitem(last=False)
+            self._bytes -= self._cost(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    # ---------------------------------------------------------
+    # Persistance
+    # ---------------------------------------------------------
+
+    def save(self, path: str) -> None:
+        """Écrit le cache sur disque (du plus ancien au plus récent)."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = path + ".tmp"
+        with self._lock:
+            items = list(self._entries.items())
+        with open(tmp, "wb") as f:
+            pickle.dump(items, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    def load(self, path: str) -> int:
+        """Recharge un cache sauvegardé ; renvoie le nombre d'entrées lues."""
+        with open(path, "rb") as f:
+            items = pickle.load(f)
+        with self._lock:
+            for key, value in items:
+                if key not in self._entries:
+                    self._bytes += self._cost(key)
+                self._entries[key] = value
+            self._evict()
+        return len(items)
@@ -0,0 +1,425 @@
+"""
+Serveur de parties sans interface : protocole JSON ligne par ligne sur TCP,
+des milliers de parties simultanées (ClassicGame, Variante_1, Variante_2) dans
+une seule boucle asyncio, et tours de l'IA confiés à un pool borné de processus
+moteurs.
+
+Chaque requête est un objet JSON sur une ligne ; la réponse reprend son "id"
+(facultatif) : une connexion peut envoyer plusieurs requêtes sans attendre.
+
+    {"id": 1, "cmd": "new", "variant": 2, "solo": true, "difficulty": 6, "width": 7, "height": 6}
+    {"id": 2, "cmd": "play", "game": 17, "move": 3}          colonne, ou [ligne, colonne] pour un retrait
+    {"id": 3, "cmd": "state", "game": 17}
+    {"id": 4, "cmd": "close", "game": 17}
+    {"id": 5, "cmd": "metrics"}                              ou {"cmd": "metrics", "game": 17}
+
+Contre-pression : au plus max_pending recherches en cours dans le pool ; au-delà,
+les tours de l'IA attendent, et une requête qui trouverait plus de max_queue
+recherches en attente est refusée ("busy"). Chaque connexion a au plus
+MAX_INFLIGHT requêtes en cours : au-delà, le serveur cesse de la lire.
+
+Niveau de l'IA ("difficulty") : profondeur de 1 à MAX_DEPTH, ou SOLVE_DEPTH (résolution
+exacte, bornée en temps) en Classique 7 x 6 ; "time" : budget par coup en ms, au plus
+MAX_TIME_MS. Un processus moteur ne s'interrompt pas : aucune recherche ne doit l'occuper
+indéfiniment.
+
+Les parties appartiennent à la connexion qui les a créées : elles sont libérées
+par "close" ou à la fermeture de cette connexion.
+
+    python -m game.server --port 4040 --workers 4
+    python -m game.netclient --port 4040 --games 1000     # client de charge
+"""
+import argparse
+import asyncio
+import contextlib
+import copy
+import itertools
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from game.calculateur import SOLVE_DEPTH
+from game.gamemanager import variantes, InvalidMove, BOARD_SIZES
+from game.records import RecordWriter, game_record
+
+DEFAULT_PORT = 4040
+MAX_INFLIGHT = 256       # Requêtes en cours par connexion
+LATENCY_WINDOW = 10000   # Derniers tours de l'IA retenus pour les percentiles du serveur
+GAME_LATENCY_WINDOW = 256
+MAX_DEPTH = 8            # Profondeur fixe maximale (niveau « Expert » de l'interface)
+MAX_TIME_MS = 10000      # Budget de temps maximal d'un coup de l'IA
+
+# Moteur du processus de travail (chargé une seule fois par processus)
+_worker_engine = None
+
+
+def _init_worker():
+    global _worker_engine
+    sys.stdout = open(os.devnull, "w")
+    from game.calculateur import get_engine
+    _worker_engine = get_engine()
+
+
+def _engine_move(board, depth, mode, own_stock, opp_stock, time_ms):
+    """Exécuté dans un processus du pool : renvoie (coup, durée de la recherche en s)."""
+    start = time.perf_counter()
+    move = _worker_engine.get_best_move(board, depth, mode, p1_stock=own_stock, p2_stock=opp_stock, time_ms=time_ms)
+    return move, time.perf_counter() - start
+
+
+def _ping():
+    return os.getpid()
+
+
+class ServerBusy(Exception):
+    """File d'attente du pool pleine : la requête est refusée."""
+
+
+def percentiles(samples) -> dict:
+    """p50 / p90 / p99 / max (ms) d'une série de durées en secondes."""
+    if not samples:
+        return {}
+    values = np.fromiter(samples, dtype=float) * 1000
+    return {
+        "p50": float(np.percentile(values, 50)),
+        "p90": float(np.percentile(values, 90)),
+        "p99": float(np.percentile(values, 99)),
+        "max": float(values.max()),
+    }
+
+
+class Session:
+    """Une partie hébergée : règles, options de l'IA et latences de ses tours."""
+
+    def __init__(self, game_id: int, game, solo: bool, difficulty: int, time_budget):
+        self.id = game_id
+        self.game = game
+        self.solo = solo
+        self.difficulty = difficulty
+        self.time_budget = time_budget
+        self.lock = asyncio.Lock()  # Les coups d'une même partie s'exécutent l'un après l'autre
+        self.latencies = deque(maxlen=GAME_LATENCY_WINDOW)
+        self.finished = False
+
+    def state(self) -> dict:
+        game = self.game
+        state = {
+            "game": self.id,
+            "variant": game.engine_mode,
+            "width": game.width,
+            "height": game.height,
+            "board": game.board.tolist(),
+            "player": game.current_player,
+            "victory": game.victory,
+            "draw": game.draw,
+            "event": game.event,
+        }
+        if game.victory:
+            state["winner"] = game.current_player
+        if game.event:
+            state["message"] = game.message_event
+        if hasattr(game, "p1_stock"):
+            state["stocks"] = [game.p1_stock, game.p2_stock]
+        return state
+
+
+class GameServer:
+    """
+    Parties, pool de moteurs et métriques. start() lance le pool et le serveur TCP,
+    handle_request traite une requête (utilisable sans réseau).
+    """
+
+    def __init__(self, workers: int = None, max_pending: int = None, max_queue: int = 1024, record_dir: str = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or 2 * self.workers
+        self.max_queue = max_queue
+        self.sessions = {}
+        self._ids = itertools.count(1)
+        self._pool = None
+        self._server = None
+        self._engine_slots = None
+        self._waiting = 0
+        self._records = RecordWriter(record_dir) if record_dir else None
+        self._devnull = open(os.devnull, "w")
+
+        # Métriques du serveur
+        self.started = time.monotonic()
+        self.connections = 0
+        self.counters = {"requests": 0, "errors": 0, "busy": 0, "games_started": 0, "games_finished": 0, "ai_moves": 0}
+        self.queue_latency = deque(maxlen=LATENCY_WINDOW)
+        self.engine_latency = deque(maxlen=LATENCY_WINDOW)
+        self.turn_latency = deque(maxlen=LATENCY_WINDOW)
+
+    # ---------------------------------------------------------
+    # Cycle de vie
+    # ---------------------------------------------------------
+
+    async def start(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT):
+        """Démarre le pool (moteurs chargés et préchauffés) puis écoute ; renvoie le port utilisé."""
+        loop = asyncio.get_running_loop()
+        self._engine_slots = asyncio.Semaphore(self.max_pending)
+        self._pool = ProcessPoolExecutor(self.workers, initializer=_init_worker)
+        await asyncio.gather(*(loop.run_in_executor(self._pool, _ping) for _ in range(self.workers)))
+
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+        if self._records is not None:
+            self._records.close()
+
+    # ---------------------------------------------------------
+    # Connexions
+    # ---------------------------------------------------------
+
+    async def _handle_connection(self, reader, writer):
+        self.connections += 1
+        inflight = asyncio.Semaphore(MAX_INFLIGHT)
+        tasks = set()
+        owned = set()  # Parties créées par cette connexion
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                # Plus de MAX_INFLIGHT requêtes en cours : on cesse de lire la connexion
+                await inflight.acquire()
+                task = asyncio.create_task(self._answer(line, writer, inflight, owned))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        except (ConnectionError, ValueError):  # ValueError : ligne trop longue
+            pass
+        finally:
+            self.connections -= 1
+            # Client parti : ses parties ne seront plus jouées
+            for game_id in owned:
+                self.sessions.pop(game_id, None)
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def _answer(self, line: bytes, writer, inflight, owned: set):
+        try:
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("Objet JSON attendu")
+            except ValueError as e:
+                request = {}
+                response = {"ok": False, "error": f"Requête invalide : {e}"}
+            else:
+                response = await self.handle_request(request, owned)
+            if "id" in request:
+                response["id"] = request["id"]
+            writer.write(json.dumps(response, separators=(",", ":")).encode() + b"\n")
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            inflight.release()
+
+    # ---------------------------------------------------------
+    # Requêtes
+    # ---------------------------------------------------------
+
+    async def handle_request(self, request: dict, owned: set = None) -> dict:
+        """owned : parties de la connexion, libérées à sa fermeture (None hors réseau)."""
+        self.counters["requests"] += 1
+        handler = self._handlers.get(request.get("cmd"))
+        try:
+            if handler is None:
+                raise ValueError(f"Commande inconnue : {request.get('cmd')}")
+            return {"ok": True, **await handler(self, request, owned)}
+        except ServerBusy:
+            self.counters["busy"] += 1
+            return {"ok": False, "error": "busy"}
+        except (InvalidMove, ValueError, KeyError, TypeError, IndexError) as e:
+            self.counters["errors"] += 1
+            return {"ok": False, "error": str(e) or type(e).__name__}
+
+    def _session(self, request: dict) -> Session:
+        session = self.sessions.get(request.get("game"))
+        if session is None:
+            raise KeyError(f"Partie inconnue : {request.get('game')}")
+        return session
+
+    async def _cmd_new(self, request: dict, owned: set) -> dict:
+        variant = int(request.get("variant", 0))
+        if not 0 <= variant < len(variantes):
+            raise ValueError(f"Variante inconnue : {variant}")
+        size = (int(request.get("width", 7)), int(request.get("height", 6)))
+        # Résolution exacte : Classique sur le plateau standard uniquement (comme dans l'interface)
+        solvable = variantes[variant].engine_mode == 0 and size == BOARD_SIZES[0]
+        difficulty = request.get("difficulty", 4)
+        if type(difficulty) is not int or not (1 <= difficulty <= MAX_DEPTH or (solvable and difficulty == SOLVE_DEPTH)):
+            raise ValueError(f"Difficulté invalide : {difficulty} (entier de 1 à {MAX_DEPTH}"
+                             + (f", ou {SOLVE_DEPTH})" if solvable else ")"))
+        time_budget = request.get("time")
+        if time_budget is not None and (type(time_budget) not in (int, float) or not 0 < time_budget <= MAX_TIME_MS):
+            raise ValueError(f"Temps de réflexion invalide : {time_budget} (ms, de 0 à {MAX_TIME_MS})")
+        game = variantes[variant](width=size[0], height=size[1])
+        session = Session(next(self._ids), game, bool(request.get("solo", True)), difficulty, time_budget)
+        self.sessions[session.id] = session
+        if owned is not None:
+            owned.add(session.id)
+        self.counters["games_started"] += 1
+        return {"state": session.state()}
+
+    async def _cmd_play(self, request: dict, owned: set) -> dict:
+        session = self._session(request)
+        move = request["move"]
+        move = (int(move[0]), int(move[1])) if isinstance(move, list) else (-1, int(move))
+
+        async with session.lock:
+            game = session.game
+            if game.victory or game.draw:
+                raise InvalidMove("Partie terminée")
+            if session.solo and game.current_player == 1:
+                raise InvalidMove("C'est au tour de l'IA")
+            # Refus avant de jouer : le coup humain ne doit pas rester sans réponse de l'IA
+            if session.solo and self._waiting >= self.max_queue:
+                raise ServerBusy()
+            # Copie de la partie : si le tour de l'IA échoue, le coup humain est annulé
+            # (sinon la partie resterait bloquée sur le tour de l'IA)
+            before = copy.deepcopy(game) if session.solo else None
+            game.play(move)
+
+            response = {}
+            # Tour de l'IA (sauf pendant un retrait à choisir en Variante 1)
+            if session.solo and not (game.victory or game.draw or game.event) and game.current_player == 1:
+                try:
+                    ai_move = await self._ai_turn(session)
+                except BaseException:
+                    session.game = before
+                    raise
+                response["ai_move"] = {"col": ai_move["col"], "kill": ai_move["kill"], "depth": ai_move["depth"]}
+
+            self._check_finished(session)
+            response["state"] = session.state()
+            return response
+
+    async def _cmd_state(self, request: dict, owned: set) -> dict:
+        return {"state": self._session(request).state()}
+
+    async def _cmd_close(self, request: dict, owned: set) -> dict:
+        session = self._session(request)
+        del self.sessions[session.id]
+        if owned is not None:
+            owned.discard(session.id)
+        return {"game": session.id}
+
+    async def _cmd_metrics(self, request: dict, owned: set) -> dict:
+        if "game" in request:
+            session = self._session(request)
+            return {"game": session.id, "ai_moves": len(session.latencies), "latency_ms": percentiles(session.latencies)}
+        return {"metrics": self.metrics()}
+
+    _handlers = {
+        "new": _cmd_new,
+        "play": _cmd_play,
+        "state": _cmd_state,
+        "close": _cmd_close,
+        "metrics": _cmd_metrics,
+    }
+
+    # ---------------------------------------------------------
+    # Tours de l'IA
+    # ---------------------------------------------------------
+
+    async def _ai_turn(self, session: Session) -> dict:
+        """Envoie la position au pool (au plus max_pending recherches en cours) et joue le coup."""
+        game = session.game
+        player = game.current_player
+        own_stock, opp_stock = game.get_stocks(player)
+        board = game.board * player
+
+        queued = time.perf_counter()
+        self._waiting += 1
+        try:
+            await self._engine_slots.acquire()
+        finally:
+            self._waiting -= 1
+        try:
+            started = time.perf_counter()
+            loop = asyncio.get_running_loop()
+            move, engine_time = await loop.run_in_executor(
+                self._pool, _engine_move, board, session.difficulty, game.engine_mode,
+                own_stock, opp_stock, session.time_budget)
+        finally:
+            self._engine_slots.release()
+        total = time.perf_counter() - queued
+
+        # Les traces des variantes ([IA] ...) n'ont pas d'intérêt ici
+        with contextlib.redirect_stdout(self._devnull):
+            game.apply_ai_move(move)
+
+        self.counters["ai_moves"] += 1
+        self.queue_latency.append(started - queued)
+        self.engine_latency.append(engine_time)
+        self.turn_latency.append(total)
+        session.latencies.append(total)
+        return move
+
+    def _check_finished(self, session: Session) -> None:
+        game = session.game
+        if (game.victory or game.draw) and not session.finished:
+            session.finished = True
+            self.counters["games_finished"] += 1
+            if self._records is not None:
+                self._records.append(game_record(game))
+
+    def metrics(self) -> dict:
+        return {
+            "uptime_s": time.monotonic() - self.started,
+            "connections": self.connections,
+            "games_active": len(self.sessions),
+            **self.counters,
+            "workers": self.workers,
+            "engine_waiting": self._waiting,
+            "latency_ms": {
+                "queue": percentiles(self.queue_latency),
+                "engine": percentiles(self.engine_latency),
+                "turn": percentiles(self.turn_latency),
+            },
+        }
+
+
+async def _main(args):
+    server = GameServer(args.workers, args.max_pending, args.max_queue, args.record)
+    port = await server.start(args.host, args.port)
+    print(f"Serveur à l'écoute sur {args.host}:{port} ({server.workers} moteurs, "
+          f"{server.max_pending} recherches simultanées au plus)")
+    try:
+        await server.serve_forever()
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serveur de parties (JSON ligne par ligne sur TCP).")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=None, help="Processus moteurs (défaut : nb de coeurs)")
+    parser.add_argument("--max-pending", type=int, default=None, help="Recherches simultanées dans le pool")
+    parser.add_argument("--max-queue", type=int, default=1024, help="Tours de l'IA en attente avant refus")
+    parser.add_argument("--record", default=None, help="Répertoire où enregistrer les parties terminées")
+    args = parser.parse_args()
+
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(_main(args))
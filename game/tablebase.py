@@ -0,0 +1,292 @@
+"""
+Table de finales : résultats exacts des positions de fin de partie (au plus K cases
+vides), calculés hors ligne et consultés avant toute recherche.
+
+Format du fichier (little-endian), même principe que la bibliothèque d'ouvertures :
+    en-tête  : magic "P4TB", version, mode, K (cases vides au plus), profondeur de preuve, N
+    clés     : N x uint64 triées (clé de position avec stocks, cf. openingbook.position_key)
+    entrées  : N x 5 int8 (colonne, ligne du kill, colonne du kill, résultat, demi-coups)
+
+Le résultat (1, 0, -1) est vu du joueur au trait (pions 1) ; les demi-coups sont la
+durée de la fin de partie en jeu parfait, coup joué compris. Le fichier est projeté
+en mémoire : une consultation ne lit que les pages visitées par la dichotomie.
+
+Toutes les positions à K cases vides ne sont pas énumérables (leur nombre explose
+avec K) : les positions de départ sont celles des parties enregistrées (game.records)
+et de parties aléatoires, puis tout ce qui en découle tant qu'il reste au plus K
+cases vides. Classique : résolution exacte (AIModel.solve). Variantes : recherche
+complète du moteur jusqu'à la profondeur de preuve, seules les victoires et défaites
+prouvées sont gardées (une nulle n'est pas distinguable d'une évaluation).
+
+Génération :
+    python -m game.tablebase --mode 0 --empty 8 --games 500
+"""
+import argparse
+import copy
+import os
+import random
+import struct
+import time
+import numpy as np
+
+from game.openingbook import BOOK_DIR, BOOK_SHAPE, position_key
+from game.records import GameRecord, RecordError, iter_records, iter_turns, default_record_dir
+
+MAGIC = b"P4TB"
+VERSION = 1
+HEADER = struct.Struct("<4sHHHHI")
+
+DEFAULT_EMPTY = 8
+PROOF_DEPTH = 10         # Profondeur maximale des recherches de preuve (Variantes)
+VARIANT_HORIZON = 3      # Tours explorés après chaque position de départ (Variantes)
+MAX_POSITIONS = 1000000  # Borne du nombre de positions explorées par génération
+
+# Score du moteur à partir duquel une victoire est prouvée (SCORE_WIN * 10 côté C++)
+PROVEN_SCORE = 1000000
+
+
+def default_tablebase_path(mode: int) -> str:
+    return os.path.join(BOOK_DIR, f"endgame_mode{mode}.bin")
+
+
+class TableBase:
+    """Lecture d'une table de finales projetée en mémoire."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            magic, version, mode, max_empty, depth, count = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Fichier de table de finales invalide : {path}")
+
+        self.path = path
+        self.mode = mode
+        self.max_empty = max_empty
+        self.depth = depth
+        self.size = count
+
+        if count:
+            self._keys = np.memmap(path, dtype="<u8", mode="r", offset=HEADER.size, shape=(count,))
+            self._entries = np.memmap(path, dtype=np.int8, mode="r",
+                                      offset=HEADER.size + 8 * count, shape=(count, 5))
+        else:
+            self._keys = np.zeros(0, dtype="<u8")
+            self._entries = np.zeros((0, 5), dtype=np.int8)
+
+    def lookup(self, board: np.ndarray, p1_stock: int = 0, p2_stock: int = 0):
+        """Renvoie {"col", "kill", "result", "plies"} ou None si la position est absente."""
+        # Trop tôt dans la partie (ou autre plateau) : inutile de calculer la clé
+        if board.shape != BOOK_SHAPE or board.size - np.count_nonzero(board) > self.max_empty or self.size == 0:
+            return None
+
+        key = np.uint64(position_key(board, p1_stock, p2_stock))
+        idx = int(np.searchsorted(self._keys, key))
+        if idx >= self.size or self._keys[idx] != key:
+            return None
+
+        col, kill_row, kill_col, result, plies = (int(v) for v in self._entries[idx])
+        return {"col": col, "kill": (kill_row, kill_col) if kill_row != -1 else None,
+                "result": result, "plies": plies}
+
+
+# ---------------------------------------------------------
+# Positions de départ et expansion
+# ---------------------------------------------------------
+
+def _turn_position(game) -> tuple:
+    """Position vue du joueur au trait : (plateau, stock du joueur, stock adverse)."""
+    player = game.current_player
+    own, opp = game.get_stocks(player)
+    return game.board * player, own, opp
+
+
+def _empty_cells(game) -> int:
+    return game.board.size - np.count_nonzero(game.board)
+
+
+def legal_moves(game) -> list:
+    """Coups jouables selon les règles de la variante (format de Gestionnaire.play)."""
+    board = game.board
+    opponent = [(int(r), int(c)) for r, c in zip(*np.nonzero(board == -game.current_player))]
+    if game.event:
+        return opponent  # Variante 1 : retrait à choisir
+    moves = [(-1, c) for c in range(game.width) if board[0, c] == 0]
+    if game.engine_mode == 2 and game.get_stocks(game.current_player)[0] > 0:
+        moves += opponent
+    return moves
+
+
+def random_seeds(mode: int, games: int, max_empty: int, seed: int = 0):
+    """
+    Parties aléatoires de la variante : première position de chacune avec au plus
+    max_empty cases vides. Un coup qui termine la partie n'est joué que s'il n'y en a
+    pas d'autre (sinon presque aucune partie n'atteindrait la finale).
+    """
+    from game.gamemanager import variantes
+    rng = random.Random(seed)
+    for _ in range(games):
+        game = variantes[mode]()
+        while not (game.victory or game.draw):
+            if not game.event and _empty_cells(game) <= max_empty:
+                yield game
+                break
+            moves = legal_moves(game)
+            # Les retraits de la Variante 2 restent rares, comme en partie réelle
+            drops = [m for m in moves if m[0] == -1]
+            if drops and rng.random() < 0.9:
+                moves = drops
+            rng.shuffle(moves)
+            for move in moves:
+                child = copy.deepcopy(game)
+                child.play(move)
+                if not (child.victory or child.draw):
+                    break
+            game = child
+
+
+def record_seeds(path: str, mode: int, max_empty: int):
+    """Parties enregistrées de la variante (plateau standard) : première position de fin de partie."""
+    if not os.path.exists(path):
+        return
+    for data in iter_records(path):
+        try:
+            record = GameRecord.from_bytes(data)
+            if record.mode != mode or (record.height, record.width) != BOOK_SHAPE:
+                continue
+            for game in iter_turns(record):
+                if _empty_cells(game) <= max_empty:
+                    yield copy.deepcopy(game)
+                    break
+        except RecordError:
+            continue
+
+
+def expand_positions(seeds, max_empty: int, horizon: int = None, limit: int = MAX_POSITIONS) -> dict:
+    """
+    Positions de début de tour accessibles depuis les parties de départ en gardant au
+    plus max_empty cases vides, et au plus horizon tours après le départ (None : sans
+    limite ; nécessaire en variante, où les retraits rouvrent des cases).
+    Renvoie {clé: (plateau, stock, stock adverse)}.
+    """
+    positions = {}
+    visited = set()
+    stack = [(game, horizon) for game in seeds]
+    while stack and len(positions) < limit:
+        game, remaining = stack.pop()
+        if game.victory or game.draw or _empty_cells(game) > max_empty:
+            continue
+        if not game.event:
+            board, own, opp = _turn_position(game)
+            key = position_key(board, own, opp)
+            if key in visited:
+                continue
+            visited.add(key)
+            positions[key] = (board, own, opp)
+            if remaining is not None:
+                if remaining == 0:
+                    continue
+                remaining -= 1
+
+        for move in legal_moves(game):
+            child = copy.deepcopy(game)
+            child.play(move)
+            stack.append((child, remaining))
+    return positions
+
+
+# ---------------------------------------------------------
+# Résolution
+# ---------------------------------------------------------
+
+def solve_classic(ai, positions: dict) -> dict:
+    """Classique : résultats exacts du solveur (nulles comprises)."""
+    entries = {}
+    for key, (board, _, _) in positions.items():
+        solved = ai.solve(board)
+        if solved is not None:
+            entries[key] = (solved["col"], -1, -1, solved["result"], solved["plies"])
+    return entries
+
+
+def solve_variant(ai, positions: dict, mode: int, depth: int) -> dict:
+    """
+    Variantes : recherches complètes de profondeur croissante ; une position est gardée
+    dès que sa victoire ou sa défaite est prouvée (profondeur = durée de la fin de partie).
+    """
+    entries = {}
+    pending = list(positions)
+    for d in range(1, depth + 1):
+        if not pending:
+            break
+        boards = np.array([positions[k][0] for k in pending])
+        stocks = np.array([positions[k][1:] for k in pending], dtype=np.int32)
+        cols, kills, scores = ai.get_best_moves_batch(boards, stocks, depth=d, mode=mode)
+
+        still = []
+        for i, key in enumerate(pending):
+            if abs(int(scores[i])) >= PROVEN_SCORE:
+                entries[key] = (int(cols[i]), int(kills[i, 0]), int(kills[i, 1]), 1 if scores[i] > 0 else -1, d)
+            else:
+                still.append(key)
+        pending = still
+    return entries
+
+
+def write_tablebase(path: str, mode: int, max_empty: int, depth: int, entries: dict) -> int:
+    keys = np.fromiter(entries.keys(), dtype="<u8", count=len(entries))
+    values = np.array(list(entries.values()), dtype=np.int8).reshape(-1, 5)
+    order = np.argsort(keys, kind="stable")
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, mode, max_empty, depth, len(keys)))
+        f.write(keys[order].tobytes())
+        f.write(values[order].tobytes())
+    return len(keys)
+
+
+def build_tablebase(path: str, mode: int, max_empty: int = DEFAULT_EMPTY, games: int = 500,
+                    records: str = None, depth: int = PROOF_DEPTH, horizon: int = None,
+                    limit: int = MAX_POSITIONS, seed: int = 0, ai=None) -> dict:
+    """
+    Génère et écrit la table ; renvoie le nombre de parties de départ, de positions
+    explorées et de résultats stockés. horizon : par défaut sans limite en Classique,
+    VARIANT_HORIZON en variante.
+    """
+    if horizon is None and mode != 0:
+        horizon = VARIANT_HORIZON
+    if ai is None:
+        from game.calculateur import AIModel
+        ai = AIModel(cache_entries=0)
+
+    seeds = list(record_seeds(records or default_record_dir(), mode, max_empty))
+    seeds += random_seeds(mode, games, max_empty, seed)
+    positions = expand_positions(seeds, max_empty, horizon, limit)
+
+    if mode == 0:
+        entries = solve_classic(ai, positions)
+    else:
+        entries = solve_variant(ai, positions, mode, depth)
+    stored = write_tablebase(path, mode, max_empty, depth if mode else 0, entries)
+    return {"seeds": len(seeds), "positions": len(positions), "stored": stored}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Génère une table de finales.")
+    parser.add_argument("--mode", type=int, default=0, choices=[0, 1, 2], help="Variante (0, 1 ou 2)")
+    parser.add_argument("--empty", type=int, default=DEFAULT_EMPTY, help="Cases vides au plus (K)")
+    parser.add_argument("--games", type=int, default=500, help="Parties aléatoires de départ")
+    parser.add_argument("--records", default=None, help="Parties enregistrées de départ (défaut : P4_RECORDS ou records/)")
+    parser.add_argument("--depth", type=int, default=PROOF_DEPTH, help="Profondeur de preuve (Variantes)")
+    parser.add_argument("--horizon", type=int, default=None,
+                        help=f"Tours explorés après chaque départ (défaut : sans limite en Classique, {VARIANT_HORIZON} sinon)")
+    parser.add_argument("--limit", type=int, default=MAX_POSITIONS, help="Positions explorées au plus")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="Fichier de sortie")
+    args = parser.parse_args()
+
+    out = args.out or default_tablebase_path(args.mode)
+    start = time.perf_counter()
+    totals = build_tablebase(out, args.mode, args.empty, args.games, args.records, args.depth,
+                             args.horizon, args.limit, args.seed)
+    print(f"{totals['seeds']} parties de départ, {totals['positions']} positions, "
+          f"{totals['stored']} résultats écrits dans {out} ({time.perf_counter() - start:.1f} s)")
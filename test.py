@@ -1,6 +1,35 @@
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
 import unittest
 import numpy as np
-from game.gamemanager import ClassicGame, Variante_1, InvalidMove
+from game.gamemanager import ClassicGame, Variante_1, Variante_2, InvalidMove
+from game.resultcache import ResultCache
+from game.evaluation import evaluate, has_won
+from game.pyengine import PythonEngine
+from game.records import GameRecord, game_record, replay, RecordError
+from game.tablebase import TableBase, write_tablebase
+from game.openingbook import position_key
+
+
+def bare_engine(engine_class=PythonEngine):
+    """Moteur sans bibliothèque d'ouvertures, table de finales ni cache : résultats indépendants des fichiers locaux."""
+    engine = engine_class(cache_entries=0)
+    engine.books = {}
+    engine.tablebases = {}
+    return engine
+
+
+def native_engine():
+    """bare_engine du moteur C++ ; le test est sauté si la librairie n'est pas compilée."""
+    from game.calculateur import AIModel
+    try:
+        return bare_engine(AIModel)
+    except OSError:
+        raise unittest.SkipTest("Librairie C++ non compilée (ai_engine/build)")
 
 class TestClassicGame(unittest.TestCase):
     
@@ -95,5 +124,465 @@ class TestVariante1(unittest.TestCase):
         with self.assertRaises(InvalidMove):
             self.game.play((5, 0)) # Essaie de retirer son propre pion
 
+class TestBitBoard(unittest.TestCase):
+
+    def test_victoire_diagonale(self):
+        """Le backend bitboard détecte une diagonale comme le backend NumPy"""
+        coups = [0, 1, 1, 2, 2, 3, 2, 3, 3, 6, 3]
+        games = [ClassicGame(), ClassicGame(bitboard=True)]
+        for game in games:
+            for col in coups:
+                game.play(col)
+
+        self.assertTrue(games[1].victory)
+        self.assertTrue((games[0].board == games[1].board).all())
+        self.assertEqual(games[0].current_player, games[1].current_player)
+
+    def test_retrait_et_gravite(self):
+        """Le retrait d'un pion fait tomber la colonne dans la vue NumPy"""
+        game = Variante_2(bitboard=True)
+        game.p1_stock = 1
+        for col in [0, 0, 0]:
+            game.play(col)
+
+        # Le joueur 1 (au tour suivant) détruit le pion adverse du bas
+        game.play((5, 0))
+
+        self.assertEqual(list(game.board[:, 0]), [0, 0, 0, 0, -1, 1])
+        self.assertEqual(game.get_top_row(0), 3)
+        self.assertFalse(game.board.flags.writeable, "La vue doit être en lecture seule")
+
+
+
+class TestResultCache(unittest.TestCase):
+
+    def test_symetrie_et_lru(self):
+        """Le plateau miroir réutilise l'entrée (coup retourné) ; la plus ancienne est évincée"""
+        cache = ResultCache(max_entries=2)
+        board = np.zeros((6, 7), dtype=int)
+        board[5, 1] = 1
+        board[5, 0] = -1
+        cache.store(board, 4, 1, 0, 0, {"col": 2, "kill": (5, 0), "depth": 4})
+
+        move = cache.lookup(board[:, ::-1], 4, 1)
+        self.assertEqual((move["col"], move["kill"]), (4, (5, 6)))
+        self.assertIsNone(cache.lookup(board, 6, 1), "La profondeur fait partie de la clé")
+        self.assertIsNone(cache.lookup(board, 4, 1, pruned=True), "L'élagage des retraits fait partie de la clé")
+
+        for col in (3, 4):
+            other = np.zeros((6, 7), dtype=int)
+            other[5, col] = 1
+            cache.store(other, 4, 0, 0, 0, {"col": col, "kill": None, "depth": 4})
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.lookup(board, 4, 1))
+        self.assertEqual(cache.stats()["hits"], 1)
+
+
+class TestEvaluation(unittest.TestCase):
+
+    def test_scores_du_moteur(self):
+        """Fenêtres, bonus central, victoire et munitions sur une pile de plateaux"""
+        boards = np.zeros((2, 6, 7), dtype=int)
+        boards[:, 5, 2:5] = 1    # Trois pions IA en bas : 5 + 100 + 100 + 5, +3 au centre
+        boards[:, 4, 3] = -1
+        boards[1, 5, 5] = 1      # Quatrième pion : victoire
+
+        self.assertEqual(list(evaluate(boards)), [213, 1000000])
+        self.assertEqual(list(evaluate(boards, mode=2, p1_stock=2, p2_stock=0)), [313, 1000000])
+        self.assertEqual(list(has_won(boards, 1)), [False, True])
+
+    def test_double_alignement_variante_2(self):
+        """Variante 2 : un retrait qui complète les deux alignements est une nulle, pas une victoire"""
+        board = np.zeros((6, 7), dtype=int)
+        board[5] = [1, 1, 1, -1, 1, -1, 1]
+        board[4, 3:] = [1, -1, -1, -1]
+        board[3, 3] = -1
+        jeu = Variante_2()
+        jeu._board[:] = board
+        jeu._current_player = 1
+        jeu.p1_stock = 1
+        jeu.play((5, 3))                   # Le retrait fait tomber les pions des deux côtés
+        self.assertTrue(jeu.draw)
+        self.assertEqual(list(evaluate(jeu.board, mode=2)), [0])
+
+        engine = bare_engine()
+        move = engine.get_best_move(board, 1, 2, p1_stock=1)
+        self.assertLess(move["stats"]["best_score"], 1000000)
+
+
+class TestPythonEngine(unittest.TestCase):
+
+    def test_victoire_et_parade(self):
+        """Le moteur de secours gagne quand il le peut et bloque sinon"""
+        engine = bare_engine()
+        board = np.zeros((6, 7), dtype=int)
+        board[3:, 0] = 1
+        board[3:, 6] = -1
+        self.assertEqual(engine.get_best_move(board, 4, 0)["col"], 0)
+
+        board[3:, 0] = 0
+        board[5, 1:3] = 1
+        move = engine.get_best_move(board, 6, 0)
+        self.assertEqual(move["col"], 6)
+        self.assertEqual(engine.perft(np.zeros((6, 7)), 3, 0), 343)
+
+    def test_table_partagee_entre_variantes(self):
+        """Une recherche Classique ne fausse pas la recherche Variante 1 suivante sur le même moteur"""
+        board = np.array([[0, 0, 0, 0, 0, 0, 0],
+                          [0, 0, 0, 0, 0, 0, 0],
+                          [0, 0, 0, 1, 0, 0, 0],
+                          [0, 0, -1, 1, 0, 0, 1],
+                          [0, 0, -1, -1, 0, 0, -1],
+                          [1, 0, -1, -1, 1, 0, 1]])
+        engines = [bare_engine() for _ in range(2)]
+        engines[0].get_best_move(board, 6, 0)
+        apres, neuf = (engine.get_best_move(board, 5, 1) for engine in engines)
+        self.assertEqual((apres["col"], apres["kill"], apres["stats"]["best_score"]),
+                         (neuf["col"], neuf["kill"], neuf["stats"]["best_score"]))
+
+    def test_sorties_du_lot(self):
+        """Calcul par lot : profondeur et forme des sorties vérifiées, résultats écrits dans celles fournies"""
+        engine = bare_engine()
+        boards = np.zeros((3, 6, 7), dtype=int)
+        with self.assertRaises(ValueError):
+            engine.get_best_moves_batch(boards, depth=1, out_kills=np.empty(6, dtype=np.int32))
+        with self.assertRaises(ValueError):
+            engine.get_best_moves_batch(boards, depth=1, out_cols=np.empty(2, dtype=np.int32))
+        with self.assertRaises(ValueError):
+            engine.get_best_moves_batch(boards, depth=0)
+        with self.assertRaises(ValueError):
+            engine.get_best_move(boards[0], -1, 0)
+        cols = np.empty(3, dtype=np.int32)
+        self.assertIs(engine.get_best_moves_batch(boards, depth=1, out_cols=cols)[0], cols)
+        self.assertTrue(((cols >= 0) & (cols < 7)).all())
+
+
+    def test_moteur_partage(self):
+        """get_engine : le premier appel choisit le moteur, une demande contraire ensuite est refusée"""
+        import game.calculateur as calculateur
+        saved = calculateur._shared_engine
+        calculateur._shared_engine = None
+        try:
+            engine = calculateur.get_engine(warm_up=False, backend="python")
+            self.assertIs(calculateur.get_engine(warm_up=False, backend="auto"), engine)
+            with self.assertRaises(ValueError):
+                calculateur.get_engine(warm_up=False, backend="native")
+            with self.assertRaises(ValueError):
+                calculateur.get_engine(warm_up=False, backend="gpu")
+        finally:
+            calculateur._shared_engine = saved
+
+
+class TestPlateauAgrandi(unittest.TestCase):
+
+    def test_9x7(self):
+        """Un plateau 9 x 7 se joue de bout en bout ; les tailles non proposées sont refusées"""
+        with self.assertRaises(ValueError):
+            ClassicGame(width=10, height=10)
+
+        jeu = ClassicGame(width=9, height=7)
+        self.assertEqual(jeu.board.shape, (7, 9))
+        for col in [8, 0, 8, 0, 8, 0]:
+            jeu.play(col)
+        # Le moteur de secours trouve la victoire en colonne 8
+        engine = bare_engine()
+        self.assertEqual(engine.get_best_move(jeu.board * jeu.current_player, 4, 0)["col"], 8)
+        self.assertEqual(engine.perft(np.zeros((7, 9)), 2, 0), 81)
+
+        jeu.play(8)
+        self.assertTrue(jeu.victory)
+
+
+class TestEnregistrement(unittest.TestCase):
+
+    def test_relecture_variante_2(self):
+        """Une partie enregistrée (poses, munition, retrait) se rejoue à l'identique"""
+        jeu = Variante_2()
+        for col in [0, 6, 1, 6, 2]:
+            jeu.play(col)                  # Le joueur -1 aligne 3 pions : +1 munition
+        jeu.play(0)
+        jeu.play((5, 6))                   # Retrait avec la munition
+        data = game_record(jeu)
+        self.assertEqual(len(data), 6 + 7) # Un octet par coup
+
+        rejouee = replay(data)
+        np.testing.assert_array_equal(rejouee.board, jeu.board)
+        self.assertEqual((rejouee.p1_stock, rejouee.p2_stock), (jeu.p1_stock, jeu.p2_stock))
+
+        # Munition annoncée sans alignement : enregistrement refusé
+        record = GameRecord.from_bytes(data)
+        record.plies = bytes([record.plies[0] | 0x10]) + record.plies[1:]
+        with self.assertRaises(RecordError):
+            replay(record)
+
+
+class TestTableFinales(unittest.TestCase):
+
+    def test_consultation(self):
+        """Une position de la table est jouée sans recherche si la profondeur demandée voit la fin"""
+        board = np.zeros((6, 7), dtype=int)
+        board[:, :6] = np.where((np.arange(6)[:, None] // 2 + np.arange(6)) % 2, 1, -1)
+        board[5, 6] = 1
+        key = position_key(board)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "endgame_mode0.bin")
+            write_tablebase(path, 0, 8, 0, {key: (6, -1, -1, 0, 5)})
+            table = TableBase(path)
+            self.assertEqual(table.lookup(board), {"col": 6, "kill": None, "result": 0, "plies": 5})
+            self.assertIsNone(table.lookup(np.zeros((6, 7), dtype=int)))
+
+            engine = bare_engine()
+            engine.load_tablebase(path)
+            move = engine.get_best_move(board, 6, 0)
+            self.assertEqual(move["solved"]["result"], 0)
+            self.assertIsNone(move["stats"])
+            # Recherche trop courte pour voir la fin : la table n'est pas consultée
+            self.assertNotIn("solved", engine.get_best_move(board, 2, 0))
+            del table, engine
+
+
+class TestMoteurNatif(unittest.TestCase):
+    """Positions fixes du banc d'essai (game.benchmark) : coups, scores et noeuds du moteur C++."""
+
+    # (mode, position) : (colonne, kill, score, noeuds à la profondeur 5, perft 4)
+    REFERENCE = {
+        (0, "vide"): (3, None, 21, 1013, 2401),
+        (0, "ouverture"): (3, None, 126, 1659, 2317),
+        (0, "milieu"): (2, None, -39, 1187, 2039),
+        (0, "fin"): (3, None, 1000000, 257, 1065),
+        (1, "vide"): (3, None, 26, 822, 2401),
+        (1, "ouverture"): (2, (5, 4), 1000000, 1747, 4102),
+        (1, "milieu"): (3, (3, 1), 166, 5088, 11955),
+        (1, "fin"): (4, (3, 6), 1000000, 7003, 46208),
+        (2, "vide"): (3, None, 26, 969, 2401),
+        (2, "ouverture"): (2, None, 1000000, 563, 1946),
+        (2, "milieu"): (4, None, -24, 2423, 3405),
+        (2, "fin"): (5, None, 1000000, 1443, 1759),
+    }
+
+    @classmethod
+    def setUpClass(cls):
+        cls.ai = native_engine()
+
+    def setUp(self):
+        # Table vide et recherche séquentielle : résultats reproductibles
+        self.ai.new_game()
+        self.ai.set_search_threads(1)
+        self.ai.set_kill_pruning(False)
+
+    @staticmethod
+    def position(mode, name):
+        from game.benchmark import POSITIONS, build_position
+        board, (own, opp) = build_position(mode, POSITIONS[mode][name])
+        return board, own, opp
+
+    def search(self, mode, name, depth=5, **options):
+        board, own, opp = self.position(mode, name)
+        return self.ai.get_best_move(board, depth, mode, p1_stock=own, p2_stock=opp, **options)
+
+    def test_positions_de_reference(self):
+        """Coup, score et noeuds à profondeur fixe, perft : inchangés d'une version du moteur à l'autre"""
+        for (mode, name), (col, kill, score, nodes, perft) in self.REFERENCE.items():
+            with self.subTest(mode=mode, position=name):
+                self.ai.new_game()
+                move = self.search(mode, name)
+                self.assertEqual((move["col"], move["kill"]), (col, kill))
+                self.assertEqual(move["stats"]["best_score"], score)
+                self.assertEqual(move["stats"]["nodes"], nodes)
+                board, own, opp = self.position(mode, name)
+                self.assertEqual(self.ai.perft(board, 4, mode, own, opp), perft)
+
+    def test_table_de_transposition(self):
+        """La même recherche relancée repart de la table : même coup, presque aucun noeud ; new_game la vide"""
+        first = self.search(1, "milieu")
+        again = self.search(1, "milieu")
+        self.assertEqual((again["col"], again["kill"], again["stats"]["best_score"]),
+                         (first["col"], first["kill"], first["stats"]["best_score"]))
+        self.assertGreater(again["stats"]["tt_hits"], 0)
+        self.assertLess(again["stats"]["nodes"], first["stats"]["nodes"] // 10)
+
+        self.ai.new_game()
+        self.assertEqual(self.search(1, "milieu")["stats"]["nodes"], first["stats"]["nodes"])
+
+    def test_recherche_chronometree(self):
+        """Budget de temps respecté ; en Classique, le résultat est celui de la profondeur atteinte"""
+        start = time.perf_counter()
+        move = self.search(1, "milieu", time_ms=50)
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertGreaterEqual(move["depth"], 1)
+        board, _, _ = self.position(1, "milieu")
+        self.assertEqual(board[0, move["col"]], 0)
+        if move["kill"] is not None:
+            self.assertEqual(board[move["kill"]], -1)
+
+        for name in ("ouverture", "milieu"):
+            with self.subTest(position=name):
+                self.ai.new_game()
+                timed = self.search(0, name, time_ms=30)
+                self.ai.new_game()
+                fixed = self.search(0, name, depth=timed["depth"])
+                self.assertEqual((timed["col"], timed["stats"]["best_score"]),
+                                 (fixed["col"], fixed["stats"]["best_score"]))
+
+    def test_recherche_multithread(self):
+        """Un thread : recherche séquentielle reproductible ; plusieurs : même score en Classique"""
+        reference = {}
+        for name in ("vide", "ouverture", "milieu"):
+            self.ai.new_game()
+            reference[name] = self.search(0, name)
+        self.ai.set_search_threads(4)
+        for name, single in reference.items():
+            with self.subTest(position=name):
+                # Une position Classique ne se retrouve qu'au même demi-coup : le partage
+                # de la table entre threads ne change pas la valeur de la racine
+                self.ai.new_game()
+                self.assertEqual(self.search(0, name)["stats"]["best_score"], single["stats"]["best_score"])
+
+        self.ai.set_search_threads(1)
+        for name, single in reference.items():
+            self.ai.new_game()
+            move = self.search(0, name)
+            self.assertEqual((move["col"], move["stats"]["nodes"]), (single["col"], single["stats"]["nodes"]))
+
+    def test_statistiques(self):
+        """Statistiques d'une recherche complète à profondeur fixe"""
+        stats = self.search(2, "milieu")["stats"]
+        self.assertEqual(stats["nodes"], self.ai.last_search_nodes())
+        self.assertGreater(stats["cutoffs"], 0)
+        self.assertLessEqual(stats["tt_hits"], stats["nodes"])
+        self.assertTrue(1 <= stats["max_depth"] <= 5)
+        self.assertGreaterEqual(stats["elapsed_us"], 0)
+        self.assertEqual(stats["aborted"], 0)
+        self.assertEqual(stats["kills_skipped"], 0)  # Élagage désactivé
+
+    def test_recherches_concurrentes(self):
+        """Plusieurs threads Python sur un même AIModel : chaque résultat est celui de la recherche seule"""
+        from concurrent.futures import ThreadPoolExecutor
+        from game.benchmark import POSITIONS, build_position
+
+        # Positions sans sous-arbre commun à profondeur 5 (nombres de pions trop éloignés)
+        cases = [(mode, name, size) for size in ((7, 6), (9, 7)) for mode in (0, 1, 2)
+                 for name in ("vide", "milieu", "fin")]
+
+        def run(case):
+            mode, name, size = case
+            board, (own, opp) = build_position(mode, POSITIONS[mode][name], size)
+            move = self.ai.get_best_move(board, 5, mode, p1_stock=own, p2_stock=opp)
+            return move["col"], move["kill"], move["stats"]["best_score"]
+
+        alone = []
+        for case in cases:
+            self.ai.new_game()
+            alone.append(run(case))
+
+        self.ai.new_game()
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            concurrent = list(pool.map(run, cases))
+        self.assertEqual(concurrent, alone)
+
+    def test_variante_1_pose_et_retrait(self):
+        """La pose qui aligne 3 pions est jouée avec le retrait d'un pion adverse"""
+        board = np.zeros((6, 7), dtype=np.int32)
+        board[5, 0] = 1
+        board[5, 1] = 1
+        board[5, 4] = -1
+        board[5, 5] = -1
+        board[4, 4] = -1
+        move = self.ai.get_best_move(board, 4, 1)
+        self.assertIsNotNone(move["kill"])
+        self.assertEqual(board[move["kill"]], -1)
+
+    def test_solveur(self):
+        """Solveur exact : défaite forcée en deux demi-coups, victoire immédiate pour l'adversaire"""
+        # L'adversaire menace des deux côtés (colonnes 0 et 4)
+        board = np.zeros((6, 7), dtype=np.int32)
+        board[5, 1:4] = -1
+        board[4, 1:4] = 1
+        lost = self.ai.solve(board)
+        self.assertEqual((lost["result"], lost["plies"]), (-1, 2))
+
+        won = self.ai.solve(-board)
+        self.assertEqual((won["result"], won["plies"]), (1, 1))
+        self.assertIn(won["col"], (0, 4))
+
+
+class TestServeur(unittest.TestCase):
+
+    def test_partie_solo_tcp(self):
+        """Une partie solo par le protocole TCP : l'IA répond au coup, un coup invalide est refusé"""
+        from game.server import GameServer
+        from game.netclient import Client, ServerError
+
+        async def scenario():
+            server = GameServer(workers=1)
+            port = await server.start(port=0)
+            client = await Client.connect(port=port)
+            try:
+                state = (await client.request("new", variant=2, difficulty=2))["state"]
+                response = await client.request("play", game=state["game"], move=3)
+                with self.assertRaises(ServerError):
+                    await client.request("play", game=state["game"], move=9)
+                metrics = (await client.request("metrics"))["metrics"]
+            finally:
+                await client.close()
+            # Connexion fermée sans "close" : la partie est libérée
+            for _ in range(100):
+                if not server.sessions:
+                    break
+                await asyncio.sleep(0.01)
+            sessions = len(server.sessions)
+            await server.stop()
+            return response, metrics, sessions
+
+        response, metrics, sessions = asyncio.run(scenario())
+        self.assertIn("ai_move", response)
+        self.assertEqual(sum(v != 0 for row in response["state"]["board"] for v in row), 2)
+        self.assertEqual(response["state"]["player"], -1)
+        self.assertEqual(metrics["ai_moves"], 1)
+        self.assertEqual(sessions, 0)
+
+    def test_requetes_refusees(self):
+        """Options invalides refusées ; un tour de l'IA en échec annule le coup humain"""
+        from game.server import GameServer
+
+        async def failing_turn(session):
+            raise ValueError("moteur indisponible")
+
+        async def scenario():
+            server = GameServer(workers=1)
+            refused = [await server.handle_request({"cmd": "new", **options})
+                       for options in ({"difficulty": -1}, {"difficulty": 9}, {"difficulty": "4"},
+                                       {"variant": 1, "difficulty": 41}, {"variant": 2, "difficulty": 42},
+                                       {"difficulty": 42, "width": 9, "height": 7},
+                                       {"time": "abc"}, {"time": 0}, {"time": -5}, {"time": 10 ** 9})]
+            # Résolution exacte (bornée en temps) : Classique 7 x 6 seulement
+            perfect = await server.handle_request({"cmd": "new", "difficulty": 42})
+            state = (await server.handle_request({"cmd": "new", "difficulty": 2, "time": 50}))["state"]
+            server._ai_turn = failing_turn
+            failed = await server.handle_request({"cmd": "play", "game": state["game"], "move": 3})
+            after = (await server.handle_request({"cmd": "state", "game": state["game"]}))["state"]
+            return refused, perfect, failed, after
+
+        refused, perfect, failed, after = asyncio.run(scenario())
+        self.assertFalse(any(r["ok"] for r in refused))
+        self.assertTrue(perfect["ok"])
+        self.assertFalse(failed["ok"])
+        # Toujours au joueur, plateau vide : le coup peut être rejoué
+        self.assertEqual(after["player"], -1)
+        self.assertFalse(any(v for row in after["board"] for v in row))
+
+
+class TestImportSansInterface(unittest.TestCase):
+
+    def test_regles_sans_qt(self):
+        """Les règles et le contrôleur s'importent sans charger PyQt6 ni le moteur"""
+        code = ("import sys, game.gamemanager, game.controller; "
+                "print('PyQt6' in sys.modules, 'game.graphicinterface' in sys.modules)")
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+        self.assertEqual(out.split(), ["False", "False"])
+
+
 if __name__ == '__main__':
     unittest.main()